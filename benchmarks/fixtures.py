@@ -0,0 +1,183 @@
+""" Saved fbref pages used by the benchmarks
+
+Fixtures are stored with the page cache layout (see fbref.function.cache), so the benchmarks read them
+through fetch.get_page in offline mode without any network access. They are either synthetic pages with
+the shape of fbref tables or real pages recorded once from fbref.
+"""
+
+import argparse
+import os
+import random
+import sys
+
+from fbref.function import cache, fetch, player, squad
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# (league, season, players) of the default fixtures, the sizes are close to real seasons
+SEASONS = [('Big 5', '2022-2023', 2800), ('Eredivisie', '2022-2023', 550)]
+
+SQUADS = {'Big 5': 96}
+
+COMPS = ['eng Premier League', 'es La Liga', 'it Serie A', 'de Bundesliga', 'fr Ligue 1']
+
+NATIONS = ['eng ENG', 'fr FRA', 'es ESP', 'de GER', 'it ITA', 'nl NED', 'br BRA', 'ar ARG', 'pt POR']
+
+POSITIONS = ['GK', 'DF', 'DF', 'DF,MF', 'MF', 'MF', 'MF,FW', 'FW', 'FW,MF']
+
+INTEGERS = {'Born', 'Matches Played', 'Starts', 'Minutes', 'Minutes per Match', 'Minutes per Start',
+            'Complete Match', 'Subs', 'Minutes per Subs', 'Unused Subs'}
+
+def stat_name(column: str) -> str:
+    """ data-stat attribute of a column, the name fbref gives it (see player.DATA_STATS) """
+
+    return player.DATA_STATS[column]
+
+def cell(column: str, row: int, rng: random.Random, league: str) -> str:
+    squads = SQUADS.get(league, 18)
+    if column == 'Player':
+        return f'Player {row}'
+    if column == 'Nation':
+        return NATIONS[row % len(NATIONS)]
+    if column == 'Position':
+        return POSITIONS[row % len(POSITIONS)]
+    if column == 'Squad':
+        return f'Squad {row % squads}'
+    if column == 'Comp':
+        return COMPS[(row % squads) % len(COMPS)]
+    if column == 'Age':
+        return f'{17 + row % 20}-{row % 365:03d}'
+    if column == 'Born':
+        return str(2005 - row % 20)
+    if column == 'Minutes':
+        return f'{90 + (row * 37) % 3300:,}'
+    if column == '90s':
+        return f'{(90 + (row * 37) % 3300) / 90:.1f}'
+    if column == 'Matches':
+        return 'Matches'
+    if column in INTEGERS:
+        return str(rng.randint(0, 38))
+    if rng.random() < 0.03:
+        # fbref leaves rates empty when there is nothing to divide
+        return ''
+    return f'{rng.random() * 20:.2f}' if '%' not in column else f'{rng.random() * 100:.1f}'
+
+def player_table(league: str, category: str, players: int, seed: int) -> str:
+    """ Player table with the markup of fbref: rank header cells, player links and repeated header rows """
+
+    rng = random.Random(seed)
+    columns = list(player.COLUMNS[category])
+    if league == 'Big 5':
+        columns.insert(4, 'Comp')
+    header = f'<th data-stat="{stat_name("Rk")}">Rk</th>' + ''.join(f'<th data-stat="{stat_name(col)}">{col}</th>' for col in columns)
+
+    rows = []
+    # playing time also lists the unused substitutes
+    count = players + players // 20 if category == 'playingtime' else players
+    for row in range(count):
+        if row and row % 25 == 0:
+            rows.append(f'<tr class="thead">{header}</tr>')
+        cells = [f'<th scope="row" class="right" data-stat="{stat_name("Rk")}">{row + 1}</th>']
+        for col in columns:
+            value = cell(col, row, rng, league)
+            if col == 'Player':
+                cells.append(f'<td class="left" data-append-csv="{row:08x}" data-stat="{stat_name(col)}">'
+                             f'<a href="/en/players/{row:08x}/{value.replace(" ", "-")}">{value}</a></td>')
+            else:
+                cells.append(f'<td class="right" data-stat="{stat_name(col)}">{value}</td>')
+        rows.append('<tr>' + ''.join(cells) + '</tr>')
+
+    over = f'<tr class="over_header"><th colspan="{len(columns) + 1}">{category}</th></tr>'
+    return (f'<table class="min_width sortable stats_table" id="{player.TABLE_IDS[category]}">'
+            f'<thead>{over}<tr>{header}</tr></thead><tbody>{"".join(rows)}</tbody></table>')
+
+def squad_table(league: str, category: str, opponent: bool, seed: int) -> str:
+    rng = random.Random(seed)
+    columns = list(squad.COLUMNS[category])
+    big5 = league == 'Big 5'
+    # Big 5 squad tables also have a rank and a competition column
+    header = ('<th>Rk</th>' if big5 else '') + ''.join(f'<th>{col}</th>' for col in columns[:1])
+    header += ('<th>Comp</th>' if big5 else '') + ''.join(f'<th>{col}</th>' for col in columns[1:])
+    rows = []
+    for row in range(SQUADS.get(league, 18)):
+        values = [('vs ' if opponent else '') + f'Squad {row}'] + [f'{rng.random() * 100:.1f}' for _ in columns[1:]]
+        if big5:
+            values[1:1] = [COMPS[row % len(COMPS)]]
+            values.insert(0, str(row + 1))
+        rows.append('<tr>' + ''.join(f'<td>{value}</td>' for value in values) + '</tr>')
+    over = f'<tr class="over_header"><th colspan="{len(columns) + 2 * big5}">{category}</th></tr>'
+    return f'<table class="stats_table"><thead>{over}<tr>{header}</tr></thead><tbody>{"".join(rows)}</tbody></table>'
+
+def synthetic_page(league: str, category: str, players: int, seed: int = 0) -> str:
+    """ Build a page shaped like the fbref stats page of a league and category
+
+    Big 5 player pages only hold the player table, other league pages start with the squad tables
+    and hide the player table in a comment like fbref does.
+    """
+
+    table = player_table(league, category, players, seed)
+    if league == 'Big 5':
+        return f'<html><head><title>{category}</title></head><body><div id="all_{category}">{table}</div></body></html>'
+
+    squad_category = {'standard': 'standard', 'passing_types': 'pass_type', 'playingtime': 'playing_time'}.get(category, category)
+    squads = squad_table(league, squad_category, False, seed) + squad_table(league, squad_category, True, seed + 1)
+    return (f'<html><head><title>{category}</title></head><body>{squads}'
+            f'<div id="all_{category}"><!--\n{table}\n--></div></body></html>')
+
+def squad_page(league: str, category: str, seed: int = 0) -> str:
+    """ Build a Big 5 squad page (squads/ urls) with the squad "for" and "opponent" tables """
+
+    tables = squad_table(league, category, False, seed) + squad_table(league, category, True, seed + 1)
+    return f'<html><head><title>{category}</title></head><body>{tables}</body></html>'
+
+def urls(league: str, season: str) -> dict:
+    return {category: player.get_url(league, category, season) for category in player.COLUMNS}
+
+def squad_urls(league: str, season: str) -> dict:
+    """ Squad page urls which are not player pages, only the Big 5 has separate squads/ pages """
+
+    if league != 'Big 5':
+        return {}
+    return {category: squad.get_url(league, category, season) for category in squad.COLUMNS}
+
+def generate(folder: str = None, seasons: list = None):
+    """ Write synthetic pages of every category for the given (league, season, players) """
+
+    cache.CACHE_DIR = folder or FIXTURES_DIR
+    for league, season, players in seasons or SEASONS:
+        for seed, (category, url) in enumerate(urls(league, season).items()):
+            cache.save(url, synthetic_page(league, category, players, seed))
+        for seed, (category, url) in enumerate(squad_urls(league, season).items()):
+            cache.save(url, squad_page(league, category, seed))
+
+def record(folder: str = None, seasons: list = None):
+    """ Download the real pages of the given (league, season) once and keep them as fixtures """
+
+    cache.CACHE_DIR = folder or FIXTURES_DIR
+    cache.ENABLED, cache.OFFLINE = True, False
+    for league, season, *_ in seasons or SEASONS:
+        pages = {**urls(league, season), **{'squad_' + name: url for name, url in squad_urls(league, season).items()}}
+        fetch.get_pages(list(pages.values()), revalidate=True)
+
+def use(folder: str = None):
+    """ Serve every page from the fixtures, a missing fixture raises instead of downloading """
+
+    cache.CACHE_DIR = folder or FIXTURES_DIR
+    cache.ENABLED, cache.OFFLINE = True, True
+
+def exists(league: str, season: str, folder: str = None) -> bool:
+    use(folder)
+    pages = list(urls(league, season).values()) + list(squad_urls(league, season).values())
+    return all(cache.load(url)[0] is not None for url in pages)
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description='Create the fbref pages used by the benchmarks')
+    parser.add_argument('action', choices=['generate', 'record'], help='synthetic pages or real pages from fbref')
+    parser.add_argument('--dir', help=f'fixtures directory, default to {FIXTURES_DIR}')
+    args = parser.parse_args(argv)
+
+    (generate if args.action == 'generate' else record)(args.dir)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
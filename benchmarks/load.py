@@ -0,0 +1,187 @@
+""" End to end load test of the pipeline against the local stand-in server (see benchmarks/server.py)
+
+Full league/season pulls (download, extract, cast, join, store) run against the fixture pages served over
+http, with the page cache off so every round goes through the network path:
+
+    python -m benchmarks.load --rounds 3
+    python -m benchmarks.load --latency 0.2 --jitter 0.1 --throttle 0.05 --errors 0.02 --rate 600
+
+Throughput, page latency percentiles (retries and budget waits included), retries and peak memory are
+printed, and written as JSON with --output.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import requests
+
+from fbref.function import cache, fetch, instrument, pipeline, schedule, store
+
+from . import fixtures
+
+try:
+    import resource
+except ImportError:
+    # no rusage on windows, the peak memory is not reported
+    resource = None
+
+class LoadSink:
+    """ Keep the latency of every page and count the retries """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.bytes = 0
+        self.failures = 0
+        self.retries = {}
+
+    def emit(self, event: dict):
+        with self._lock:
+            if event['stage'] == 'fetch':
+                if 'error' in event:
+                    self.failures += 1
+                else:
+                    self.latencies.append(event['seconds'])
+                    self.bytes += event.get('bytes', 0)
+            elif event['stage'] == 'retry':
+                reason = str(event.get('status', event.get('error')))
+                self.retries[reason] = self.retries.get(reason, 0) + 1
+
+def start_server(folder: str = None, options: list = None) -> tuple:
+    """ Start benchmarks.server in its own process on a free port
+
+    Returns
+    -------
+    tuple of the server process and its base url
+    """
+
+    process = subprocess.Popen([sys.executable, '-m', 'benchmarks.server', '--port', '0',
+                                *(['--dir', folder] if folder else []), *(options or [])],
+                               stdout=subprocess.PIPE, text=True,
+                               cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    line = process.stdout.readline()
+    if not line.startswith('serving on '):
+        process.kill()
+        raise RuntimeError(f'the stand-in server did not start: {line!r}')
+    return process, line.split()[-1]
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macos
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+def run(seasons: list = None, rounds: int = 1, jobs: int = 4, workers: int = None, rate: float = 0,
+        entities: tuple = store.ENTITIES, processes: int = None, folder: str = None, server: list = None) -> dict:
+    """ Pull every fixture season from the stand-in server rounds times
+
+    Parameters
+    ----------
+    seasons : list
+        (league, season, players) fixtures, default to fixtures.SEASONS. Missing fixtures are generated
+    rounds  : int
+        Number of full pulls
+    jobs    : int
+        League/season jobs running at the same time, see pipeline.run
+    workers : int
+        Concurrent network requests, default to fetch.MAX_WORKERS
+    rate    : float
+        Request budget per minute (see schedule), 0 sends as fast as the workers allow
+    entities    : tuple
+        What each job builds and stores, any of store.ENTITIES
+    processes   : int
+        Extract and cast the player tables in this many processes
+    folder  : str
+        Fixtures directory, default to fixtures.FIXTURES_DIR
+    server  : list
+        Command line options of benchmarks.server (ex: ['--latency', '0.1', '--throttle', '0.05'])
+
+    Returns
+    -------
+    dict with the throughput, latency percentiles, retries, peak memory and the server counts
+    """
+
+    seasons = seasons or fixtures.SEASONS
+    for league, season, players in seasons:
+        if not fixtures.exists(league, season, folder):
+            fixtures.generate(folder, [(league, season, players)])
+    leagues = list(dict.fromkeys(league for league, *_ in seasons))
+    names = list(dict.fromkeys(season for _, season, *_ in seasons))
+
+    process, url = start_server(folder, server)
+    sink = instrument.add_sink(LoadSink())
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            fetch.BASE_URL = url
+            fetch.MAX_WORKERS = workers or fetch.MAX_WORKERS
+            cache.ENABLED, cache.OFFLINE = False, False
+            schedule.REQUESTS_PER_MINUTE = rate
+            schedule.RATE_FILE = os.path.join(folder, 'rate.json')
+
+            results, rows = [], 0
+            started = time.perf_counter()
+            for round in range(rounds):
+                results += pipeline.run(leagues, names, entities, jobs, root=os.path.join(folder, str(round)),
+                                        processes=processes)
+            seconds = time.perf_counter() - started
+        served = requests.get(f'{url}/_stats', timeout=fetch.TIMEOUT).json()
+    finally:
+        instrument.remove_sink(sink)
+        process.terminate()
+        process.wait()
+
+    rows = sum(sum(result['rows'].values()) for result in results)
+    latencies = np.array(sink.latencies) * 1000
+    percentiles = np.percentile(latencies, [50, 90, 99]) if len(latencies) else [np.nan] * 3
+    return {'rounds': rounds, 'jobs': len(results), 'failed': [result['status'] for result in results
+                                                              if result['status'] != 'ok'],
+            'seconds': seconds, 'pages': len(latencies), 'page_failures': sink.failures, 'rows': rows,
+            'mb': sink.bytes / 2 ** 20, 'pages_per_s': len(latencies) / seconds, 'rows_per_s': rows / seconds,
+            'mb_per_s': sink.bytes / 2 ** 20 / seconds,
+            'latency_ms': {'p50': percentiles[0], 'p90': percentiles[1], 'p99': percentiles[2],
+                           'max': latencies.max() if len(latencies) else np.nan},
+            'retries': sink.retries, 'peak_rss_mb': peak_rss_mb(), 'server': served}
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description='Load test full pulls against the local stand-in server',
+                                     epilog='other options (ex: --latency, --throttle, --errors) go to benchmarks.server')
+    parser.add_argument('--rounds', type=int, default=1, help='number of full pulls')
+    parser.add_argument('--jobs', type=int, default=4, help='league/season jobs running at the same time')
+    parser.add_argument('--workers', type=int, help='concurrent network requests')
+    parser.add_argument('--rate', type=float, default=0, help='request budget per minute, 0 disables it')
+    parser.add_argument('--entities', nargs='+', default=list(store.ENTITIES), choices=store.ENTITIES)
+    parser.add_argument('--processes', type=int, help='extract and cast tables in this many processes')
+    parser.add_argument('--fixtures', help=f'fixtures directory, default to {fixtures.FIXTURES_DIR}')
+    parser.add_argument('--output', help='write the report to this json file')
+    args, server = parser.parse_known_args(argv)
+
+    report = run(rounds=args.rounds, jobs=args.jobs, workers=args.workers, rate=args.rate,
+                 entities=tuple(args.entities), processes=args.processes, folder=args.fixtures, server=server)
+
+    latency = report['latency_ms']
+    print(f'{report["jobs"] - len(report["failed"])}/{report["jobs"]} jobs in {report["seconds"]:.1f}s')
+    print(f'  {report["pages_per_s"]:8.1f} pages/s {report["rows_per_s"]:10.0f} rows/s {report["mb_per_s"]:8.1f} MB/s')
+    print(f'  latency p50 {latency["p50"]:.0f} ms  p90 {latency["p90"]:.0f} ms  p99 {latency["p99"]:.0f} ms  '
+          f'max {latency["max"]:.0f} ms')
+    print(f'  retries {report["retries"] or 0}  page failures {report["page_failures"]}')
+    if report['peak_rss_mb'] is not None:
+        print(f'  peak rss {report["peak_rss_mb"]:.0f} MB')
+    print(f'  server {report["server"]}')
+    for status in report['failed']:
+        print(f'  {status}')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, default=float)
+    return 0 if not report['failed'] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
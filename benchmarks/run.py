@@ -0,0 +1,185 @@
+""" Offline benchmarks of the scraping and transformation stages
+
+Every stage runs on the saved fixtures (see benchmarks/fixtures.py), is timed separately and reports its
+throughput and peak memory. Results are written as JSON so two commits can be compared:
+
+    python -m benchmarks.run                       # writes benchmarks/results/<commit>.json
+    python -m benchmarks.run --compare benchmarks/results/<other commit>.json
+
+The report also holds the startup time of the command line, see benchmarks/startup.py.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+from fbref.function import fetch, join, player, profile
+
+from . import fixtures, startup
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+PROFILE_COLUMNS = ['Player', 'Position', 'Squad', 'Age', 'Minutes', 'Goals', 'npxG', 'Shots', 'Key Passes',
+                   'Progressive Carries', 'Successful TakeOns', 'Att Pen Touches']
+
+def measure(function, repeat: int) -> dict:
+    """ Time a stage repeat times, then run it once more under tracemalloc for its peak memory """
+
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds_min': min(seconds), 'seconds_median': statistics.median(seconds), 'peak_mb': peak / 2 ** 20}
+
+def frame_bytes(frames) -> int:
+    return int(sum(df.memory_usage(deep=True).sum() for df in frames))
+
+def stages(league: str, season: str) -> list:
+    """ List the (stage, function, rows, bytes) of a fixture season, inputs are prepared outside the timed functions """
+
+    urls = fixtures.urls(league, season)
+    pages = {category: fetch.get_page(url) for category, url in urls.items()}
+    page_bytes = sum(len(html.encode('utf-8')) for html in pages.values())
+
+    tables = {category: player.parse_stats(html, league, category) for category, html in pages.items()}
+    table_rows = sum(len(df) for df in tables.values())
+    ordered = [tables[category] for category in player.JOIN_ORDER]
+    joined = join.join_tables(ordered, join.player_keys(ordered[0]), drop=['Matches'])
+    combined = player.combine_df(*tables.values(), season=season)
+    per_90 = player.get_per_90(combined)
+    position = per_90['Position'].mode().iloc[0]
+
+    result = [
+        ('fetch', lambda: [fetch.get_page(url) for url in urls.values()], table_rows, page_bytes),
+        ('scraping', lambda: [player.parse_stats(html, league, category) for category, html in pages.items()],
+         table_rows, page_bytes),
+        ('scraping_legacy', lambda: [player.parse_stats(html, league, category, backend='legacy')
+                                     for category, html in pages.items()], table_rows, page_bytes),
+    ]
+    if league == 'Big 5':
+        raw = {category: pd.read_html(StringIO(html))[0] for category, html in pages.items()}
+        result.append(('clean_df', lambda: [player.clean_df(df.copy()) for df in raw.values()],
+                       sum(len(df) for df in raw.values()), frame_bytes(raw.values())))
+    result += [
+        ('combine_df', lambda: player.combine_df(*tables.values(), season=season), table_rows,
+         frame_bytes(tables.values())),
+        ('cast_column', lambda: player.cast_column(season, joined.copy()), len(joined), frame_bytes([joined])),
+        ('get_per_90', lambda: player.get_per_90(combined), len(combined), frame_bytes([combined])),
+        ('custom_profile', lambda: profile.custom_profile(per_90, PROFILE_COLUMNS, position), len(per_90),
+         frame_bytes([per_90[PROFILE_COLUMNS]])),
+    ]
+    return result
+
+def run(seasons: list = None, repeat: int = 5, folder: str = None, only: list = None) -> list:
+    """ Run every stage of every fixture season
+
+    Parameters
+    ----------
+    seasons : list
+        (league, season, players) fixtures, default to fixtures.SEASONS. Missing fixtures are generated
+    repeat  : int
+        Number of timed runs per stage
+    folder  : str
+        Fixtures directory, default to fixtures.FIXTURES_DIR
+    only    : list
+        Names of the stages to run, default to every stage
+
+    Returns
+    -------
+    list of dict with the fixture, stage, rows, bytes, timings, throughput and peak memory
+    """
+
+    results = []
+    for league, season, players in seasons or fixtures.SEASONS:
+        if not fixtures.exists(league, season, folder):
+            fixtures.generate(folder, [(league, season, players)])
+        fixtures.use(folder)
+
+        for stage, function, rows, size in stages(league, season):
+            if only and stage not in only:
+                continue
+            timing = measure(function, repeat)
+            results.append({'league': league, 'season': season, 'stage': stage, 'rows': rows, 'bytes': size,
+                            **timing, 'rows_per_s': rows / timing['seconds_min'],
+                            'mb_per_s': size / 2 ** 20 / timing['seconds_min']})
+    return results
+
+def environment() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {'commit': git('rev-parse', '--short', 'HEAD'), 'dirty': bool(git('status', '--porcelain', '--', 'fbref')),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'platform': platform.platform(), 'numpy': np.__version__, 'pandas': pd.__version__}
+
+def compare(report: dict, baseline: dict):
+    """ Print the speedup of every stage and startup command against a baseline run (above 1 is faster) """
+
+    before = {(row['league'], row['stage']): row for row in baseline['results']}
+    for row in report['results']:
+        old = before.get((row['league'], row['stage']))
+        if old is None:
+            continue
+        speedup = old['seconds_min'] / row['seconds_min']
+        memory = row['peak_mb'] - old['peak_mb']
+        print(f'{row["league"]:<12} {row["stage"]:<16} {speedup:6.2f}x  peak {memory:+8.1f} MB')
+
+    before = {row['command']: row for row in baseline.get('startup', [])}
+    for row in report.get('startup', []):
+        old = before.get(row['command'])
+        if old is not None:
+            print(f'{"startup":<12} {row["command"]:<16} {old["seconds_min"] / row["seconds_min"]:6.2f}x')
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the fbref stages on saved pages, without network')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per stage')
+    parser.add_argument('--stages', nargs='+', help='only run these stages')
+    parser.add_argument('--fixtures', help=f'fixtures directory, default to {fixtures.FIXTURES_DIR}')
+    parser.add_argument('--output', help='result file, default to benchmarks/results/<commit>.json')
+    parser.add_argument('--compare', help='previous result file to compare with')
+    parser.add_argument('--no-startup', action='store_true', help='skip the command line startup benchmark')
+    args = parser.parse_args(argv)
+
+    report = {'environment': environment(), 'repeat': args.repeat,
+              'results': run(repeat=args.repeat, folder=args.fixtures, only=args.stages)}
+    if not args.no_startup:
+        report['startup'] = startup.run(args.repeat)
+
+    for row in report['results']:
+        print(f'{row["league"]:<12} {row["stage"]:<16} {row["seconds_min"] * 1000:9.1f} ms '
+              f'{row["rows_per_s"]:12.0f} rows/s {row["mb_per_s"]:8.1f} MB/s  peak {row["peak_mb"]:7.1f} MB')
+    for row in report.get('startup', []):
+        print(f'{"startup":<12} {row["command"]:<16} {row["seconds_min"] * 1000:9.1f} ms')
+
+    output = args.output or os.path.join(RESULTS_DIR, f'{report["environment"]["commit"] or "local"}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'results written to {output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,185 @@
+""" Local stand-in for fbref serving the fixture pages, to load test the scraping without touching the site
+
+    python -m benchmarks.server --port 8000 --latency 0.2 --throttle 0.05 --errors 0.02
+    FBREF_BASE_URL=http://127.0.0.1:8000 FBREF_CACHE=0 python -m fbref.function big5 2022-2023
+
+Pages are looked up with the url they were saved under (see benchmarks/fixtures.py), so every url built by
+player.get_url and squad.get_url is served: the players/ and squads/ pages of the Big 5 and the shared pages
+of the other leagues, which hide their player table in a comment. GET /_stats answers the served counts.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from fbref.function import cache, fetch, player
+
+from . import fixtures
+
+# Status codes of the injected errors
+ERROR_STATUSES = (500, 502, 503)
+
+PLAYER_TABLE = re.compile(r'<table[^>]*id="(?:%s)".*?</table>' % '|'.join(player.TABLE_IDS.values()), re.S)
+
+COMMENT = re.compile(r'(<!--.*?-->)', re.S)
+
+def hide_tables(html: str) -> str:
+    """ Move the player tables which are not in a comment yet into one, like most fbref pages """
+
+    return ''.join(part if part.startswith('<!--') else PLAYER_TABLE.sub(lambda match: f'<!--\n{match[0]}\n-->', part)
+                   for part in COMMENT.split(html))
+
+class StandInServer(ThreadingHTTPServer):
+    """ Threaded http server answering fixture pages with injected latency, throttling and errors
+
+    Parameters
+    ----------
+    address : tuple
+        (host, port) to listen on, port 0 picks a free port
+    folder  : str
+        Fixtures directory, default to fixtures.FIXTURES_DIR
+    latency, jitter : float
+        Every answer waits latency plus a uniform random part of jitter seconds
+    throttle    : float
+        Share of the requests answered 429 Too Many Requests with a Retry-After header
+    retry_after : int
+        Seconds sent in the Retry-After header
+    errors  : float
+        Share of the requests answered with one of ERROR_STATUSES
+    hide    : bool
+        Hide every player table in a comment, the Big 5 pages included
+    seed    : int
+        Seed of the injected throttling and errors
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple, folder: str = None, latency: float = 0, jitter: float = 0,
+                 throttle: float = 0, retry_after: int = 1, errors: float = 0, hide: bool = False,
+                 seed: int = None, verbose: bool = False):
+        super().__init__(address, Handler)
+        fixtures.use(folder)
+        self.latency, self.jitter = latency, jitter
+        self.throttle, self.retry_after, self.errors = throttle, retry_after, errors
+        self.hide, self.verbose = hide, verbose
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.pages = {}
+        self.counts = {}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def page(self, path: str) -> tuple:
+        """ Get the (body, etag) of a fixture page, None when there is no fixture for the path """
+
+        with self.lock:
+            if path not in self.pages:
+                text, _ = cache.load(fetch.BASE_URL + path)
+                if text is not None:
+                    body = (hide_tables(text) if self.hide else text).encode('utf-8')
+                    text = (body, f'"{hashlib.sha256(body).hexdigest()[:16]}"')
+                self.pages[path] = text
+            return self.pages[path]
+
+    def outcome(self) -> int:
+        """ Draw the status of a request: 429, an injected error or 200 """
+
+        with self.lock:
+            draw = self.random.random()
+            if draw < self.throttle:
+                return 429
+            if draw < self.throttle + self.errors:
+                return self.random.choice(ERROR_STATUSES)
+            return 200
+
+    def count(self, status: int, size: int = 0):
+        with self.lock:
+            self.counts[status] = self.counts.get(status, 0) + 1
+            self.counts['bytes'] = self.counts.get('bytes', 0) + size
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {str(key): value for key, value in self.counts.items()}
+
+class Handler(BaseHTTPRequestHandler):
+    # keep-alive connections, like fbref, so the session pool is exercised
+    protocol_version = 'HTTP/1.1'
+
+    def send(self, status: int, body: bytes = b'', headers: dict = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count(status, len(body))
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/_stats':
+            self.send(200, json.dumps(self.server.stats()).encode('utf-8'), {'Content-Type': 'application/json'})
+            return
+
+        server = self.server
+        time.sleep(server.latency + server.random.uniform(0, server.jitter))
+        status = server.outcome()
+        if status == 429:
+            self.send(429, b'Too Many Requests', {'Retry-After': str(server.retry_after)})
+            return
+        if status != 200:
+            self.send(status, b'Injected error')
+            return
+
+        page = server.page(path)
+        if page is None:
+            self.send(404, b'Not Found')
+            return
+        body, etag = page
+        if self.headers.get('If-None-Match') == etag:
+            self.send(304, headers={'ETag': etag})
+            return
+        self.send(200, body, {'Content-Type': 'text/html; charset=utf-8', 'ETag': etag})
+
+    def log_message(self, format: str, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description='Serve the fixture pages at the fbref urls')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000, help='0 picks a free port')
+    parser.add_argument('--dir', help=f'fixtures directory, default to {fixtures.FIXTURES_DIR}')
+    parser.add_argument('--latency', type=float, default=0, help='seconds added to every answer')
+    parser.add_argument('--jitter', type=float, default=0, help='random seconds added on top of latency')
+    parser.add_argument('--throttle', type=float, default=0, help='share of requests answered 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds of the 429 answers')
+    parser.add_argument('--errors', type=float, default=0, help='share of requests answered 5xx')
+    parser.add_argument('--hide-tables', action='store_true', help='hide the Big 5 player tables in comments too')
+    parser.add_argument('--seed', type=int, help='seed of the injected throttling and errors')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args(argv)
+
+    server = StandInServer((args.host, args.port), args.dir, args.latency, args.jitter, args.throttle,
+                           args.retry_after, args.errors, args.hide_tables, args.seed, args.verbose)
+    # the first line is read by benchmarks/load.py to find the port
+    print(f'serving on {server.url}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+""" Startup time of the command line, every command runs in a fresh interpreter like a cron invocation
+
+    python -m benchmarks.startup
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# (name, interpreter arguments) of the timed invocations, the imports show what a command pays
+COMMANDS = [
+    ('python', ['-c', 'pass']),
+    ('cli_help', ['-m', 'fbref.function', '--help']),
+    ('cli_leagues', ['-m', 'fbref.function', 'leagues']),
+    ('import_player', ['-c', 'import fbref.function.player']),
+    ('import_pipeline', ['-c', 'import fbref.function.pipeline']),
+]
+
+def measure(arguments: list, repeat: int) -> dict:
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, *arguments], check=True, stdout=subprocess.DEVNULL)
+        seconds.append(time.perf_counter() - started)
+    return {'seconds_min': min(seconds), 'seconds_median': statistics.median(seconds)}
+
+def run(repeat: int = 10) -> list:
+    """ Time every invocation of COMMANDS
+
+    Returns
+    -------
+    list of dict with the command and its min and median wall time
+    """
+
+    return [{'command': name, **measure(arguments, repeat)} for name, arguments in COMMANDS]
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the startup time of the fbref command line')
+    parser.add_argument('--repeat', type=int, default=10, help='timed runs per command')
+    args = parser.parse_args(argv)
+
+    for row in run(args.repeat):
+        print(f'{row["command"]:<16} {row["seconds_min"] * 1000:8.1f} ms  median {row["seconds_median"] * 1000:8.1f} ms')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
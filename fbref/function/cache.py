@@ -0,0 +1,156 @@
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+# Directory where downloaded pages are stored, override with FBREF_CACHE_DIR
+CACHE_DIR = os.environ.get('FBREF_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'fbref'))
+
+# Set FBREF_CACHE=0 to always download from fbref
+ENABLED = os.environ.get('FBREF_CACHE', '1') != '0'
+
+# Set FBREF_OFFLINE=1 to serve every page from the cache and never touch the network
+OFFLINE = os.environ.get('FBREF_OFFLINE', '0') == '1'
+
+# Pages of finished seasons can not change anymore, current season pages change after every matchday
+FINISHED_TTL = 365 * 24 * 60 * 60
+CURRENT_TTL = 6 * 60 * 60
+
+SEASON_PATTERN = re.compile(r'/(\d{4})(?:-(\d{4}))?/')
+
+def season_end(url: str) -> datetime.date:
+    """ Get the first day after the season of given fbref url, None for urls without a season
+
+    Parameters
+    ----------
+    url : str
+        fbref url, the season is read from the path (ex: /2022-2023/ or /2022/)
+    """
+
+    match = SEASON_PATTERN.search(url)
+    if match is None:
+        return None
+    if match.group(2) is None:
+        # single year seasons (ex: MLS, Brasil) are played within the calendar year
+        return datetime.date(int(match.group(1)) + 1, 1, 1)
+    # european seasons end in june
+    return datetime.date(int(match.group(2)), 7, 1)
+
+def is_finished_season(url: str, now: datetime.date = None) -> bool:
+    """ Check whether the season of given fbref url is already finished
+
+    Parameters
+    ----------
+    url : str
+        fbref url, the season is read from the path (ex: /2022-2023/ or /2022/)
+    now : datetime.date
+        Reference date, default to today
+
+    Returns
+    -------
+    True if the season is over, False for the current season or urls without a season
+    """
+
+    end = season_end(url)
+    return end is not None and (now or datetime.date.today()) >= end
+
+def ttl(url: str, fetched_at: float) -> int:
+    """ Get the seconds a page fetched at given timestamp stays fresh
+
+    Only pages fetched once their season was over get FINISHED_TTL, a page fetched mid season keeps
+    CURRENT_TTL so it is revalidated at least once after the last matchday.
+    """
+
+    fetched = datetime.date.fromtimestamp(fetched_at)
+    return FINISHED_TTL if is_finished_season(url, fetched) else CURRENT_TTL
+
+def _paths(url: str) -> tuple:
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    folder = os.path.join(CACHE_DIR, key[:2])
+    return os.path.join(folder, key + '.html.gz'), os.path.join(folder, key + '.json')
+
+def _write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # one temporary file per process and thread, concurrent writes of the same url never share it
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def load(url: str) -> tuple:
+    """ Load a cached page
+
+    Parameters
+    ----------
+    url : str
+        fbref url of the page
+
+    Returns
+    -------
+    tuple of page html and metadata dict (fetched_at, etag, last_modified), (None, None) if not cached
+    """
+
+    body_path, meta_path = _paths(url)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        with gzip.open(body_path, 'rb') as f:
+            text = f.read().decode('utf-8')
+    except (OSError, ValueError):
+        return None, None
+    return text, meta
+
+def save(url: str, text: str, etag: str = None, last_modified: str = None):
+    """ Store a downloaded page with its validators
+
+    Parameters
+    ----------
+    url : str
+        fbref url of the page
+    text    : str
+        The page html
+    etag    : str
+        ETag response header, if any
+    last_modified   : str
+        Last-Modified response header, if any
+    """
+
+    body_path, meta_path = _paths(url)
+    meta = {'url': url, 'fetched_at': time.time(), 'etag': etag, 'last_modified': last_modified}
+    _write(body_path, gzip.compress(text.encode('utf-8')))
+    _write(meta_path, json.dumps(meta).encode('utf-8'))
+
+def touch(url: str, meta: dict):
+    """ Mark a cached page as fresh again after the server answered 304 Not Modified """
+
+    meta = dict(meta, fetched_at=time.time())
+    _write(_paths(url)[1], json.dumps(meta).encode('utf-8'))
+
+def is_fresh(url: str, meta: dict, now: float = None) -> bool:
+    return (now or time.time()) - meta['fetched_at'] < ttl(url, meta['fetched_at'])
+
+def validators(meta: dict) -> dict:
+    """ Build conditional GET headers from cached metadata """
+
+    headers = {}
+    if meta is None:
+        return headers
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+    return headers
+
+def clear():
+    """ Remove every cached page """
+
+    if not os.path.isdir(CACHE_DIR):
+        return
+    for folder, _, files in os.walk(CACHE_DIR):
+        for name in files:
+            if name.endswith(('.html.gz', '.json', '.tmp')):
+                os.remove(os.path.join(folder, name))
@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+from urllib.parse import quote
+
+import pandas as pd
+
+# Job directory layout:
+#   <job_dir>/<entity>/<league>/<season>/<options>/<category>.parquet  extracted and casted category tables
+#   <job_dir>/manifest.json                                            status of every league/season of a pipeline run
+# options (ex: backend=lxml,compact=True) keeps tables casted differently apart, they are never mixed
+MANIFEST = 'manifest.json'
+
+_lock = threading.Lock()
+
+def table_path(job_dir: str, entity: str, league: str, season: str, category: str, options: dict = None) -> str:
+    variant = ','.join(f'{name}={value}' for name, value in sorted((options or {}).items())) or 'default'
+    return os.path.join(job_dir, entity, quote(league, safe=''), quote(season, safe=''), quote(variant, safe='=,'),
+                        f'{category}.parquet')
+
+def _replace(path: str, write):
+    """ Write a file next to path then move it in place, a crash never leaves half a file """
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def save(df: pd.DataFrame, job_dir: str, entity: str, league: str, season: str, category: str,
+         options: dict = None) -> str:
+    """ Save a category table of a league and season to the job directory
+
+    Parameters
+    ----------
+    df  : pd.DataFrame
+        Extracted and casted category table
+    job_dir : str
+        Job directory, created when missing
+    entity  : str
+        'player', 'squad_for' or 'squad_opponent'
+    league  : str
+        League name, one of the keys of LEAGUES
+    season  : str
+        Season of the table (ex: 2022-2023)
+    category    : str
+        Stats category of the table
+    options : dict
+        Options the table was extracted and casted with (ex: backend, compact), it is only loaded
+        again with the same options
+
+    Returns
+    -------
+    path of the saved table
+    """
+
+    path = table_path(job_dir, entity, league, season, category, options)
+    _replace(path, lambda tmp: df.to_parquet(tmp, index=False))
+    return path
+
+def load(job_dir: str, entity: str, league: str, season: str, category: str, options: dict = None) -> pd.DataFrame:
+    """ Load a category table saved with the same options, None when it was not saved yet """
+
+    path = table_path(job_dir, entity, league, season, category, options)
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+def load_tables(job_dir: str, entity: str, league: str, season: str, categories: list, options: dict = None) -> dict:
+    """ Load the saved tables of several categories, missing categories are left out """
+
+    tables = {}
+    for category in categories:
+        df = load(job_dir, entity, league, season, category, options)
+        if df is not None:
+            tables[category] = df
+    return tables
+
+def raise_failed(results: list):
+    """ Raise the first exception of results (ex: fetch.get_pages with return_exceptions) """
+
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+def read_manifest(job_dir: str) -> dict:
+    path = os.path.join(job_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {'options': None, 'units': {}}
+    with open(path) as f:
+        return json.load(f)
+
+def unit_key(league: str, season: str) -> str:
+    return f'{league}/{season}'
+
+def start(job_dir: str, options: dict) -> dict:
+    """ Open the manifest of a job directory, recording the options of the run the first time
+
+    Parameters
+    ----------
+    job_dir : str
+        Job directory, created when missing
+    options : dict
+        Options changing the saved tables (ex: entities, compact)
+
+    Returns
+    -------
+    the manifest, its units map unit_key(league, season) to the status of that league and season
+
+    Raises
+    ------
+    ValueError when the job directory was started with other options, its tables can not be reused
+    """
+
+    with _lock:
+        manifest = read_manifest(job_dir)
+        if manifest['options'] is not None and manifest['options'] != options:
+            raise ValueError(f'{job_dir} was started with {manifest["options"]}, not {options}')
+        manifest['options'] = options
+        _replace(os.path.join(job_dir, MANIFEST), lambda tmp: _dump(manifest, tmp))
+    return manifest
+
+def mark(job_dir: str, league: str, season: str, status: str, **fields):
+    """ Record the status ('ok' or the failure) of a league and season in the manifest """
+
+    with _lock:
+        manifest = read_manifest(job_dir)
+        manifest['units'][unit_key(league, season)] = {'league': league, 'season': season, 'status': status,
+                                                       'updated': time.strftime('%Y-%m-%dT%H:%M:%S'), **fields}
+        _replace(os.path.join(job_dir, MANIFEST), lambda tmp: _dump(manifest, tmp))
+
+def pending(job_dir: str, pairs: list) -> list:
+    """ Keep the (league, season) pairs which are not done in the manifest """
+
+    units = read_manifest(job_dir)['units']
+    return [(league, season) for league, season in pairs
+            if units.get(unit_key(league, season), {}).get('status') != 'ok']
+
+def _dump(manifest: dict, path: str):
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=2)
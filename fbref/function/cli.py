@@ -0,0 +1,187 @@
+""" Command line entry point, run with python -m fbref.function
+
+    python -m fbref.function leagues
+    python -m fbref.function stats Eredivisie shooting 2022-2023 -o shooting.csv
+    python -m fbref.function big5 2022-2023 --per-90 -o big5.parquet
+    python -m fbref.function squad-for Eredivisie 2022-2023 --format json
+    python -m fbref.function profile 2022-2023 --position FW --columns Player Squad Goals/90 xG/90
+
+Only argparse and the league table are imported at startup, pandas, requests and the parsers are
+loaded by the command which needs them. Keep module level imports of this file light.
+"""
+
+import argparse
+import os
+import sys
+
+from .leagues import LEAGUES
+
+FORMATS = ('csv', 'parquet', 'json')
+
+# Output format of a file extension, stdout is written as csv unless --format is given
+EXTENSIONS = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet', '.json': 'json'}
+
+def output_format(output: str = None, format: str = None) -> str:
+    if format:
+        return format
+    if output:
+        return EXTENSIONS.get(os.path.splitext(output)[1].lower(), 'csv')
+    return 'csv'
+
+def write(df, output: str = None, format: str = None):
+    """ Write a DataFrame as csv, parquet or json records to a file, or to stdout without output
+
+    Parameters
+    ----------
+    df  : pd.DataFrame
+        Table to write
+    output  : str
+        File path, default to stdout
+    format  : str
+        One of FORMATS, default to the extension of output
+    """
+
+    format = output_format(output, format)
+    if format == 'parquet':
+        if not output:
+            raise ValueError('parquet output needs a file, give --output')
+        df.to_parquet(output, index=False)
+    elif format == 'json':
+        df.to_json(output or sys.stdout, orient='records', force_ascii=False)
+        if not output:
+            sys.stdout.write('\n')
+    else:
+        df.to_csv(output or sys.stdout, index=False)
+
+def _players(league: str, season: str, args: argparse.Namespace):
+    from . import player
+
+    if league == 'Big 5':
+        df = player.get_big5_combined(season, args.workers, compact=args.compact, processes=args.processes,
+                                      job_dir=args.job_dir)
+    else:
+        stats = player.get_all_stats(league, season, args.workers, processes=args.processes, compact=args.compact,
+                                     job_dir=args.job_dir)
+        df = player.combine_df(*stats.values(), season=season, compact=args.compact)
+    return player.get_per_90(df) if args.per_90 else df
+
+def leagues_command(args: argparse.Namespace):
+    for league, (id, name) in LEAGUES.items():
+        print(f'{league}\t{id}\t{name}')
+
+def stats_command(args: argparse.Namespace):
+    from . import player
+
+    df = player.get_stats(args.league, args.category, args.season, cast=args.cast, compact=args.cast and args.compact)
+    if df is None:
+        raise ValueError(f'unknown category {args.category}, one of {", ".join(player.COLUMNS)}')
+    return df
+
+def combined_command(args: argparse.Namespace):
+    return _players(args.league, args.season, args)
+
+def big5_command(args: argparse.Namespace):
+    return _players('Big 5', args.season, args)
+
+def squad_for_command(args: argparse.Namespace):
+    from . import squad
+
+    return squad.get_for_stats(args.league, args.season, args.category, args.workers, job_dir=args.job_dir)
+
+def squad_opponent_command(args: argparse.Namespace):
+    from . import squad
+
+    return squad.get_opponent_stats(args.league, args.season, args.category, args.workers, job_dir=args.job_dir)
+
+def profile_command(args: argparse.Namespace):
+    from . import profile
+
+    return profile.custom_profile(_players(args.league, args.season, args), args.columns, args.position,
+                                  args.age_min, args.age_max, args.minutes)
+
+def parser() -> argparse.ArgumentParser:
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument('-o', '--output', help='output file, default to stdout')
+    output.add_argument('--format', choices=FORMATS, help='output format, default to the output extension or csv')
+    output.add_argument('--workers', type=int, help='concurrent network requests')
+
+    players = argparse.ArgumentParser(add_help=False)
+    players.add_argument('--per-90', action='store_true', help='per 90 minutes stats, see get_per_90')
+    players.add_argument('--compact', action='store_true', help='compact dtypes, see cast_types')
+    players.add_argument('--processes', type=int, help='extract and cast tables in this many processes')
+    players.add_argument('--job-dir', help='checkpoint the extracted tables here, run again to resume')
+
+    league = argparse.ArgumentParser(add_help=False)
+    league.add_argument('league', choices=list(LEAGUES), metavar='league', help='league name, see the leagues command')
+
+    main = argparse.ArgumentParser(prog='python -m fbref.function', description='Scrape fbref stats tables')
+    commands = main.add_subparsers(dest='command', metavar='command', required=True)
+
+    command = commands.add_parser('leagues', help='list the leagues')
+    command.set_defaults(function=leagues_command)
+
+    command = commands.add_parser('stats', parents=[league, output], help='individual stats of one category')
+    command.add_argument('category', help='stats category (ex: standard, shooting, gca)')
+    command.add_argument('season', help='season (ex: 2022-2023)')
+    command.add_argument('--cast', action='store_true', help='cast the columns, see cast_types')
+    command.add_argument('--compact', action='store_true', help='compact dtypes with --cast')
+    command.set_defaults(function=stats_command)
+
+    command = commands.add_parser('combined', parents=[league, output, players],
+                                  help='every individual stats category of a league in one table')
+    command.add_argument('season', help='season (ex: 2022-2023)')
+    command.set_defaults(function=combined_command)
+
+    command = commands.add_parser('big5', parents=[output, players], help='combined individual stats of the Big 5')
+    command.add_argument('season', help='season (ex: 2022-2023)')
+    command.set_defaults(function=big5_command)
+
+    for name, function, help in [('squad-for', squad_for_command, 'squad stats'),
+                                 ('squad-opponent', squad_opponent_command, 'stats of the squad opponents')]:
+        command = commands.add_parser(name, parents=[league, output], help=help)
+        command.add_argument('season', help='season (ex: 2022-2023)')
+        command.add_argument('--category', help='single squad category, default to every category combined')
+        command.add_argument('--job-dir', help='checkpoint the extracted tables here, run again to resume')
+        command.set_defaults(function=function)
+
+    command = commands.add_parser('profile', parents=[output, players], help='percentile profile of a position')
+    command.add_argument('season', help='season (ex: 2022-2023)')
+    command.add_argument('--league', choices=list(LEAGUES), default='Big 5', metavar='league', help='default to Big 5')
+    command.add_argument('--position', required=True, help='position of the players (ex: FW, DF,MF)')
+    command.add_argument('--columns', nargs='+', required=True, help='columns to keep, stats columns are ranked')
+    command.add_argument('--age-min', type=int, default=16)
+    command.add_argument('--age-max', type=int, default=45)
+    command.add_argument('--minutes', type=int, default=0, help='minimum minutes played')
+    command.set_defaults(function=profile_command)
+    return main
+
+def _errors() -> tuple:
+    """ Errors reported in one line: bad arguments, pages missing offline and http failures
+
+    The except clause is evaluated once the command failed, requests is only looked up when the command
+    loaded it so --help and leagues stay light.
+    """
+
+    requests = sys.modules.get('requests')
+    return (ValueError, LookupError) + ((requests.RequestException,) if requests is not None else ())
+
+def main(argv: list = None) -> int:
+    args = parser().parse_args(argv)
+    if getattr(args, 'format', None) == 'parquet' and not args.output:
+        parser().error('parquet output needs a file, give --output')
+
+    try:
+        df = args.function(args)
+    except _errors() as error:
+        print(f'error: {error}', file=sys.stderr)
+        return 1
+    if df is not None:
+        try:
+            write(df, args.output, args.format)
+        except BrokenPipeError:
+            # stdout closed early (ex: piped to head), silence the flush at exit
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
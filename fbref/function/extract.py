@@ -0,0 +1,133 @@
+from io import BytesIO
+
+import lxml.etree
+import lxml.html
+
+def find_table(html: str, id: str) -> str:
+    """ Find the html of a single table without parsing the rest of the document
+
+    fbref hides most of its tables inside html comments, searching the raw text finds them either way.
+
+    Parameters
+    ----------
+    html    : str
+        The page html downloaded from fbref
+    id  : str
+        The id html tag from the table we want to scrape (ex: stats_standard, stats_shooting)
+
+    Returns
+    -------
+    the table html, None if the page does not contain the table
+    """
+
+    position = html.find(f'id="{id}"')
+    if position == -1:
+        return None
+
+    start = html.rfind('<table', 0, position)
+    end = html.find('</table>', position)
+    if start == -1 or end == -1:
+        return None
+    return html[start:end + len('</table>')]
+
+def extract_table(html: str, id: str) -> dict:
+    """ Extract the body of a table column by column, keyed by the data-stat attribute of the cells
+
+    Rows are aligned on data-stat, a row missing a cell gets an empty string for that column instead of
+    shifting the remaining cells. Cells with a data-append-csv attribute (ex: the player cell which carries
+    the fbref player id) also emit a '<data-stat>_id' column.
+
+    Parameters
+    ----------
+    html    : str
+        The page html downloaded from fbref
+    id  : str
+        The id html tag from the table we want to scrape (ex: stats_standard, stats_shooting)
+
+    Returns
+    -------
+    dict of data-stat to list of cell texts, in the column order of the table header
+    """
+
+    fragment = find_table(html, id)
+    if fragment is None:
+        raise ValueError(f'table {id} not found')
+
+    table = lxml.html.fragment_fromstring(fragment)
+    header = table.findall('thead/tr')
+    data = {}
+    if header:
+        for cell in header[-1]:
+            stat = cell.get('data-stat')
+            if stat is not None:
+                data[stat] = []
+
+    count = 0
+    for row in table.iterfind('tbody/tr'):
+        # repeated header rows inside the body
+        if 'thead' in (row.get('class') or ''):
+            continue
+
+        cells = _row_cells(row)
+        for stat in cells:
+            if stat not in data:
+                data[stat] = [''] * count
+        for stat, values in data.items():
+            values.append(cells.get(stat, ''))
+        count += 1
+
+    return data
+
+def _row_cells(row) -> dict:
+    cells = {}
+    for cell in row:
+        stat = cell.get('data-stat')
+        if stat is None:
+            continue
+        cells[stat] = ''.join(cell.itertext())
+        key = cell.get('data-append-csv')
+        if key is not None:
+            cells[stat + '_id'] = key
+    return cells
+
+def stream_table(html: str, id: str) -> tuple:
+    """ Parse a table incrementally, each body row is released once it has been yielded
+
+    Parameters
+    ----------
+    html    : str
+        The page html downloaded from fbref
+    id  : str
+        The id html tag from the table we want to scrape (ex: stats_standard, stats_shooting)
+
+    Returns
+    -------
+    tuple of the data-stat of the header cells, in order, and an iterator of dict of data-stat to cell text
+    per body row (see extract_table for the '<data-stat>_id' keys)
+    """
+
+    fragment = find_table(html, id)
+    if fragment is None:
+        raise ValueError(f'table {id} not found')
+
+    events = lxml.etree.iterparse(BytesIO(fragment.encode('utf-8')), events=('end',), tag=('tr', 'thead'), html=True)
+    header = []
+    for _, element in events:
+        if element.tag == 'thead':
+            rows = element.findall('tr')
+            if rows:
+                header = [cell.get('data-stat') for cell in rows[-1] if cell.get('data-stat') is not None]
+            break
+
+    def rows():
+        for _, row in events:
+            if row.tag != 'tr' or row.getparent().tag != 'tbody':
+                continue
+            # repeated header rows inside the body
+            if 'thead' not in (row.get('class') or ''):
+                yield _row_cells(row)
+            row.clear()
+            while row.getprevious() is not None:
+                del row.getparent()[0]
+
+    return header, rows()
@@ -0,0 +1,132 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import cache, instrument, schedule
+
+# Scheme and host of every page url, override with FBREF_BASE_URL (ex: a local stand-in server)
+BASE_URL = os.environ.get('FBREF_BASE_URL', 'https://fbref.com').rstrip('/')
+
+# Maximum number of pages fetched at the same time
+MAX_WORKERS = 4
+
+# Seconds to wait for fbref to answer, timed out requests are retried by the scheduler
+TIMEOUT = 30
+
+_session = None
+_session_lock = threading.Lock()
+
+# Limits network requests across every thread, cache hits do not take a slot
+_slots = None
+
+def get_session() -> requests.Session:
+    """ Get the shared keep-alive session used for every fbref request
+
+    Returns
+    -------
+    a requests Session with a connection pool big enough for MAX_WORKERS threads
+    """
+
+    global _session, _slots
+    with _session_lock:
+        if _session is None:
+            _slots = threading.BoundedSemaphore(MAX_WORKERS)
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+    return _session
+
+def _request(url: str, headers: dict = None) -> requests.Response:
+    session = get_session()
+
+    def send(url: str, headers: dict = None) -> requests.Response:
+        with _slots:
+            return session.get(url, headers=headers, timeout=TIMEOUT)
+
+    # every request waits for the shared budget (see schedule), retries included
+    return schedule.request(send, url, headers=headers)
+
+def _get_page(url: str, revalidate: bool) -> tuple:
+    if not cache.ENABLED:
+        response = _request(url)
+        response.raise_for_status()
+        return response.text, 'network'
+
+    text, meta = cache.load(url)
+    if text is not None and (cache.OFFLINE or (not revalidate and cache.is_fresh(url, meta))):
+        return text, 'cache'
+    if cache.OFFLINE:
+        raise LookupError(f'{url} is not cached and offline mode is on')
+
+    response = _request(url, cache.validators(meta))
+    if response.status_code == 304 and text is not None:
+        cache.touch(url, meta)
+        return text, 'not_modified'
+
+    response.raise_for_status()
+    cache.save(url, response.text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+    return response.text, 'network'
+
+def get_page(url: str, revalidate: bool = False) -> str:
+    """ Download a single page through the shared session
+
+    Fresh pages are served from the disk cache, stale ones are revalidated with a conditional GET.
+    In offline mode only the cache is used.
+
+    Parameters
+    ----------
+    url : str
+        The url from fbref page which we want to download
+    revalidate  : bool
+        Check with the server even if the cached page is still fresh
+
+    Returns
+    -------
+    the page html as text
+    """
+
+    with instrument.stage('fetch', url=url) as event:
+        text, event['source'] = _get_page(url, revalidate)
+        if instrument.enabled():
+            event['bytes'] = len(text.encode('utf-8'))
+        return text
+
+def get_pages(urls: list, max_workers: int = None, revalidate: bool = False, return_exceptions: bool = False) -> list:
+    """ Download several pages at the same time
+
+    Parameters
+    ----------
+    urls    : list
+        The urls to be downloaded
+    max_workers : int
+        Maximum number of concurrent downloads, default to MAX_WORKERS
+    revalidate  : bool
+        Check with the server even if the cached pages are still fresh
+    return_exceptions   : bool
+        Return the exception of a failed download in place of its page instead of raising it,
+        the other pages are still downloaded
+
+    Returns
+    -------
+    list of page html in the same order as urls
+    """
+
+    def get(url):
+        try:
+            return get_page(url, revalidate)
+        except Exception as error:
+            if not return_exceptions:
+                raise
+            return error
+
+    max_workers = max_workers or MAX_WORKERS
+    if max_workers == 1 or len(urls) <= 1:
+        return [get(url) for url in urls]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+        return list(executor.map(get, urls))
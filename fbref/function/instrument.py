@@ -0,0 +1,264 @@
+import contextlib
+import cProfile
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+# Sinks receiving every event, nothing is measured while this is empty and profiling is off
+_sinks = []
+
+# Stage name to cProfile stats, filled when profiling is enabled (see enable_profiling)
+profiles = {}
+
+_profiling = None
+_lock = threading.Lock()
+
+# cProfile can not nest, an inner stage is counted in the profile of the outer one
+_active = threading.local()
+
+# Open stages measuring memory, the tracemalloc peak is process wide: it is folded into every open stage
+# before a stage resets it, so nested and concurrent stages never lose the peak of the others
+_memory_stages = []
+_tracing = False
+
+def add_sink(sink):
+    """ Send the events to given sink (LogSink, CounterSink, PrometheusSink or any object with an emit method) """
+
+    _sinks.append(sink)
+    return sink
+
+def remove_sink(sink):
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+def enabled() -> bool:
+    return bool(_sinks) or _profiling is not None
+
+def record(name: str, seconds: float = None, **fields):
+    """ Send an event to every sink
+
+    Parameters
+    ----------
+    name    : str
+        Stage of the event (ex: fetch, parse, cast, join)
+    seconds : float
+        Time spent in the stage
+    fields
+        Anything describing the event (ex: url, bytes, rows, league, category)
+    """
+
+    if not _sinks:
+        return
+    event = {'stage': name, 'seconds': seconds, **fields}
+    for sink in list(_sinks):
+        sink.emit(event)
+
+def enable_profiling(stages: list = None, cpu: bool = True, memory: bool = False, folder: str = None):
+    """ Profile the stages with cProfile and/or tracemalloc
+
+    Parameters
+    ----------
+    stages  : list
+        Stage names to profile, default to every stage
+    cpu : bool
+        Collect cProfile stats in profiles, and dump them to folder/<stage>.prof if folder is given
+    memory  : bool
+        Add the tracemalloc peak of the stage to its event as 'peak_bytes', it includes its inner stages
+        and, tracemalloc being process wide, what other threads allocated meanwhile
+    folder  : str
+        Directory where the cProfile stats are dumped by disable_profiling
+
+    cProfile only follows the thread running the stage, network requests made in a thread pool
+    show up as waiting time.
+    """
+
+    global _profiling
+    _profiling = {'stages': set(stages) if stages else None, 'cpu': cpu, 'memory': memory, 'folder': folder}
+
+def disable_profiling():
+    """ Stop profiling and dump the collected cProfile stats when a folder was given """
+
+    global _profiling, _tracing
+    settings, _profiling = _profiling, None
+    with _lock:
+        if _tracing and not _memory_stages:
+            # tracemalloc slows every allocation, stop it when it was started for the stages
+            tracemalloc.stop()
+            _tracing = False
+    if settings and settings['folder']:
+        os.makedirs(settings['folder'], exist_ok=True)
+        for name, stats in profiles.items():
+            stats.dump_stats(os.path.join(settings['folder'], f'{name}.prof'))
+
+def _profiled(name: str) -> bool:
+    return _profiling is not None and (_profiling['stages'] is None or name in _profiling['stages'])
+
+def _fold_peak():
+    """ Add the peak since the last reset to every open stage then reset it, call with _lock held """
+
+    current, peak = tracemalloc.get_traced_memory()
+    for usage in _memory_stages:
+        usage['peak'] = max(usage['peak'], peak)
+    tracemalloc.reset_peak()
+    return current
+
+def _open_memory() -> dict:
+    global _tracing
+    with _lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing = True
+        current = _fold_peak()
+        usage = {'baseline': current, 'peak': current}
+        _memory_stages.append(usage)
+    return usage
+
+def _close_memory(usage: dict) -> int:
+    """ Stop measuring a stage, return its peak above the memory traced when it started """
+
+    with _lock:
+        _fold_peak()
+        _memory_stages[:] = [other for other in _memory_stages if other is not usage]
+    return usage['peak'] - usage['baseline']
+
+@contextlib.contextmanager
+def stage(name: str, **fields):
+    """ Time a block and send it as an event, the block can add fields (ex: rows) to the yielded dict
+
+    Example
+    -------
+    with instrument.stage('cast', columns=len(df.columns)) as event:
+        df = cast(df)
+        event['rows'] = len(df)
+    """
+
+    if not enabled():
+        yield fields
+        return
+
+    profile = _profiled(name)
+    profiler = None
+    if profile and _profiling['cpu'] and not getattr(_active, 'profiling', False):
+        profiler = cProfile.Profile()
+    memory = profile and _profiling['memory']
+    if memory:
+        usage = _open_memory()
+
+    started = time.perf_counter()
+    if profiler is not None:
+        try:
+            profiler.enable()
+            _active.profiling = True
+        except ValueError:
+            # another profiler runs in a different thread (python 3.12+)
+            profiler = None
+    try:
+        yield fields
+    except Exception as error:
+        fields['error'] = type(error).__name__
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            _active.profiling = False
+        seconds = time.perf_counter() - started
+        if memory:
+            fields['peak_bytes'] = _close_memory(usage)
+        if profiler is not None:
+            with _lock:
+                if name in profiles:
+                    profiles[name].add(profiler)
+                else:
+                    profiles[name] = pstats.Stats(profiler)
+        record(name, seconds, **fields)
+
+class LogSink:
+    """ Log every event as a json line """
+
+    def __init__(self, logger: logging.Logger = None, level: int = logging.INFO):
+        self.logger = logger or logging.getLogger('fbref')
+        self.level = level
+
+    def emit(self, event: dict):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, json.dumps(event, default=str))
+
+class CounterSink:
+    """ Count calls, seconds, bytes, rows and errors per stage in memory, and the last timing of every url """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.sources = {}
+            self.urls = {}
+
+    def emit(self, event: dict):
+        with self._lock:
+            counters = self.stages.setdefault(event['stage'], dict.fromkeys(
+                ('calls', 'seconds', 'bytes', 'rows', 'errors'), 0))
+            counters['calls'] += 1
+            counters['seconds'] += event.get('seconds') or 0
+            counters['bytes'] += event.get('bytes', 0)
+            counters['rows'] += event.get('rows', 0)
+            counters['errors'] += 'error' in event
+            if 'source' in event:
+                self.sources[event['source']] = self.sources.get(event['source'], 0) + 1
+            if 'url' in event:
+                self.urls[event['url']] = {'seconds': event.get('seconds'), 'bytes': event.get('bytes', 0),
+                                           'source': event.get('source')}
+
+    def snapshot(self) -> dict:
+        """ Copy of the counters: stages, fetch sources (cache, network, not_modified) and urls """
+
+        with self._lock:
+            return {'stages': {name: dict(counters) for name, counters in self.stages.items()},
+                    'sources': dict(self.sources), 'urls': dict(self.urls)}
+
+class PrometheusSink(CounterSink):
+    """ Keep counters and write them in the Prometheus text format (ex: for the node exporter textfile collector)
+
+    The file is replaced at most every interval seconds while events come in, call write for a final update.
+    """
+
+    def __init__(self, path: str, prefix: str = 'fbref', interval: float = 5):
+        self.path = path
+        self.prefix = prefix
+        self.interval = interval
+        self._written = 0
+        super().__init__()
+
+    def emit(self, event: dict):
+        super().emit(event)
+        if time.monotonic() - self._written >= self.interval:
+            self.write()
+
+    def render(self) -> str:
+        snapshot = self.snapshot()
+        lines = []
+        for counter in ('calls', 'seconds', 'bytes', 'rows', 'errors'):
+            metric = f'{self.prefix}_stage_{counter}_total'
+            lines.append(f'# TYPE {metric} counter')
+            for name, counters in sorted(snapshot['stages'].items()):
+                lines.append(f'{metric}{{stage="{name}"}} {counters[counter]}')
+        metric = f'{self.prefix}_fetch_source_total'
+        lines.append(f'# TYPE {metric} counter')
+        for source, count in sorted(snapshot['sources'].items()):
+            lines.append(f'{metric}{{source="{source}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self):
+        self._written = time.monotonic()
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+        tmp = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp, self.path)
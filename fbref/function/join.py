@@ -0,0 +1,77 @@
+import warnings
+
+import pandas as pd
+
+from . import instrument
+
+# fbref player id from the row link, a player who changed club mid season has one row per squad
+PLAYER_KEYS = ['Player ID', 'Squad']
+
+# used when the tables were parsed without player ids (legacy backend)
+PLAYER_FALLBACK_KEYS = ['Player', 'Squad', 'Born']
+
+SQUAD_KEYS = ['Squad']
+
+def player_keys(df: pd.DataFrame) -> list:
+    return PLAYER_KEYS if 'Player ID' in df.columns else PLAYER_FALLBACK_KEYS
+
+def reset_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """ Move the index back to columns with a concat, reset_index inserts them one by one """
+
+    return pd.concat([df.index.to_frame(index=False), df.reset_index(drop=True)], axis=1)
+
+def join_tables(tables: list, keys: list, drop: list = None) -> pd.DataFrame:
+    """ Join category tables on a stable key with one aligned concat
+
+    Columns shared between tables (Player, Nation, 90s...) are only taken from the first table containing
+    them, so no duplicate columns are created and dropped afterwards. Rows are aligned on the keys, not on
+    their position, only keys present in every table are kept. Rows of the first table missing from another
+    table and rows sharing their keys with a previous row of the same table are left out with a warning,
+    their counts are added to the join event as 'dropped' and 'duplicates'.
+
+    Parameters
+    ----------
+    tables  : list
+        Category DataFrames, the first one gives the row order
+    keys    : list
+        Columns identifying a row in every table (ex: PLAYER_KEYS, SQUAD_KEYS)
+    drop    : list
+        Columns to leave out of the result
+
+    Returns
+    -------
+    wide DataFrame with the columns of every table in order of first appearance
+    """
+
+    with instrument.stage('join', tables=len(tables), keys=','.join(keys)) as event:
+        df, event['dropped'], event['duplicates'] = _join_tables(tables, keys, drop)
+        event['rows'] = len(df)
+    return df
+
+def _join_tables(tables: list, keys: list, drop: list) -> tuple:
+    drop = set(drop or [])
+    order = [col for col in tables[0].columns if col not in drop]
+    seen = set(keys)
+    parts = []
+    duplicates = 0
+    for number, df in enumerate(tables):
+        columns = [col for col in df.columns if col not in seen and col not in drop]
+        seen.update(columns)
+        if df is not tables[0]:
+            order.extend(columns)
+        part = df.set_index(keys)[columns]
+        duplicated = part.index.duplicated()
+        if duplicated.any():
+            warnings.warn(f'{duplicated.sum()} rows of table {number} have the same {", ".join(keys)} as a previous '
+                          f'row, only the first one is joined', stacklevel=4)
+            duplicates += int(duplicated.sum())
+            part = part[~duplicated]
+        parts.append(part)
+
+    df = pd.concat(parts, axis=1, join='inner')
+    # rows only found in the other tables (ex: unused substitutes of playing time) are expected to go
+    dropped = len(parts[0]) - len(df)
+    if dropped:
+        warnings.warn(f'{dropped} rows of table 0 are missing from another table and are left out of the join',
+                      stacklevel=4)
+    return reset_keys(df)[order], dropped, duplicates
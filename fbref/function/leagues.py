@@ -0,0 +1,15 @@
+# fbref competition id and url name of every league, kept free of imports so the command line
+# can list and check leagues without loading the scraping stack
+LEAGUES = {'Eredivisie': ['23', 'Eredivisie'],
+           'Primeira Liga': ['32', 'Primerira-Liga'],
+           'MLS': ['22', 'Major-League-Soccer'], 
+           'Championship': ['10', 'Championship'],
+           'Brasil': ['24', 'Serie-A'],
+           'Liga MX': ['31', 'Liga-MX'],
+           'Primera Division': ['21', 'Primera-Division'],
+           'Belgian Pro Leage': ['37', 'Belgian-Pro-League'],
+           'Segunda': ['17', 'Segunda-Division'],
+           'Serie B': ['18', 'Serie-B'],
+           'Bundesliga 2': ['33', '2-Bundesliga'],
+           'Ligue 2': ['60', 'Ligue-2'],
+           'Big 5': ['Big5', 'Big-5-European-League']}
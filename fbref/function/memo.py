@@ -0,0 +1,135 @@
+import functools
+import inspect
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Memory budget of the memoized tables in bytes, override with FBREF_MEMO_BYTES
+BUDGET = int(os.environ.get('FBREF_MEMO_BYTES', 512 * 2 ** 20))
+
+# Set FBREF_MEMO=0 to always download and parse again
+ENABLED = os.environ.get('FBREF_MEMO', '1') != '0'
+
+# Arguments which do not change the result
+IGNORED = ('max_workers', 'processes')
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'bytes': 0}
+
+def _copy_on_write() -> bool:
+    try:
+        return int(pd.__version__.split('.')[0]) >= 3 or pd.get_option('mode.copy_on_write') is True
+    except (KeyError, ValueError):
+        return False
+
+def _copy(value):
+    """ Copy a cached value for the caller, a lazy copy when pandas copy-on-write is on, a deep copy otherwise """
+
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=not _copy_on_write())
+    if isinstance(value, tuple):
+        return tuple(_copy(item) for item in value)
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    return value
+
+def _size(value) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (tuple, list)):
+        return sum(_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(_size(item) for item in value.values())
+    return 0
+
+def _store(key: tuple, value, size: int, league: str, season: str):
+    with _lock:
+        if key in _entries:
+            _stats['bytes'] -= _entries.pop(key)['size']
+        _entries[key] = {'value': value, 'size': size, 'league': league, 'season': season}
+        _stats['bytes'] += size
+        # least recently used tables go first
+        while _stats['bytes'] > BUDGET and _entries:
+            _, entry = _entries.popitem(last=False)
+            _stats['bytes'] -= entry['size']
+            _stats['evictions'] += 1
+
+def memoize(league: str = None):
+    """ Memoize a function returning parsed tables, in a LRU cache bounded by BUDGET bytes
+
+    Parameters
+    ----------
+    league  : str
+        League of the results when the function has no league argument (ex: Big 5 for get_big5_combined)
+
+    Calls with arguments which can not be hashed (ex: a DataFrame) are not memoized. Results are
+    copies, changing them never changes the cached tables.
+    """
+
+    def decorator(function):
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return function(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {name: value for name, value in bound.arguments.items() if name not in IGNORED}
+            key = (function.__module__, function.__qualname__, tuple(sorted(arguments.items())))
+            try:
+                hash(key)
+            except TypeError:
+                return function(*args, **kwargs)
+
+            with _lock:
+                entry = _entries.get(key)
+                if entry is not None:
+                    _entries.move_to_end(key)
+                    _stats['hits'] += 1
+                else:
+                    _stats['misses'] += 1
+            if entry is not None:
+                return _copy(entry['value'])
+
+            value = function(*args, **kwargs)
+            size = _size(value)
+            if value is not None and size <= BUDGET:
+                _store(key, value, size, arguments.get('league', league), arguments.get('season'))
+                return _copy(value)
+            return value
+
+        return wrapper
+    return decorator
+
+def invalidate(league: str = None, season: str = None) -> int:
+    """ Drop the memoized tables of a league and/or season (every table when both are None)
+
+    Returns
+    -------
+    number of dropped tables
+    """
+
+    with _lock:
+        keys = [key for key, entry in _entries.items()
+                if (league is None or entry['league'] == league) and (season is None or entry['season'] == season)]
+        for key in keys:
+            _stats['bytes'] -= _entries.pop(key)['size']
+    return len(keys)
+
+def clear():
+    invalidate()
+
+def stats() -> dict:
+    """ Hits, misses, evictions, bytes used and number of memoized tables """
+
+    with _lock:
+        return {**_stats, 'entries': len(_entries), 'budget': BUDGET}
@@ -0,0 +1,73 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# Default number of worker processes, one per core
+PROCESSES = os.cpu_count() or 1
+
+_pool = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+def get_pool(processes: int = None) -> ProcessPoolExecutor:
+    """ Get the shared process pool, it is created again when a different size is asked
+
+    Workers are spawned instead of forked, the parent runs download threads which must not be copied.
+    """
+
+    global _pool, _pool_size
+    processes = processes or PROCESSES
+    with _pool_lock:
+        if _pool is None or _pool_size != processes:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'))
+            _pool_size = processes
+    return _pool
+
+def shutdown():
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool, _pool_size = None, 0
+
+def to_ipc(df: pd.DataFrame) -> bytes:
+    """ Serialize a DataFrame to an Arrow IPC stream, columns travel as buffers instead of pickled objects """
+
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def from_ipc(data: bytes) -> pd.DataFrame:
+    import pyarrow as pa
+
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+def map_frames(function, calls: list, processes: int = None) -> list:
+    """ Run function(*args) for every args of calls in the process pool
+
+    Parameters
+    ----------
+    function    : callable
+        Module level function returning a DataFrame serialized with to_ipc
+    calls   : list
+        Arguments of every call
+    processes   : int
+        Number of worker processes, default to PROCESSES
+
+    Returns
+    -------
+    list of DataFrames in the same order as calls
+    """
+
+    pool = get_pool(processes)
+    futures = [pool.submit(function, *args) for args in calls]
+    return [from_ipc(future.result()) for future in futures]
@@ -0,0 +1,287 @@
+import argparse
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from . import checkpoint, fetch, instrument, join, parallel, player, refresh, rollup, squad, store
+
+# Leagues played within a calendar year, their seasons are a single year (ex: 2022)
+CALENDAR_LEAGUES = ('MLS', 'Brasil')
+
+STAGES = ('fetch', 'extract', 'cast', 'join', 'derive', 'write')
+
+def league_season(league: str, season: str) -> str:
+    """ Convert a season to the format used by the league (2022-2023 is 2022 for calendar leagues) """
+
+    if league in CALENDAR_LEAGUES and '-' in season:
+        return season[:4]
+    return season
+
+def run_job(league: str, season: str, entities: tuple = ('player',), per_90: bool = False, compact: bool = False,
+            root: str = None, format: str = None, progress=None, processes: int = None, job_dir: str = None) -> dict:
+    """ Run every stage for a single league and season
+
+    Parameters
+    ----------
+    league  : str
+        League name, one of the keys of LEAGUES
+    season  : str
+        Season to be scrapped (ex: 2022-2023)
+    entities    : tuple
+        What to build and store, any of store.ENTITIES
+    per_90  : bool
+        Also store the per 90 player DataFrame as 'player_per90'
+    compact : bool
+        Use compact dtypes, see player.cast_types
+    root    : str
+        Root directory of the store, default to store.STORE_DIR
+    format  : str
+        Store format, default to store.FORMAT
+    progress    : callable
+        Called with (league, season, stage, seconds) after every stage
+    processes   : int
+        Extract and cast the player tables in this many worker processes (see parallel), the cast
+        stage is then part of extract
+    job_dir : str
+        Save every casted category table to this directory (see checkpoint), a job which failed is
+        resumed from the tables it saved and only downloads the missing pages
+
+    Returns
+    -------
+    dict with the job status, rows written per entity and seconds spent per stage
+    """
+
+    season = league_season(league, season)
+    result = {'league': league, 'season': season, 'status': 'ok', 'rows': {}, 'seconds': dict.fromkeys(STAGES, 0.0)}
+    stage = None
+    started = time.perf_counter()
+
+    def done(name):
+        nonlocal started
+        elapsed = time.perf_counter() - started
+        result['seconds'][name] += elapsed
+        if progress is not None:
+            progress(league, season, name, elapsed)
+        started = time.perf_counter()
+
+    squad_entities = [entity for entity in entities if entity in ('squad_for', 'squad_opponent')]
+    # squad "for" tables are rolled up from the players, only a few squad pages are needed
+    roll_up = 'player' in entities and squad_entities == ['squad_for']
+    squad_categories = rollup.page_categories() if roll_up else list(squad.COLUMNS)
+    player_categories = list(player.COLUMNS) if 'player' in entities else []
+    squad_categories = squad_categories if squad_entities else []
+    try:
+        stage = 'fetch'
+        saved, saved_for, saved_opponent = {}, {}, {}
+        options = {'backend': 'lxml', 'compact': compact}
+        if job_dir:
+            saved = checkpoint.load_tables(job_dir, 'player', league, season, player_categories, options)
+            saved_for = checkpoint.load_tables(job_dir, 'squad_for', league, season, squad_categories)
+            saved_opponent = checkpoint.load_tables(job_dir, 'squad_opponent', league, season, squad_categories)
+        player_missing = [category for category in player_categories if category not in saved]
+        squad_missing = [category for category in squad_categories
+                         if category not in saved_for or category not in saved_opponent]
+        urls = [player.get_url(league, category, season) for category in player_missing]
+        urls += [squad.get_url(league, category, season) for category in squad_missing]
+        # non Big 5 player and squad tables live on the same page
+        unique = list(dict.fromkeys(urls))
+        pages = dict(zip(unique, fetch.get_pages(unique, return_exceptions=job_dir is not None)))
+        fetched = {url: html for url, html in pages.items() if not isinstance(html, Exception)}
+        done(stage)
+
+        stage = 'extract'
+        player_tables, squad_tables = {}, {}
+        player_missing = [category for category in player_missing
+                          if player.get_url(league, category, season) in fetched]
+        if processes:
+            calls = [(fetched[player.get_url(league, category, season)], league, category, 'lxml', compact)
+                     for category in player_missing]
+            player_tables = dict(zip(player_missing, parallel.map_frames(player.parse_cast, calls, processes)))
+        else:
+            for category in player_missing:
+                html = fetched[player.get_url(league, category, season)]
+                player_tables[category] = player.parse_stats(html, league, category)
+        for category in squad_missing:
+            url = squad.get_url(league, category, season)
+            if url in fetched:
+                squad_tables[category] = squad.parse_tables(fetched[url], league, category)
+        done(stage)
+
+        stage = 'cast'
+        for category, df in player_tables.items() if not processes else []:
+            player_tables[category] = player.cast_types(df, compact=compact)
+        done(stage)
+
+        if job_dir:
+            for category, df in player_tables.items():
+                checkpoint.save(df, job_dir, 'player', league, season, category, options)
+            for category, (squad_for, opponent) in squad_tables.items():
+                checkpoint.save(squad_for, job_dir, 'squad_for', league, season, category)
+                checkpoint.save(opponent, job_dir, 'squad_opponent', league, season, category)
+            stage = 'fetch'
+            checkpoint.raise_failed(pages.values())
+            player_tables.update(saved)
+            squad_tables.update({category: (saved_for[category], saved_opponent[category])
+                                 for category in squad_categories if category not in squad_tables})
+
+        stage = 'join'
+        frames = {}
+        if player_tables:
+            tables = [player_tables[category] for category in player.JOIN_ORDER]
+            frames['player'] = join.join_tables(tables, join.player_keys(tables[0]), drop=['Matches'])
+        if roll_up:
+            pages = {name: tables[0] for name, tables in squad_tables.items()}
+            frames['squad_for'] = squad.squad_for_df(rollup.rollup(frames['player'], pages))
+        elif 'squad_for' in squad_entities:
+            frames['squad_for'] = squad.squad_for_df({name: tables[0] for name, tables in squad_tables.items()})
+        if 'squad_opponent' in squad_entities:
+            frames['squad_opponent'] = squad.squad_opponent_df({name: tables[1] for name, tables in squad_tables.items()})
+        done(stage)
+
+        stage = 'derive'
+        if 'player' in frames:
+            frames['player'] = player.add_derived(frames['player'], season)
+            if compact:
+                frames['player']['Season'] = frames['player']['Season'].astype('category')
+            if per_90:
+                frames['player_per90'] = player.get_per_90(frames['player'])
+        done(stage)
+
+        stage = 'write'
+        for entity, df in frames.items():
+            store.write(df, entity, league, season, root=root, format=format)
+            result['rows'][entity] = len(df)
+        done(stage)
+    except Exception as error:
+        result['status'] = f'failed in {stage}: {type(error).__name__}: {error}'
+
+    return result
+
+def run(leagues: list, seasons: list, entities: tuple = ('player',), jobs: int = 4, per_90: bool = False,
+        compact: bool = False, root: str = None, format: str = None, progress=None, processes: int = None,
+        job_dir: str = None) -> list:
+    """ Run the pipeline for every league and season, several jobs at the same time
+
+    Network requests of all the jobs share the fetch.MAX_WORKERS limit, so more jobs only add
+    extraction and casting work in flight, not more load on fbref.
+
+    Parameters
+    ----------
+    leagues : list
+        League names, keys of LEAGUES
+    seasons : list
+        Seasons to be scrapped (ex: ['2021-2022', '2022-2023'])
+    jobs    : int
+        Number of league/season jobs running at the same time
+    processes   : int
+        Size of the process pool shared by every job to extract and cast the tables
+    job_dir : str
+        Job directory of a long backfill: the status of every league and season is recorded in its
+        manifest and the category tables are checkpointed. Running again with the same directory
+        skips the jobs already done and resumes the failed ones from their saved tables
+
+    The other parameters are passed to run_job.
+
+    Returns
+    -------
+    list of job results, see run_job. Jobs already done in job_dir are left out
+    """
+
+    pairs = [(league, league_season(league, season)) for league in leagues for season in seasons]
+    if job_dir:
+        checkpoint.start(job_dir, {'entities': sorted(entities), 'compact': compact})
+        pairs = checkpoint.pending(job_dir, pairs)
+
+    def job(league, season):
+        result = run_job(league, season, tuple(entities), per_90, compact, root, format, progress, processes, job_dir)
+        if job_dir:
+            checkpoint.mark(job_dir, league, season, result['status'], rows=result['rows'])
+        return result
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = [executor.submit(job, league, season) for league, season in pairs]
+        for future in as_completed(futures):
+            results.append(future.result())
+    return sorted(results, key=lambda result: (result['league'], result['season']))
+
+def print_progress(league: str, season: str, stage: str, seconds: float):
+    print(f'[{league} {season}] {stage} {seconds:.2f}s', file=sys.stderr, flush=True)
+
+def print_summary(results: list, seconds: float):
+    failed = [result for result in results if result['status'] != 'ok']
+    print(f'{len(results) - len(failed)}/{len(results)} jobs done in {seconds:.1f}s')
+    for stage in STAGES:
+        print(f'  {stage:<8} {sum(result["seconds"][stage] for result in results):8.1f}s')
+    for result in results:
+        rows = ', '.join(f'{entity}={count}' for entity, count in result['rows'].items())
+        print(f'  {result["league"]} {result["season"]}: {result["status"]} {rows}')
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description='Scrape, cast and store fbref seasons for many leagues at once')
+    parser.add_argument('--leagues', nargs='+', default=['Big 5'], help='league names, see LEAGUES')
+    parser.add_argument('--all-leagues', action='store_true', help='every league in LEAGUES')
+    parser.add_argument('--seasons', nargs='+', help='seasons (ex: 2022-2023)')
+    parser.add_argument('--from', dest='first', help='first season of a range (ex: 2014-2015)')
+    parser.add_argument('--to', dest='last', help='last season of a range (ex: 2023-2024)')
+    parser.add_argument('--entities', nargs='+', default=['player'], choices=store.ENTITIES)
+    parser.add_argument('--per-90', action='store_true', help='also store player per 90 stats')
+    parser.add_argument('--compact', action='store_true', help='store compact dtypes')
+    parser.add_argument('--jobs', type=int, default=4, help='league/season jobs running at the same time')
+    parser.add_argument('--workers', type=int, default=fetch.MAX_WORKERS, help='concurrent network requests')
+    parser.add_argument('--processes', type=int, help='extract and cast tables in this many processes')
+    parser.add_argument('--job-dir', help='checkpoint tables and job status here, run again to resume')
+    parser.add_argument('--store', help='store directory, default to store.STORE_DIR')
+    parser.add_argument('--format', choices=list(store.EXTENSIONS), help='store format')
+    parser.add_argument('--refresh', action='store_true',
+                        help='only re-extract changed tables of stored seasons and write their deltas')
+    parser.add_argument('--prometheus', help='write stage counters to this Prometheus text file')
+    parser.add_argument('--log-events', action='store_true', help='log every fetch, parse, cast and join as json')
+    parser.add_argument('--profile', help='dump cProfile stats of every stage to this directory')
+    args = parser.parse_args(argv)
+
+    seasons = list(args.seasons or [])
+    if args.first:
+        seasons += store.season_range(args.first, args.last or args.first)
+    if not seasons:
+        parser.error('give --seasons or --from/--to')
+    leagues = list(player.LEAGUES) if args.all_leagues else args.leagues
+    unknown = [league for league in leagues if league not in player.LEAGUES]
+    if unknown:
+        parser.error(f'unknown leagues: {", ".join(unknown)}')
+
+    fetch.MAX_WORKERS = args.workers
+    sink = instrument.add_sink(instrument.PrometheusSink(args.prometheus)) if args.prometheus else None
+    if args.log_events:
+        logging.basicConfig(level=logging.INFO, format='%(message)s')
+        instrument.add_sink(instrument.LogSink())
+    if args.profile:
+        instrument.enable_profiling(folder=args.profile, memory=True)
+    try:
+        return _main(args, leagues, seasons)
+    finally:
+        if sink is not None:
+            sink.write()
+        if args.profile:
+            instrument.disable_profiling()
+
+def _main(args: argparse.Namespace, leagues: list, seasons: list) -> int:
+    if args.refresh:
+        for league in leagues:
+            for season in seasons:
+                season = league_season(league, season)
+                deltas = refresh.refresh(league, season, tuple(args.entities), args.store, args.compact,
+                                         per_90=args.per_90)
+                changes = ', '.join(f'{entity}={len(delta)}' for entity, delta in deltas.items())
+                print(f'{league} {season}: {changes or "no change"}')
+        return 0
+
+    started = time.perf_counter()
+    results = run(leagues, seasons, args.entities, args.jobs, args.per_90, args.compact, args.store, args.format,
+                  progress=print_progress, processes=args.processes, job_dir=args.job_dir)
+    print_summary(results, time.perf_counter() - started)
+    return 0 if all(result['status'] == 'ok' for result in results) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,25 +1,12 @@
-import requests
 import re
-from bs4 import BeautifulSoup
+from io import StringIO
 import pandas as pd
 import numpy as np
-import math
-
-LEAGUES = {'Eredivisie': ['23', 'Eredivisie'],
-           'Primeira Liga': ['32', 'Primerira-Liga'],
-           'MLS': ['22', 'Major-League-Soccer'], 
-           'Championship': ['10', 'Championship'],
-           'Brasil': ['24', 'Serie-A'],
-           'Liga MX': ['31', 'Liga-MX'],
-           'Primera Division': ['21', 'Primera-Division'],
-           'Belgian Pro Leage': ['37', 'Belgian-Pro-League'],
-           'Segunda': ['17', 'Segunda-Division'],
-           'Serie B': ['18', 'Serie-B'],
-           'Bundesliga 2': ['33', '2-Bundesliga'],
-           'Ligue 2': ['60', 'Ligue-2'],
-           'Big 5': ['Big5', 'Big-5-European-League']}
-
-def scraping(url: str, id: str, comp: str, columns: list) -> pd.DataFrame:
+
+from . import checkpoint, extract, fetch, instrument, join, memo, parallel, schema
+from .leagues import LEAGUES
+
+def scraping(url: str, id: str, comp: str, columns: list, backend: str = 'lxml') -> pd.DataFrame:
     """ Scrape dataframe from given url for non big 5 Leagues
 
     Parameters
@@ -32,18 +19,88 @@ def scraping(url: str, id: str, comp: str, columns: list) -> pd.DataFrame:
         The name of the competition, this is used to create competition column in the DataFrame
     columns : list
         The list of columns for the DataFrame
+    backend : str
+        'lxml' to extract only the requested table, 'legacy' to parse the whole page with BeautifulSoup
 
     Returns
     -------
     a DataFrame from given url
     """
     
-    page = requests.get(url)
+    html = fetch.get_page(url)
+    with instrument.stage('parse', url=url, table=id, backend=backend) as event:
+        df = parse_table(html, id, comp, columns, backend)
+        event['rows'] = len(df)
+    return df
+
+def table_frame(html: str, id: str, columns: list) -> pd.DataFrame:
+    """ Extract a table with the lxml extractor and select its columns by data-stat name
+
+    Parameters
+    ----------
+    html    : str
+        The page html downloaded from fbref
+    id  : str
+        The id html tag from the table we want to scrape (ex: stats_standard, stats_shooting)
+    columns : list
+        The list of columns for the DataFrame, their cells are found with DATA_STATS
+
+    Returns
+    -------
+    a DataFrame with missing values filled with '0' and, when the table links to players,
+    a 'Player ID' column after 'Player'
+
+    Raises
+    ------
+    ValueError when the table has no cells for one of the columns (ex: fbref renamed a stat)
+    """
+
+    data = extract.extract_table(html, id)
+    missing = [col for col in columns if DATA_STATS.get(col) not in data]
+    if missing:
+        raise ValueError(f'table {id} has no {", ".join(missing)} column, its stats are {", ".join(data)}')
+    df = pd.DataFrame({col: data[DATA_STATS[col]] for col in columns})
+    df.replace('', '0', inplace=True)
+    if 'player_id' in data and 'Player' in df.columns:
+        df.insert(df.columns.get_loc('Player') + 1, 'Player ID', data['player_id'])
+    return df
+
+def parse_table(html: str, id: str, comp: str, columns: list, backend: str = 'lxml') -> pd.DataFrame:
+    """ Parse dataframe from downloaded fbref html for non big 5 Leagues
+
+    Parameters
+    ----------
+    html    : str
+        The page html downloaded from fbref
+    id  : str
+        The id html tag from the table we want to scrape (ex: standard_stats, shooting)
+    comp    : str
+        The name of the competition, this is used to create competition column in the DataFrame
+    columns : list
+        The list of columns for the DataFrame
+    backend : str
+        'lxml' to extract only the requested table, 'legacy' to parse the whole page with BeautifulSoup
+
+    Returns
+    -------
+    a DataFrame from given html
+    """
+
+    if backend == 'lxml':
+        df = table_frame(html, id, columns)
+        df['Rk'] = np.arange(1, len(df) + 1)
+        df['Comp'] = comp
+        return df
 
     # workaround to get the table under comment tag
     comm = re.compile("<!--|-->")
 
-    soup = BeautifulSoup(comm.sub("",page.text),'lxml')
+    with instrument.stage('strip_comments', table=id):
+        html = comm.sub("", html)
+    from bs4 import BeautifulSoup
+
+    with instrument.stage('soup', table=id):
+        soup = BeautifulSoup(html,'lxml')
     table = soup.find("table", {"id": id})
 
     data = {}
@@ -84,169 +141,374 @@ def clean_df(df: pd.DataFrame) -> pd.DataFrame:
     df.fillna('0', inplace=True)
     return df
 
-def get_stats(league: str, category: str, season: str) -> pd.DataFrame:
-    """ Get individul stats from given fbref url. 
+TABLE_IDS = {'standard': "stats_standard", 'shooting': "stats_shooting", 'passing': "stats_passing",
+             'passing_types': "stats_passing_types", 'gca': "stats_gca", 'defense': "stats_defense",
+             'possession': "stats_possession", 'playingtime': "stats_playing_time", 'misc': "stats_misc"}
+
+# Order in which the category tables are joined, shared columns are taken from the first table
+JOIN_ORDER = ['standard', 'shooting', 'passing', 'passing_types', 'gca', 'defense', 'possession', 'misc', 'playingtime']
+
+COLUMNS = {
+    'standard': ['Player', 'Nation','Position','Squad','Age','Born','Matches Played','Starts','Minutes','90s',
+                 'Goals','Assists','G+A','Non Penalty Goals','Penalty Goals','Penalty Attempted', 'Yellow Cards',
+                 'Red Cards','xG','npxG','xAG','npxG+xAG','Progressive Carries','Progressive Passes',
+                 'Progressive Passes Received','Goals/90','Assists/90', 'G+A/90','Non Penalty Goals/90',
+                 'Non Penalty G+A/90','xG/90','xAG/90','xG+xAG/90','npxG/90','npxG+xAG/90','Matches'],
+    'shooting': ['Player', 'Nation', 'Position', 'Squad', 'Age', 'Born', '90s', 'Goals', 'Shots',
+                 'Shots on Target', 'Shots on Target %', 'Shots/90', 'Shots on Target/90', 'Goals/Shot',
+                 'Goals/Shot on Target', 'Average Shot Distance', 'Free Kicks', 'Penalty Goals', 'Penalty Attempted',
+                 'xG', 'npxG', 'npxG/Shot', 'Goals - xG', 'Non Penalty Goals - npxG', 'Matches'],
+    'passing': ['Player', 'Nation', 'Position', 'Squad', 'Age', 'Born', '90s','Completed Passes Total',
+                'Attempted Passes Total', 'Completed Passes Total%', 'Total Passing Distance',
+                'Progressive Passing Distance', 'Completed Short Passes', 'Attempted Short Passes',
+                'Completed Short Passes%', 'Completed Medium Passes', 'Attempted Medium Passes',
+                'Completed Medium Passes%', 'Completed Long Passes', 'Attempted Long Passes', 'Completed Long Passes%',
+                'Assists', 'xAG', 'xA', 'A-xAG', 'Key Passes', 'Passes Into Final 3rd', 'Passes Into Pen Area',
+                'Crossing Into Pen Area', 'Progressive Passes', 'Matches'],
+    'passing_types': ['Player', 'Nation', 'Position', 'Squad', 'Age', 'Born', '90s', 'Attempted Passes Total',
+                      'Live Ball Passes', 'Dead Ball Passes', 'Free Kicks Passes', 'Through Balls', 'Switches',
+                      'Crosses', 'Throw Ins', 'Corner Kicks', 'Inswinging Corner', 'Outswinging Corner',
+                      'Straight Corner', 'Completed Passes Total', 'Passes Offside', 'Passes Blocked', 'Matches'],
+    'gca': ['Player', 'Nation', 'Position', 'Squad', 'Age', 'Born', '90s', 'SCA', 'SCA90', 'SCAPassLive',
+            'SCAPassDead', 'SCATakeOns', 'SCAShot', 'SCAFouled', 'SCADefAct', 'GCA', 'GCA90', 'GCAPassLive',
+            'GCAPassDead', 'GCATakeOns', 'GCAShot', 'GCAFouled', 'GCADefAct', 'Matches'],
+    'defense': ['Player', 'Nation', 'Position', 'Squad', 'Age', 'Born', '90s','Tackles', 'Tackles Won',
+                'Def 3rd Tackles', 'Mid 3rd Tackles', 'Att 3rd Tackles', 'Dribblers Tackled', 'Dribbles Challenged',
+                'Dribbles Challenged%', 'Challenges Lost', 'Blocks', 'Shots Blocked', 'Pass Blocked', 'Interceptions',
+                'Interceptions+Tackles', 'Clearances', 'Errors', 'Matches'],
+    'possession': ['Player', 'Nation', 'Position', 'Squad', 'Age', 'Born', '90s', 'Touches', 'Def Pen Touches',
+                   'Def 3rd Touches', 'Mid 3rd Touches', 'Att 3rd Touches', 'Att Pen Touches', 'Live Touches',
+                   'TakeOns Attempted', 'Successful TakeOns', 'Successful TakeOns%', 'TakeOns Tackled',
+                   'TakeOns Tackled %', 'Carries', 'Total Carries Distance', 'Progressive Carries Distance',
+                   'Progressive Carries', 'Carries to Final Third', 'Carries to Pen Area', 'Miscontrols', 'Dispossessed',
+                   'Passes Received', 'Progressive Passes Received', 'Matches'],
+    'playingtime': ['Player', 'Nation', 'Position', 'Squad', 'Age', 'Born', 'Matches Played', 'Minutes',
+                    'Minutes per Match', 'Minutes%', '90s', 'Starts', 'Minutes per Start', 'Complete Match',
+                    'Subs', 'Minutes per Subs', 'Unused Subs', 'PPM', 'onG', 'onGA', 'G+/-', 'G+/-90', 'On-Off',
+                    'onxG', 'onxGA', 'xG+/-', 'xG+/-90', 'xGOn-Off', 'Matches'],
+    'misc': ['Player', 'Nation', 'Position', 'Squad', 'Age', 'Born', '90s', 'Yellow Cards', 'Red Cards',
+             '2nd Yellow', 'Fouls', 'Fouled', 'Offsides', 'Crosses', 'Interceptions', 'Tackles Won', 'Pen Won',
+             'Pen Conceded', 'Own Goals', 'Recoveries', 'Aerial Won', 'Aerial Lost', 'Aerial Won%', 'Matches']
+}
+
+# data-stat attribute of the header and body cells of every column, fbref gives a column the same name in
+# every table it appears in. Columns are selected by these names, not by their position in the table
+DATA_STATS = {
+    'Rk': 'ranker', 'Player': 'player', 'Nation': 'nationality', 'Position': 'position', 'Squad': 'team',
+    'Comp': 'comp_level', 'Age': 'age', 'Born': 'birth_year', '90s': 'minutes_90s', 'Matches': 'matches',
+    # standard
+    'Matches Played': 'games', 'Starts': 'games_starts', 'Minutes': 'minutes', 'Goals': 'goals',
+    'Assists': 'assists', 'G+A': 'goals_assists', 'Non Penalty Goals': 'goals_pens', 'Penalty Goals': 'pens_made',
+    'Penalty Attempted': 'pens_att', 'Yellow Cards': 'cards_yellow', 'Red Cards': 'cards_red', 'xG': 'xg',
+    'npxG': 'npxg', 'xAG': 'xg_assist', 'npxG+xAG': 'npxg_xg_assist', 'Progressive Carries': 'progressive_carries',
+    'Progressive Passes': 'progressive_passes', 'Progressive Passes Received': 'progressive_passes_received',
+    'Goals/90': 'goals_per90', 'Assists/90': 'assists_per90', 'G+A/90': 'goals_assists_per90',
+    'Non Penalty Goals/90': 'goals_pens_per90', 'Non Penalty G+A/90': 'goals_assists_pens_per90',
+    'xG/90': 'xg_per90', 'xAG/90': 'xg_assist_per90', 'xG+xAG/90': 'xg_xg_assist_per90', 'npxG/90': 'npxg_per90',
+    'npxG+xAG/90': 'npxg_xg_assist_per90',
+    # shooting
+    'Shots': 'shots', 'Shots on Target': 'shots_on_target', 'Shots on Target %': 'shots_on_target_pct',
+    'Shots/90': 'shots_per90', 'Shots on Target/90': 'shots_on_target_per90', 'Goals/Shot': 'goals_per_shot',
+    'Goals/Shot on Target': 'goals_per_shot_on_target', 'Average Shot Distance': 'average_shot_distance',
+    'Free Kicks': 'shots_free_kicks', 'npxG/Shot': 'npxg_per_shot', 'Goals - xG': 'xg_net',
+    'Non Penalty Goals - npxG': 'npxg_net',
+    # passing
+    'Completed Passes Total': 'passes_completed', 'Attempted Passes Total': 'passes',
+    'Completed Passes Total%': 'passes_pct', 'Total Passing Distance': 'passes_total_distance',
+    'Progressive Passing Distance': 'passes_progressive_distance', 'Completed Short Passes': 'passes_completed_short',
+    'Attempted Short Passes': 'passes_short', 'Completed Short Passes%': 'passes_pct_short',
+    'Completed Medium Passes': 'passes_completed_medium', 'Attempted Medium Passes': 'passes_medium',
+    'Completed Medium Passes%': 'passes_pct_medium', 'Completed Long Passes': 'passes_completed_long',
+    'Attempted Long Passes': 'passes_long', 'Completed Long Passes%': 'passes_pct_long', 'xA': 'pass_xa',
+    'A-xAG': 'xg_assist_net', 'Key Passes': 'assisted_shots', 'Passes Into Final 3rd': 'passes_into_final_third',
+    'Passes Into Pen Area': 'passes_into_penalty_area', 'Crossing Into Pen Area': 'crosses_into_penalty_area',
+    # passing_types
+    'Live Ball Passes': 'passes_live', 'Dead Ball Passes': 'passes_dead', 'Free Kicks Passes': 'passes_free_kicks',
+    'Through Balls': 'through_balls', 'Switches': 'passes_switches', 'Crosses': 'crosses', 'Throw Ins': 'throw_ins',
+    'Corner Kicks': 'corner_kicks', 'Inswinging Corner': 'corner_kicks_in', 'Outswinging Corner': 'corner_kicks_out',
+    'Straight Corner': 'corner_kicks_straight', 'Passes Offside': 'passes_offsides', 'Passes Blocked': 'passes_blocked',
+    # gca
+    'SCA': 'sca', 'SCA90': 'sca_per90', 'SCAPassLive': 'sca_passes_live', 'SCAPassDead': 'sca_passes_dead',
+    'SCATakeOns': 'sca_take_ons', 'SCAShot': 'sca_shots', 'SCAFouled': 'sca_fouled', 'SCADefAct': 'sca_defense',
+    'GCA': 'gca', 'GCA90': 'gca_per90', 'GCAPassLive': 'gca_passes_live', 'GCAPassDead': 'gca_passes_dead',
+    'GCATakeOns': 'gca_take_ons', 'GCAShot': 'gca_shots', 'GCAFouled': 'gca_fouled', 'GCADefAct': 'gca_defense',
+    # defense
+    'Tackles': 'tackles', 'Tackles Won': 'tackles_won', 'Def 3rd Tackles': 'tackles_def_3rd',
+    'Mid 3rd Tackles': 'tackles_mid_3rd', 'Att 3rd Tackles': 'tackles_att_3rd', 'Dribblers Tackled': 'challenge_tackles',
+    'Dribbles Challenged': 'challenges', 'Dribbles Challenged%': 'challenge_tackles_pct',
+    'Challenges Lost': 'challenges_lost', 'Blocks': 'blocks', 'Shots Blocked': 'blocked_shots',
+    'Pass Blocked': 'blocked_passes', 'Interceptions': 'interceptions', 'Interceptions+Tackles': 'tackles_interceptions',
+    'Clearances': 'clearances', 'Errors': 'errors',
+    # possession
+    'Touches': 'touches', 'Def Pen Touches': 'touches_def_pen_area', 'Def 3rd Touches': 'touches_def_3rd',
+    'Mid 3rd Touches': 'touches_mid_3rd', 'Att 3rd Touches': 'touches_att_3rd', 'Att Pen Touches': 'touches_att_pen_area',
+    'Live Touches': 'touches_live_ball', 'TakeOns Attempted': 'take_ons', 'Successful TakeOns': 'take_ons_won',
+    'Successful TakeOns%': 'take_ons_won_pct', 'TakeOns Tackled': 'take_ons_tackled',
+    'TakeOns Tackled %': 'take_ons_tackled_pct', 'Carries': 'carries', 'Total Carries Distance': 'carries_distance',
+    'Progressive Carries Distance': 'carries_progressive_distance', 'Carries to Final Third': 'carries_into_final_third',
+    'Carries to Pen Area': 'carries_into_penalty_area', 'Miscontrols': 'miscontrols', 'Dispossessed': 'dispossessed',
+    'Passes Received': 'passes_received',
+    # playingtime
+    'Minutes per Match': 'minutes_per_game', 'Minutes%': 'minutes_pct', 'Minutes per Start': 'minutes_per_start',
+    'Complete Match': 'games_complete', 'Subs': 'games_subs', 'Minutes per Subs': 'minutes_per_sub',
+    'Unused Subs': 'unused_subs', 'PPM': 'points_per_game', 'onG': 'on_goals_for', 'onGA': 'on_goals_against',
+    'G+/-': 'plus_minus', 'G+/-90': 'plus_minus_per90', 'On-Off': 'plus_minus_wowy', 'onxG': 'on_xg_for',
+    'onxGA': 'on_xg_against', 'xG+/-': 'xg_plus_minus', 'xG+/-90': 'xg_plus_minus_per90', 'xGOn-Off': 'xg_plus_minus_wowy',
+    # misc
+    '2nd Yellow': 'cards_yellow_red', 'Fouls': 'fouls', 'Fouled': 'fouled', 'Offsides': 'offsides',
+    'Pen Won': 'pens_won', 'Pen Conceded': 'pens_conceded', 'Own Goals': 'own_goals', 'Recoveries': 'ball_recoveries',
+    'Aerial Won': 'aerials_won', 'Aerial Lost': 'aerials_lost', 'Aerial Won%': 'aerials_won_pct',
+}
+
+def get_url(league: str, category: str, season: str) -> str:
+    """ Build the fbref url of individual stats for given league, category and season
 
     Parameters
     ----------
-    url  : str
-        URL to be scrapped
+    league  : str
+        League name, one of the keys of LEAGUES
     category    : str
-        Stats category to be scrapped. Possible values are standard, shooting, passing, passing_type,
-        gca, defense, possession, playing_time and misc
-    comp    : str
-        The name of the competition, leave to default value if scrapping big 5 leagues 
-    
+        Stats category, one of the keys of COLUMNS
+    season  : str
+        Season to be scrapped (ex: 2022-2023)
+
+    Returns
+    -------
+    fbref url of the stats page
+    """
+
+    path = 'stats' if category == 'standard' else category
+    if league != 'Big 5':
+        return f'{fetch.BASE_URL}/en/comps/{LEAGUES[league][0]}/{season}/{path}/{season}-{LEAGUES[league][1]}-Stats'
+    return f'{fetch.BASE_URL}/en/comps/{LEAGUES[league][0]}/{season}/{path}/players/{season}-{LEAGUES[league][1]}-Stats'
+
+def parse_stats(html: str, league: str, category: str, backend: str = 'lxml') -> pd.DataFrame:
+    """ Parse individual stats from downloaded fbref html
+
+    Parameters
+    ----------
+    html    : str
+        The page html downloaded from get_url(league, category, season)
+    league  : str
+        League name, one of the keys of LEAGUES
+    category    : str
+        Stats category, one of the keys of COLUMNS
+    backend : str
+        'lxml' to extract only the requested table, 'legacy' for the previous BeautifulSoup / read_html parsing
+
     Returns
     -------
     Scrapped individual stats DataFrame for given category
     """
 
-    cat_dict = {'standard': "stats_standard", 'shooting': "stats_shooting", 'passing': "stats_passing",
-                'passing_types': "stats_passing_types", 'gca': "stats_gca", 'defense': "stats_defense",
-                'possession': "stats_possession", 'playingtime': "stats_playing_time", 'misc': "stats_misc"}
-    
-    if category == 'standard':
-        columns = ['Player', 'Nation','Position','Squad','Age','Born','Matches Played','Starts','Minutes','90s',
-                   'Goals','Assists','G+A','Non Penalty Goals','Penalty Goals','Penalty Attempted', 'Yellow Cards',
-                   'Red Cards','xG','npxG','xAG','npxG+xAG','Progressive Carries','Progressive Passes', 
-                   'Progressive Passes Received','Goals/90','Assists/90', 'G+A/90','Non Penalty Goals/90',
-                   'Non Penalty G+A/90','xG/90','xAG/90','xG+xAG/90','npxG/90','npxG+xAG/90','Matches']
-        
-    elif category == 'shooting':
-        columns = ['Player', 'Nation', 'Position', 'Squad', 'Age', 'Born', '90s', 'Goals', 'Shots', 
-                   'Shots on Target', 'Shots on Target %', 'Shots/90', 'Shots on Target/90', 'Goals/Shot', 
-                   'Goals/Shot on Target', 'Average Shot Distance', 'Free Kicks', 'Penalty Goals', 'Penalty Attempted', 
-                   'xG', 'npxG', 'npxG/Shot', 'Goals - xG', 'Non Penalty Goals - npxG', 'Matches']
-        
-    elif category == 'passing':
-        columns = ['Player', 'Nation', 'Position', 'Squad', 'Age', 'Born', '90s','Completed Passes Total', 
-                   'Attempted Passes Total', 'Completed Passes Total%', 'Total Passing Distance', 
-                   'Progressive Passing Distance', 'Completed Short Passes', 'Attempted Short Passes', 
-                   'Completed Short Passes%', 'Completed Medium Passes', 'Attempted Medium Passes', 
-                   'Completed Medium Passes%', 'Completed Long Passes', 'Attempted Long Passes', 'Completed Long Passes%', 
-                   'Assists', 'xAG', 'xA', 'A-xAG', 'Key Passes', 'Passes Into Final 3rd', 'Passes Into Pen Area', 
-                   'Crossing Into Pen Area', 'Progressive Passes', 'Matches']
-        
-    elif category == 'passing_types':
-        columns = ['Player', 'Nation', 'Position', 'Squad', 'Age', 'Born', '90s', 'Attempted Passes Total', 
-                   'Live Ball Passes', 'Dead Ball Passes', 'Free Kicks Passes', 'Through Balls', 'Switches', 
-                   'Crosses', 'Throw Ins', 'Corner Kicks', 'Inswinging Corner', 'Outswinging Corner', 
-                   'Straight Corner', 'Completed Passes Total', 'Passes Offside', 'Passes Blocked', 'Matches']
-        
-    elif category == 'gca':
-        columns = ['Player', 'Nation', 'Position', 'Squad', 'Age', 'Born', '90s', 'SCA', 'SCA90', 'SCAPassLive', 
-                   'SCAPassDead', 'SCATakeOns', 'SCAShot', 'SCAFouled', 'SCADefAct', 'GCA', 'GCA90', 'GCAPassLive', 
-                   'GCAPassDead', 'GCATakeOns', 'GCAShot', 'GCAFouled', 'GCADefAct', 'Matches']
-        
-    elif category == 'defense':
-        columns = ['Player', 'Nation', 'Position', 'Squad', 'Age', 'Born', '90s','Tackles', 'Tackles Won', 
-                   'Def 3rd Tackles', 'Mid 3rd Tackles', 'Att 3rd Tackles', 'Dribblers Tackled', 'Dribbles Challenged', 
-                   'Dribbles Challenged%', 'Challenges Lost', 'Blocks', 'Shots Blocked', 'Pass Blocked', 'Interceptions', 
-                   'Interceptions+Tackles', 'Clearances', 'Errors', 'Matches']
-        
-    elif category == 'possession':
-        columns = ['Player', 'Nation', 'Position', 'Squad', 'Age', 'Born', '90s', 'Touches', 'Def Pen Touches', 
-                   'Def 3rd Touches', 'Mid 3rd Touches', 'Att 3rd Touches', 'Att Pen Touches', 'Live Touches', 
-                   'TakeOns Attempted', 'Successful TakeOns', 'Successful TakeOns%', 'TakeOns Tackled', 
-                   'TakeOns Tackled %', 'Carries', 'Total Carries Distance', 'Progressive Carries Distance', 
-                   'Progressive Carries', 'Carries to Final Third', 'Carries to Pen Area', 'Miscontrols', 'Dispossessed', 
-                   'Passes Received', 'Progressive Passes Received', 'Matches']
-        
-    elif category == 'playingtime':
-        columns = ['Player', 'Nation', 'Position', 'Squad', 'Age', 'Born', 'Matches Played', 'Minutes', 
-                   'Minutes per Match', 'Minutes%', '90s', 'Starts', 'Minutes per Start', 'Complete Match', 
-                   'Subs', 'Minutes per Subs', 'Unused Subs', 'PPM', 'onG', 'onGA', 'G+/-', 'G+/-90', 'On-Off', 
-                   'onxG', 'onxGA', 'xG+/-', 'xG+/-90', 'xGOn-Off', 'Matches']
-        
-    elif category == 'misc':
-        columns = ['Player', 'Nation', 'Position', 'Squad', 'Age', 'Born', '90s', 'Yellow Cards', 'Red Cards', 
-                   '2nd Yellow', 'Fouls', 'Fouled', 'Offsides', 'Crosses', 'Interceptions', 'Tackles Won', 'Pen Won', 
-                   'Pen Conceded', 'Own Goals', 'Recoveries', 'Aerial Won', 'Aerial Lost', 'Aerial Won%', 'Matches']
-    else:
-        return None
+    with instrument.stage('parse', league=league, category=category, backend=backend) as event:
+        df = _parse_stats(html, league, category, backend)
+        event['rows'] = len(df)
+    return df
 
+def _parse_stats(html: str, league: str, category: str, backend: str) -> pd.DataFrame:
+    columns = list(COLUMNS[category])
     if league != 'Big 5':
-        if category == 'standard':
-            url = f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/stats/{season}-{LEAGUES[league][1]}-Stats'
-        else:    
-            url = f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/{category}/{season}-{LEAGUES[league][1]}-Stats'
-        df = scraping(url, cat_dict[category], league, columns)
+        df = parse_table(html, TABLE_IDS[category], league, columns, backend)
         columns.insert(0, 'Rk')
         columns.insert(5, 'Comp')
+        if 'Player ID' in df.columns:
+            columns.insert(2, 'Player ID')
         return df[columns]
     else:
-        if category == 'standard':
-            url = f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/stats/players/{season}-{LEAGUES[league][1]}-Stats'
-        else:
-            url = f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/{category}/players/{season}-{LEAGUES[league][1]}-Stats'
-        df = clean_df(pd.read_html(url)[0])
         columns.insert(0, 'Rk')
         columns.insert(5, 'Comp')
+        if backend == 'lxml':
+            df = table_frame(html, TABLE_IDS[category], columns)
+            df['Comp'] = df['Comp'].str.partition(' ')[2]
+            df['Rk'] = df['Rk'].astype('int64')
+            return df
+        with instrument.stage('read_html', category=category):
+            df = pd.read_html(StringIO(html))[0]
+        with instrument.stage('clean_df', category=category):
+            df = clean_df(df)
         df.columns = columns
         return df
 
+@memo.memoize()
+def get_stats(league: str, category: str, season: str, backend: str = 'lxml', cast: bool = False,
+              compact: bool = False) -> pd.DataFrame:
+    """ Get individul stats from given fbref url. 
+
+    Parameters
+    ----------
+    league  : str
+        League name, one of the keys of LEAGUES
+    category    : str
+        Stats category to be scrapped. Possible values are standard, shooting, passing, passing_types,
+        gca, defense, possession, playingtime and misc
+    season  : str
+        Season to be scrapped (ex: 2022-2023)
+    backend : str
+        'lxml' to extract only the requested table, 'legacy' for the previous BeautifulSoup / read_html parsing
+    cast    : bool
+        Cast the columns with cast_types, the casted table is memoized so a repeated call skips the cast
+    compact : bool
+        Compact dtypes, only used with cast
+    
+    Returns
+    -------
+    Scrapped individual stats DataFrame for given category
+    """
+
+    if category not in COLUMNS:
+        return None
+
+    df = parse_stats(fetch.get_page(get_url(league, category, season)), league, category, backend)
+    return cast_types(df, compact=compact) if cast else df
+
+def parse_cast(html: str, league: str, category: str, backend: str = 'lxml', compact: bool = False) -> bytes:
+    """ Parse and cast a category table in a worker process, see parallel.map_frames
+
+    Returns
+    -------
+    the casted DataFrame as an Arrow IPC stream
+    """
+
+    return parallel.to_ipc(cast_types(parse_stats(html, league, category, backend), compact=compact))
+
+def get_all_stats(league: str, season: str, max_workers: int = None, backend: str = 'lxml',
+                  processes: int = None, compact: bool = False, job_dir: str = None) -> dict:
+    """ Get every stats category of a league and season, downloading the pages concurrently
+
+    Parameters
+    ----------
+    league  : str
+        League name, one of the keys of LEAGUES
+    season  : str
+        Season to be scrapped (ex: 2022-2023)
+    max_workers : int
+        Maximum number of concurrent downloads, default to fetch.MAX_WORKERS
+    backend : str
+        'lxml' to extract only the requested table, 'legacy' for the previous BeautifulSoup / read_html parsing
+    processes   : int
+        Parse and cast the tables in this many worker processes, the tables come back casted (see cast_types)
+    compact : bool
+        Compact dtypes of the casted tables, only used with processes or job_dir
+    job_dir : str
+        Save every casted table to this directory as soon as it is extracted (see checkpoint) and only
+        download the missing tables when the call is repeated. A failed download is raised after the
+        other tables are saved. The tables come back casted
+
+    Returns
+    -------
+    dict of category name to scrapped individual stats DataFrame
+    """
+
+    # tables casted with other options are not reused
+    options = {'backend': backend, 'compact': compact}
+    saved = checkpoint.load_tables(job_dir, 'player', league, season, COLUMNS, options) if job_dir else {}
+    missing = [category for category in COLUMNS if category not in saved]
+    pages = fetch.get_pages([get_url(league, category, season) for category in missing], max_workers,
+                            return_exceptions=job_dir is not None)
+    fetched = {category: html for category, html in zip(missing, pages) if not isinstance(html, Exception)}
+
+    if processes:
+        calls = [(html, league, category, backend, compact) for category, html in fetched.items()]
+        tables = dict(zip(fetched, parallel.map_frames(parse_cast, calls, processes)))
+        for category, df in tables.items() if job_dir else []:
+            checkpoint.save(df, job_dir, 'player', league, season, category, options)
+    else:
+        tables = {}
+        for category, html in fetched.items():
+            tables[category] = parse_stats(html, league, category, backend)
+            if job_dir:
+                tables[category] = cast_types(tables[category], compact=compact)
+                checkpoint.save(tables[category], job_dir, 'player', league, season, category, options)
+    checkpoint.raise_failed(pages)
+    return {category: saved[category] if category in saved else tables[category] for category in COLUMNS}
+
 def combine_df(standard: pd.DataFrame, shooting: pd.DataFrame, passing: pd.DataFrame,
                pass_types: pd.DataFrame, gsc: pd.DataFrame, defense: pd.DataFrame,
-               possession: pd.DataFrame, playing_time: pd.DataFrame, misc: pd.DataFrame, season: str) -> pd.DataFrame:
-    
-    playing_time.drop(playing_time.loc[playing_time['Matches Played'] == '0'].index, inplace=True)
-    playing_time['Rk']= playing_time.reset_index().index + 1
+               possession: pd.DataFrame, playing_time: pd.DataFrame, misc: pd.DataFrame, season: str,
+               compact: bool = False) -> pd.DataFrame:
+    """ Join the nine category tables into one casted DataFrame
 
-    df = pd.merge(standard, shooting, on='Rk', suffixes=('', '_remove')).merge(passing, on='Rk', suffixes=('', '_remove')).merge(pass_types, on='Rk', suffixes=('', '_remove')).merge(gsc, on='Rk', suffixes=('', '_remove')).merge(defense, on='Rk', suffixes=('', '_remove')).merge(possession, on='Rk', suffixes=('', '_remove')).merge(misc, on='Rk', suffixes=('', '_remove')).merge(playing_time, on='Rk', suffixes=('', '_remove'))
+    Rows are matched on the fbref player id and squad (join.PLAYER_KEYS), players only listed in
+    playing_time (unused substitutes) are left out.
 
-    df.drop([i for i in df.columns if 'remove' in i or i == 'Matches'],
-               axis=1, inplace=True)
+    Parameters
+    ----------
+    standard, shooting, passing, pass_types, gsc, defense, possession, playing_time, misc  : pd.DataFrame
+        Category DataFrames from get_stats
+    season  : str
+        Season of the data (ex: 2022-2023)
+    compact : bool
+        Use compact dtypes, see cast_types
 
-    df = cast_column(season=season, df=df, big5=False)
-    return df
+    Returns
+    -------
+    combined DataFrame with one row per player and squad
+    """
 
-def get_big5_combined(season: str) -> pd.DataFrame:
-    standard = get_stats(league='Big 5', category='standard', season=season)
-    shooting = get_stats(league='Big 5', category='shooting', season=season)
-    passing = get_stats(league='Big 5', category='passing', season=season)
-    pass_types = get_stats(league='Big 5', category='passing_types', season=season)
-    gca = get_stats(league='Big 5', category='gca', season=season)
-    defense = get_stats(league='Big 5', category='defense', season=season)
-    possession = get_stats(league='Big 5', category='possession', season=season)
-    playing_time = get_stats(league='Big 5', category='playingtime', season=season)
-    misc = get_stats(league='Big 5', category='misc', season=season)
-
-    playing_time.drop(playing_time.loc[playing_time['Matches Played'] == '0'].index, inplace=True)
-    playing_time['Rk']= playing_time.reset_index().index + 1
-
-    df = pd.merge(standard, shooting, on='Rk', suffixes=('', '_remove')).merge(passing, on='Rk', suffixes=('', '_remove')).merge(pass_types, on='Rk', suffixes=('', '_remove')).merge(gca, on='Rk', suffixes=('', '_remove')).merge(defense, on='Rk', suffixes=('', '_remove')).merge(possession, on='Rk', suffixes=('', '_remove')).merge(misc, on='Rk', suffixes=('', '_remove')).merge(playing_time, on='Rk', suffixes=('', '_remove'))
-    
-    df.drop([i for i in df.columns if 'remove' in i or i == 'Matches'],
-               axis=1, inplace=True)
+    tables = [standard, shooting, passing, pass_types, gsc, defense, possession, misc, playing_time]
+    df = join.join_tables(tables, join.player_keys(standard), drop=['Matches'])
 
-    df = cast_column(season=season, df=df)
+    df = cast_column(season=season, df=df, big5=False, compact=compact)
+    return df
 
+@memo.memoize(league='Big 5')
+def get_big5_combined(season: str, max_workers: int = None, backend: str = 'lxml', compact: bool = False,
+                      processes: int = None, job_dir: str = None) -> pd.DataFrame:
+    with instrument.stage('get_big5_combined', season=season, backend=backend) as event:
+        stats = get_all_stats(league='Big 5', season=season, max_workers=max_workers, backend=backend,
+                              processes=processes, compact=compact, job_dir=job_dir)
+        df = combine_df(*stats.values(), season=season, compact=compact)
+        event['rows'] = len(df)
     return df
 
-def cast_column(season: str, df: pd.DataFrame, big5: bool = True) -> pd.DataFrame:
-    
-    if season == '2023-2024':
-            df['Age'] = df['Age'].apply(lambda x: x.split('-')[0])
-
-    if big5:
-        for col in df.columns:
-            if col in ['Rk', 'Player', 'Nation', 'Position', 'Squad', 'Comp']:
-                pass
-            elif col in ['Age', 'Born', 'Matches Played', 'Starts', 'Minutes', 'Minutes per Match', 'Minutes per Start']:
-                df[col] = df[col].astype('int64')
-            else:
-                df[col] = df[col].astype('float64')
-    else:
-        for col in df.columns:
-            if col in ['Rk', 'Player', 'Nation', 'Position', 'Squad', 'Comp']:
-                pass
-            elif col in ['Age', 'Born', 'Matches Played', 'Starts', 'Minutes', 'Minutes per Match', 'Minutes per Start']:
-                df[col] = df[col].apply(lambda x: x.replace(',', ''))
-                df[col] = df[col].astype('int64')
-            else:
-                df[col] = df[col].apply(lambda x: x.replace(',', ''))
-                df[col] = df[col].astype('float64')
+def cast_types(df: pd.DataFrame, compact: bool = False) -> pd.DataFrame:
+    """ Cast every column to the type declared in schema.SCHEMA
+
+    Parameters
+    ----------
+    df  : pd.DataFrame
+        DataFrame with columns scrapped as text (thousands separators and "years-days" ages are handled)
+    compact : bool
+        Downcast integers to int16/int32, floats to float32 and text columns like Squad or Comp to categoricals
+
+    Returns
+    -------
+    a new DataFrame with casted columns
+    """
+
+    with instrument.stage('cast', rows=len(df), columns=len(df.columns), compact=compact):
+        return _cast_types(df, compact)
+
+def _cast_types(df: pd.DataFrame, compact: bool) -> pd.DataFrame:
+    casted = {}
+    for col in df.columns:
+        kind = schema.column_type(col)
+        values = df[col]
+        if kind in ('text', 'category'):
+            casted[col] = values.astype('category') if compact and kind == 'category' else values
+            continue
+
+        if not pd.api.types.is_numeric_dtype(values):
+            values = values.astype(str).str.replace(',', '', regex=False)
+            if col == 'Age':
+                # current season ages are given as years-days (ex: 25-123)
+                values = values.str.partition('-')[0]
+            values = pd.to_numeric(values)
+
+        if not compact:
+            casted[col] = values.astype(schema.DTYPES[kind])
+        elif kind == 'int':
+            values = values.to_numpy(dtype='int64')
+            casted[col] = pd.Series(values.astype(schema.smallest_int(values)), index=df.index)
+        else:
+            casted[col] = values.astype(schema.COMPACT_DTYPES[kind])
+
+    # building the frame at once keeps one block per dtype instead of one per column
+    return pd.DataFrame(casted, index=df.index)
+
+def add_derived(df: pd.DataFrame, season: str) -> pd.DataFrame:
+    """ Add Turnover columns and the Season column to a combined DataFrame """
 
     df['Turnover'] = (df['Attempted Passes Total'] - df['Completed Passes Total']) + df['Dispossessed'] + df['TakeOns Tackled'] + df['Miscontrols']
     df['Turnover%'] = round((df['Turnover'] / df['Touches']) * 100, 2)
@@ -254,34 +516,134 @@ def cast_column(season: str, df: pd.DataFrame, big5: bool = True) -> pd.DataFram
     df['Season'] = season
     return df
 
-def get_per_90(df: pd.DataFrame) -> pd.DataFrame:
-    """ Converting eligible columns into per 90 basis
+def cast_column(season: str, df: pd.DataFrame, big5: bool = True, compact: bool = False) -> pd.DataFrame:
+    """ Cast a combined DataFrame and add the derived columns
 
     Parameters
     ----------
+    season  : str
+        Season of the data (ex: 2022-2023)
     df  : pd.DataFrame
-        Source DataFrame to be converted
-    
+        Combined DataFrame to be casted
+    big5    : bool
+        Kept for compatibility, Big 5 and other leagues are casted the same way
+    compact : bool
+        Use compact dtypes, see cast_types
+
     Returns
-    New DataFrame with eligible columns converted into per 90 basis  
+    -------
+    casted DataFrame with Turnover and Season columns
     """
-    
-    # Making a deep copy so the function will not affect to original DataFrame
-    df = df.copy(deep=True)
 
-    for col in df.columns:
-        # Excluding the following columns for conversion
-        if col in ['Rk', 'Player', 'Nation', 'Pos', 'Squad', 'Comp', 'Age', 
-                   'Born', 'Match Played', 'Starts', 'Minutes', 'Season']:
-            pass
-        # Excluding columns which already in per 90 basis
-        elif '90' in col:
-            pass
-        # Converting the remaining columns with 2 points rounding
-        else:
-            df[col] = round(df[col] / df['90s'], 2)
-    
+    df = add_derived(cast_types(df, compact=compact), season)
+    if compact:
+        df['Season'] = df['Season'].astype('category')
     return df
 
+def eligible_columns(df: pd.DataFrame) -> list:
+    """ Numeric columns of the DataFrame which can be converted to a per 90 basis """
+
+    return [col for col in schema.per_90_columns(df.columns) if pd.api.types.is_numeric_dtype(df[col])]
+
+def per_90_block(df: pd.DataFrame, columns: list = None) -> tuple:
+    """ Divide the eligible columns by 90s in a single NumPy operation
+
+    Parameters
+    ----------
+    df  : pd.DataFrame
+        Combined DataFrame with a 90s column
+    columns : list
+        Columns to convert, default to every eligible column (see schema.per_90_columns)
+
+    Returns
+    -------
+    tuple of the converted column names and a 2D array of their per 90 values, rounded to 2 decimals.
+    Players with 0 90s played get NaN instead of infinite values
+    """
+
+    if columns is None:
+        columns = eligible_columns(df)
+    nineties = df['90s'].to_numpy(dtype='float64')
+    dtype = np.result_type(np.float32, *[df[col].dtype for col in columns])
+
+    values = df[columns].to_numpy(dtype='float64')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        values = values / nineties[:, None]
+    values[nineties == 0] = np.nan
+    return columns, np.round(values, 2).astype(dtype, copy=False)
+
+class Per90View:
+    """ Lazy per 90 view of a combined DataFrame
+
+    Columns are only converted when they are accessed and kept once converted, the other columns are
+    returned from the source DataFrame without copy. Use to_frame to materialize the view.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.eligible = set(eligible_columns(df))
+        self._converted = {}
+
+    @property
+    def columns(self) -> pd.Index:
+        return self.df.columns
+
+    @property
+    def index(self) -> pd.Index:
+        return self.df.index
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def __contains__(self, col) -> bool:
+        return col in self.df.columns
+
+    def __iter__(self):
+        return iter(self.df.columns)
+
+    def _convert(self, columns: list):
+        missing = [col for col in columns if col in self.eligible and col not in self._converted]
+        if missing:
+            _, values = per_90_block(self.df, missing)
+            for position, col in enumerate(missing):
+                self._converted[col] = pd.Series(values[:, position], index=self.df.index, name=col)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            self._convert([key])
+            return self._converted.get(key, self.df[key]) if key in self.eligible else self.df[key]
+        return self.to_frame(list(key))
+
+    def to_frame(self, columns: list = None) -> pd.DataFrame:
+        """ Materialize the given columns, default to every column """
+
+        columns = list(self.df.columns if columns is None else columns)
+        self._convert(columns)
+        return pd.concat([self._converted[col] if col in self.eligible else self.df[col] for col in columns],
+                         axis=1)
+
+def get_per_90(df: pd.DataFrame, lazy: bool = False) -> pd.DataFrame:
+    """ Converting eligible columns into per 90 basis
+
+    Parameters
+    ----------
+    df  : pd.DataFrame
+        Source DataFrame to be converted, it is not modified
+    lazy    : bool
+        Return a Per90View which converts columns only when they are accessed
+
+    Returns
+    New DataFrame with eligible columns converted into per 90 basis (see schema.per_90_columns)
+    """
+
+    if lazy:
+        return Per90View(df)
+
+    columns, values = per_90_block(df)
+    converted = pd.DataFrame(values, index=df.index, columns=columns)
+    return pd.concat([df.drop(columns=columns), converted], axis=1)[df.columns]
+
 def sigmoid(x):
-    return 2 / (1 + math.exp(-.1 * (x - 50)))
+    """ Squash 0-100 percentiles around 50, works on scalars and whole arrays """
+
+    return 2 / (1 + np.exp(-.1 * (np.asarray(x, dtype='float64') - 50)))
@@ -1,17 +1,155 @@
+import numpy as np
 import pandas as pd
 
+# Columns describing the player, they are never ranked
+ID_COLUMNS = ['Rk', 'Player', 'Player ID', 'Nation', 'Pos', 'Position', 'Squad', 'Comp', 'Age', 'Born', 'Season']
+
+# Metrics where a lower value is better, their percentiles are reversed
+DIRECTIONS = {'Turnover': -1, 'Turnover%': -1, 'Turnover/90': -1, 'onGA': -1, 'onxGA': -1}
+
+def position_column(df: pd.DataFrame) -> str:
+    return 'Pos' if 'Pos' in df.columns else 'Position'
+
+def percentile_ranks(values: np.ndarray) -> np.ndarray:
+    """ Percentile rank of every column of a matrix at once
+
+    Same result as DataFrame.rank(pct=True): ties get their average rank and missing values stay missing.
+
+    Parameters
+    ----------
+    values  : np.ndarray
+        2D matrix, one column per metric
+
+    Returns
+    -------
+    matrix of the same shape with percentiles between 0 and 1
+    """
+
+    values = np.asarray(values, dtype='float64')
+    ordered = np.sort(values, axis=0)
+    counts = (~np.isnan(values)).sum(axis=0)
+    ranks = np.empty_like(values)
+    for j in range(values.shape[1]):
+        column = ordered[:counts[j], j]
+        low = np.searchsorted(column, values[:, j], side='left')
+        high = np.searchsorted(column, values[:, j], side='right')
+        ranks[:, j] = (low + high + 1) / 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ranks = ranks / counts
+    ranks[np.isnan(values)] = np.nan
+    return ranks
+
+def _directed(df: pd.DataFrame, metrics: list) -> np.ndarray:
+    directions = np.array([DIRECTIONS.get(metric, 1) for metric in metrics], dtype='float64')
+    return df[metrics].to_numpy(dtype='float64') * directions
+
+def percentile_table(df: pd.DataFrame, metrics: list = None, group_by: list = None) -> pd.DataFrame:
+    """ Rank every metric within each (position, season) group, each group is ranked once as a matrix
+
+    Parameters
+    ----------
+    df  : pd.DataFrame
+        Combined DataFrame (ex: output of get_big5_combined or get_per_90)
+    metrics : list
+        Columns to rank, default to every numeric column which is not in ID_COLUMNS
+    group_by    : list
+        Columns defining the peer groups, default to position and Season when present
+
+    Returns
+    -------
+    DataFrame with the same index as df and the percentiles (0-100) of every metric
+    """
+
+    if metrics is None:
+        metrics = [col for col in df.select_dtypes('number').columns if col not in ID_COLUMNS]
+    if group_by is None:
+        group_by = [col for col in [position_column(df), 'Season'] if col in df.columns]
+
+    values = _directed(df, metrics)
+    table = np.full(values.shape, np.nan)
+    if group_by:
+        groups = df.groupby(group_by, sort=False, observed=True).indices.values()
+    else:
+        groups = [np.arange(len(df))]
+    for rows in groups:
+        table[rows] = percentile_ranks(values[rows])
+    return pd.DataFrame(table * 100, index=df.index, columns=metrics)
+
 def custom_profile(df: pd.DataFrame, columns: list, position: str = None,
                    age_min: int = 16, age_max: int = 45, minutes: int = 0) -> pd.DataFrame:
-    
-    df = df.loc[(df['Pos'] == position) & (df['Age'] >= age_min) 
-                & (df['Age'] <= age_max) & (df['Minutes'] >= minutes)][columns].copy(dep=True)
-    for col in df.columns:
-      if col in ['Player', 'Age', 'Pos', 'Squad']:
-        pass
-      elif col in ('Turnover%', 'onxGA'):
-        df[col] = (df[col] * -1).rank(pct=True).round(2) * 100
-      else:
-        df[col] = df[col].rank(pct=True).round(2) * 100
-
-    df['Rating'] = df.iloc[:, 4:-1].mean(axis=1).round()
+    """ Rank the players of a position against each other on a custom set of metrics
+
+    Parameters
+    ----------
+    df  : pd.DataFrame
+        Combined DataFrame (ex: output of get_big5_combined or get_per_90)
+    columns : list
+        Columns to keep, the ones which are not in ID_COLUMNS are ranked
+    position    : str
+        Position of the players (ex: FW, DF,MF)
+    age_min, age_max    : int
+        Age range of the players
+    minutes : int
+        Minimum minutes played
+
+    Returns
+    -------
+    DataFrame of the selected players with percentiles (0-100) and their mean as Rating
+    """
+
+    df = df.loc[(df[position_column(df)] == position) & (df['Age'] >= age_min)
+                & (df['Age'] <= age_max) & (df['Minutes'] >= minutes)][columns].copy(deep=True)
+
+    metrics = [col for col in columns if col not in ID_COLUMNS]
+    ranks = (percentile_ranks(_directed(df, metrics)).round(2) * 100) if len(df) else np.empty((0, len(metrics)))
+    df[metrics] = ranks
+    df['Rating'] = df[metrics].mean(axis=1).round()
     return df
+
+def score_profiles(df: pd.DataFrame, profiles: dict, group_by: list = None, transform=None) -> pd.DataFrame:
+    """ Score many profile definitions at once against a single percentile table
+
+    The metrics are ranked once within each (position, season) group with percentile_table, each profile
+    then only selects its players and averages its metrics.
+
+    Parameters
+    ----------
+    df  : pd.DataFrame
+        Combined DataFrame (ex: output of get_big5_combined or get_per_90)
+    profiles    : dict
+        Profile name to definition, a dict with 'columns' (metrics to average) and optionally 'position',
+        'age_min', 'age_max', 'minutes' and 'weights' (one weight per metric)
+    group_by    : list
+        Columns defining the peer groups, see percentile_table
+    transform   : callable
+        Applied to the percentile matrix before averaging (ex: player.sigmoid)
+
+    Returns
+    -------
+    DataFrame with the same index as df and one rating column per profile, missing for players
+    outside of the profile
+    """
+
+    metrics = list(dict.fromkeys(metric for profile in profiles.values() for metric in profile['columns']))
+    table = percentile_table(df, metrics, group_by).to_numpy()
+    if transform is not None:
+        table = transform(table)
+    position = df[position_column(df)].to_numpy()
+    age = df['Age'].to_numpy()
+    minutes = df['Minutes'].to_numpy()
+    index = {metric: i for i, metric in enumerate(metrics)}
+
+    ratings = {}
+    for name, profile in profiles.items():
+        mask = (age >= profile.get('age_min', 16)) & (age <= profile.get('age_max', 45)) \
+            & (minutes >= profile.get('minutes', 0))
+        if profile.get('position') is not None:
+            mask &= position == profile['position']
+        weights = np.asarray(profile.get('weights', [1] * len(profile['columns'])), dtype='float64')
+        values = table[:, [index[metric] for metric in profile['columns']]]
+        # missing metrics are left out of the weighted mean, like DataFrame.mean does
+        present = ~np.isnan(values)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scores = np.where(present, values, 0) @ weights / (present @ weights)
+        ratings[name] = np.where(mask, scores, np.nan)
+    return pd.DataFrame(ratings, index=df.index)
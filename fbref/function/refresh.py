@@ -0,0 +1,289 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+import pandas as pd
+
+from . import checkpoint, extract, fetch, join, memo, player, squad, store
+
+COMMENT = re.compile('<!--.*?-->', re.DOTALL)
+
+def _state_path(entity: str, league: str, season: str, root: str = None) -> str:
+    return os.path.join(store.partition_path(os.path.join('_refresh', entity), league, season, root), 'state.json')
+
+def load_state(entity: str, league: str, season: str, root: str = None) -> dict:
+    """ Load the table hashes recorded by the last refresh of a league/season """
+
+    try:
+        with open(_state_path(entity, league, season, root)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state: dict, entity: str, league: str, season: str, root: str = None):
+    path = _state_path(entity, league, season, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f)
+    os.replace(path + '.tmp', path)
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def _squad_tables(html: str) -> str:
+    """ Html of the squad "for" and "opponent" tables, the first two tables read_html finds (see squad.parse_tables) """
+
+    html = COMMENT.sub('', html)
+    end = html.find('</table>', html.find('</table>') + 1)
+    return html if end == -1 else html[html.find('<table'):end]
+
+def _tables_dir(root: str = None) -> str:
+    # parsed squad tables of the last refresh, unchanged pages are not parsed again
+    return os.path.join(root or store.STORE_DIR, '_refresh', 'tables')
+
+# Columns holding the position of a row in the page, fbref renumbers them when a player is added or removed
+POSITIONAL = ('Rk',)
+
+def owned_columns(category: str) -> list:
+    """ Data columns of the combined player DataFrame which come from given category (see join.join_tables) """
+
+    columns = ['Player', 'Player ID', 'Comp'] + player.COLUMNS[category]
+    owner = {}
+    for name in player.JOIN_ORDER:
+        for col in ['Player', 'Player ID', 'Comp'] + player.COLUMNS[name]:
+            owner.setdefault(col, name)
+    return [col for col in dict.fromkeys(columns) if owner.get(col) == category and col != 'Matches']
+
+def _differs(old: pd.DataFrame, new: pd.DataFrame) -> pd.Series:
+    # categoricals can not be compared when their categories differ
+    old = old.astype({col: object for col in old.columns if isinstance(old[col].dtype, pd.CategoricalDtype)})
+    new = new.astype({col: object for col in new.columns if isinstance(new[col].dtype, pd.CategoricalDtype)})
+    changed = (old != new) & ~(old.isna() & new.isna())
+    return changed.any(axis=1)
+
+def diff(old: pd.DataFrame, new: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """ Compute the rows to upsert and delete to go from old to new
+
+    Parameters
+    ----------
+    old : pd.DataFrame
+        Previously stored DataFrame
+    new : pd.DataFrame
+        Refreshed DataFrame
+    keys    : list
+        Columns identifying a row (ex: join.PLAYER_KEYS)
+
+    Returns
+    -------
+    DataFrame of the new and changed rows with '_op' set to 'upsert', followed by the removed keys with '_op' set to 'delete'.
+    Positional columns (POSITIONAL) are not compared, a renumbered row is not a changed row
+    """
+
+    old = old.set_index(keys)
+    new = new.set_index(keys)
+    common = new.index.intersection(old.index)
+    columns = [col for col in new.columns if col in old.columns and col not in POSITIONAL]
+
+    changed = _differs(old.loc[common, columns], new.loc[common, columns])
+    upsert = new.index.difference(old.index).append(common[changed.to_numpy()])
+    deleted = old.index.difference(new.index)
+
+    upserts = join.reset_keys(new.loc[upsert])
+    upserts = pd.concat([upserts, pd.Series('upsert', index=upserts.index, name='_op')], axis=1)
+    deletes = deleted.to_frame(index=False)
+    deletes['_op'] = 'delete'
+    return pd.concat([upserts, deletes], ignore_index=True)
+
+def apply_delta(df: pd.DataFrame, delta: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """ Apply a delta from diff or refresh to a previous copy of the DataFrame """
+
+    df = df.set_index(keys)
+    deletes = delta.loc[delta['_op'] == 'delete'].set_index(keys).index
+    upserts = delta.loc[delta['_op'] == 'upsert'].drop(columns='_op').set_index(keys)
+    df = df.drop(index=deletes.union(upserts.index).intersection(df.index))
+    return join.reset_keys(pd.concat([df, upserts[[col for col in df.columns if col in upserts.columns]]]))
+
+def write_delta(delta: pd.DataFrame, entity: str, league: str, season: str, root: str = None) -> str:
+    """ Keep a delta next to the store under _delta/<entity>/league=.../season=.../<timestamp>.parquet """
+
+    folder = store.partition_path(os.path.join('_delta', entity), league, season, root)
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f'{time.strftime("%Y%m%dT%H%M%S")}.parquet')
+    delta.to_parquet(path, index=False)
+    return path
+
+def _decategorize(df: pd.DataFrame) -> pd.DataFrame:
+    return df.astype({col: object for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+
+def refresh_players(league: str, season: str, root: str = None, compact: bool = False,
+                    per_90: bool = False) -> pd.DataFrame:
+    """ Refresh a stored player season, re-extracting only the category tables which changed
+
+    Pages are revalidated with conditional GETs and the extracted table html is hashed, only changed
+    tables are parsed and casted and only their columns are patched, on the rows which changed. When
+    players were added or removed the season is joined again from every page.
+
+    Parameters
+    ----------
+    league  : str
+        League name, one of the keys of LEAGUES
+    season  : str
+        Season to be refreshed (ex: 2023-2024)
+    root    : str
+        Root directory of the store, default to store.STORE_DIR
+    compact : bool
+        Store compact dtypes, see player.cast_types
+    per_90  : bool
+        Also write the per 90 DataFrame as 'player_per90', it is always written again when the
+        season already has one
+
+    Returns
+    -------
+    delta of the changed player rows, see diff
+    """
+
+    urls = [player.get_url(league, category, season) for category in player.COLUMNS]
+    pages = dict(zip(player.COLUMNS, fetch.get_pages(urls, revalidate=True)))
+    hashes = {category: _hash(extract.find_table(html, player.TABLE_IDS[category]) or html)
+              for category, html in pages.items()}
+
+    state = load_state('player', league, season, root)
+    changed = [category for category in player.COLUMNS if hashes[category] != state.get(category)]
+    if not changed:
+        return pd.DataFrame(columns=['_op'])
+
+    try:
+        stored = _decategorize(store.read('player', leagues=[league], seasons=[season], root=root, memory_map=False))
+        stored = stored.drop(columns=['league', 'season'], errors='ignore')
+    except FileNotFoundError:
+        stored = None
+
+    # the fresh tables are casted like the stored season, float32 values only compare equal to float32 values
+    tables = {category: player.cast_types(player.parse_stats(pages[category], league, category), compact=compact)
+              for category in changed}
+    keys = join.player_keys(tables[changed[0]])
+    rows_changed = stored is None or not state
+    if not rows_changed:
+        # the join keeps the players of standard found in every table, playing_time also lists unused substitutes
+        stored_keys = stored.set_index(keys).index
+        for category, table in tables.items():
+            table_keys = table.set_index(keys).index
+            if len(stored_keys.difference(table_keys)) or (
+                    category == 'standard' and len(table_keys.difference(stored_keys))):
+                rows_changed = True
+
+    if rows_changed:
+        for category in player.COLUMNS:
+            if category not in tables:
+                tables[category] = player.cast_types(player.parse_stats(pages[category], league, category),
+                                                     compact=compact)
+        df = join.join_tables([tables[category] for category in player.JOIN_ORDER], keys, drop=['Matches'])
+        df = _decategorize(player.add_derived(df, season))
+    else:
+        df = stored.set_index(keys)
+        for category, table in tables.items():
+            columns = [col for col in owned_columns(category) if col in df.columns and col not in keys]
+            fresh = table.set_index(keys)[columns]
+            fresh = fresh[~fresh.index.duplicated()].reindex(df.index)
+            rows = _differs(df[columns], fresh)
+            # patched in the stored dtypes, pandas refuses lossy assignments
+            df.loc[rows, columns] = _decategorize(fresh.loc[rows]).astype(df[columns].dtypes.to_dict())
+        df = player.add_derived(join.reset_keys(df)[stored.columns], season)
+
+    delta = diff(stored, df, keys) if stored is not None else df.assign(_op='upsert')
+    if compact:
+        df = player.cast_types(df, compact=True)
+    store.write(df, 'player', league, season, root=root)
+    if per_90 or os.path.isdir(store.partition_path('player_per90', league, season, root)):
+        store.write(player.get_per_90(df), 'player_per90', league, season, root=root)
+    save_state(hashes, 'player', league, season, root)
+    return delta
+
+def refresh_squads(league: str, season: str, entities: tuple = ('squad_for', 'squad_opponent'),
+                   root: str = None) -> dict:
+    """ Refresh stored squad "for" and "opponent" seasons, re-extracting only the pages which changed
+
+    Pages are revalidated with conditional GETs and the html of their squad tables is hashed, only changed
+    pages are parsed. The tables of the other pages come from the previous refresh, the DataFrame is
+    combined again and compared with the stored one.
+
+    Returns
+    -------
+    dict of entity (squad_for, squad_opponent) to delta, see diff
+    """
+
+    urls = [squad.get_url(league, category, season) for category in squad.COLUMNS]
+    pages = dict(zip(squad.COLUMNS, fetch.get_pages(urls, revalidate=True)))
+    hashes = {category: _hash(_squad_tables(html)) for category, html in pages.items()}
+
+    parsed = {}
+    deltas = {}
+    for entity, side, combine in (('squad_for', 0, squad.squad_for_df), ('squad_opponent', 1, squad.squad_opponent_df)):
+        if entity not in entities:
+            continue
+        state = load_state(entity, league, season, root)
+        if hashes == state:
+            continue
+
+        tables = {}
+        for category, html in pages.items():
+            if hashes[category] == state.get(category):
+                tables[category] = checkpoint.load(_tables_dir(root), entity, league, season, category)
+            if tables.get(category) is None:
+                if category not in parsed:
+                    parsed[category] = squad.parse_tables(html, league, category)
+                tables[category] = parsed[category][side]
+                checkpoint.save(tables[category], _tables_dir(root), entity, league, season, category)
+
+        df = combine(tables)
+        try:
+            stored = store.read(entity, leagues=[league], seasons=[season], root=root, memory_map=False)
+            stored = _decategorize(stored.drop(columns=['league', 'season'], errors='ignore'))
+            deltas[entity] = diff(stored, df, join.SQUAD_KEYS)
+        except FileNotFoundError:
+            deltas[entity] = pd.concat([df, pd.Series('upsert', index=df.index, name='_op')], axis=1)
+        store.write(df, entity, league, season, root=root)
+        save_state(hashes, entity, league, season, root)
+    return deltas
+
+def refresh(league: str, season: str, entities: tuple = ('player',), root: str = None, compact: bool = False,
+            keep_deltas: bool = True, per_90: bool = False) -> dict:
+    """ Refresh the stored entities of a league/season and return their deltas
+
+    Parameters
+    ----------
+    league  : str
+        League name, one of the keys of LEAGUES
+    season  : str
+        Season to be refreshed (ex: 2023-2024)
+    entities    : tuple
+        Any of store.ENTITIES
+    root    : str
+        Root directory of the store, default to store.STORE_DIR
+    compact : bool
+        Store compact player dtypes
+    keep_deltas : bool
+        Also write every non empty delta with write_delta
+    per_90  : bool
+        Also write the per 90 player DataFrame, see refresh_players
+
+    Returns
+    -------
+    dict of entity to delta DataFrame
+    """
+
+    deltas = {}
+    if 'player' in entities:
+        deltas['player'] = refresh_players(league, season, root, compact, per_90)
+    if 'squad_for' in entities or 'squad_opponent' in entities:
+        deltas.update(refresh_squads(league, season, entities, root))
+    if any(len(delta) for delta in deltas.values()):
+        # tables memoized by this process are out of date
+        memo.invalidate(league, season)
+    if keep_deltas:
+        for entity, delta in deltas.items():
+            if len(delta):
+                write_delta(delta, entity, league, season, root)
+    return deltas
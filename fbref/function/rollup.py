@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+from . import join, player, squad
+
+# Squad columns which can not be computed from the player rows, they are read from the squad pages.
+# Possession is a team measure, 90s and the playing time columns count team matches and minutes
+# (player minutes add up to eleven times more) and player ages are only given in whole years.
+PAGE_COLUMNS = {
+    'standard': ['Age', 'Possession', 'Matches Played', 'Starts', 'Minutes', '90s'],
+    'playing_time': [col for col in squad.COLUMNS['playing_time'] if col not in ('Squad', '# Player')],
+}
+
+# Page columns repeated in other categories, they are taken from the category above
+SHARED_COLUMNS = {'Possession': 'standard', '90s': 'standard'}
+
+# Rates computed from the summed player columns: (numerator columns, denominator columns, scale)
+RATIOS = {
+    'Shots on Target %': (['Shots on Target'], ['Shots'], 100),
+    'Goals/Shot': (['Goals'], ['Shots'], 1),
+    'Goals/Shot on Target': (['Goals'], ['Shots on Target'], 1),
+    'npxG/Shot': (['npxG'], ['Shots'], 1),
+    'Completed Passes Total%': (['Completed Passes Total'], ['Attempted Passes Total'], 100),
+    'Completed Short Passes%': (['Completed Short Passes'], ['Attempted Short Passes'], 100),
+    'Completed Medium Passes%': (['Completed Medium Passes'], ['Attempted Medium Passes'], 100),
+    'Completed Long Passes%': (['Completed Long Passes'], ['Attempted Long Passes'], 100),
+    'Dribbles Challenged%': (['Dribblers Tackled'], ['Dribbles Challenged'], 100),
+    'Successful TakeOns%': (['Successful TakeOns'], ['TakeOns Attempted'], 100),
+    'TakeOns Tackled %': (['TakeOns Tackled'], ['TakeOns Attempted'], 100),
+    'Aerial Won%': (['Aerial Won'], ['Aerial Won', 'Aerial Lost'], 100),
+}
+
+# Per 90 columns, summed player columns divided by the team 90s
+PER_90 = {
+    'Goals/90': ['Goals'], 'Assists/90': ['Assists'], 'G+A/90': ['G+A'], 'Non Penalty Goals/90': ['Non Penalty Goals'],
+    'Non Penalty G+A/90': ['Non Penalty Goals', 'Assists'], 'xG/90': ['xG'], 'xAG/90': ['xAG'],
+    'xG+xAG/90': ['xG', 'xAG'], 'npxG/90': ['npxG'], 'npxG+xAG/90': ['npxG+xAG'], 'Shots/90': ['Shots'],
+    'Shots on Target/90': ['Shots on Target'], 'SCA90': ['SCA'], 'GCA90': ['GCA'],
+}
+
+# Averages weighted by a player column
+WEIGHTED = {'Average Shot Distance': 'Shots'}
+
+def derivation(category: str, column: str) -> str:
+    """ Get how a squad column is computed: page, count, ratio, per_90, weighted or sum """
+
+    if column in PAGE_COLUMNS.get(SHARED_COLUMNS.get(column, category), []):
+        return 'page'
+    if column == '# Player':
+        return 'count'
+    if column in RATIOS:
+        return 'ratio'
+    if column in PER_90:
+        return 'per_90'
+    if column in WEIGHTED:
+        return 'weighted'
+    return 'sum'
+
+def page_categories(categories: list = None) -> list:
+    """ Squad categories whose pages are still needed to build the given categories """
+
+    needed = set()
+    for category in categories or squad.COLUMNS:
+        for column in squad.COLUMNS[category]:
+            if derivation(category, column) == 'page':
+                needed.add(SHARED_COLUMNS.get(column, category))
+    return [category for category in squad.COLUMNS if category in needed]
+
+def _sum_columns(categories: list) -> list:
+    columns = {}
+    for category in categories:
+        for column in squad.COLUMNS[category]:
+            kind = derivation(category, column)
+            if kind == 'sum' and column != 'Squad':
+                columns[column] = True
+            elif kind == 'ratio':
+                columns.update(dict.fromkeys(RATIOS[column][0] + RATIOS[column][1], True))
+            elif kind == 'per_90':
+                columns.update(dict.fromkeys(PER_90[column], True))
+    return list(columns)
+
+def rollup(players: pd.DataFrame, pages: dict, categories: list = None) -> dict:
+    """ Compute squad "for" tables from the combined player DataFrame with one groupby
+
+    Parameters
+    ----------
+    players : pd.DataFrame
+        Combined player DataFrame (ex: output of get_big5_combined or combine_df)
+    pages   : dict
+        Squad "for" DataFrames of page_categories(categories), from squad.get_squad_stats
+    categories  : list
+        Squad categories to build, default to every category of squad.COLUMNS
+
+    Returns
+    -------
+    dict of category name to squad "for" DataFrame with the columns of squad.COLUMNS
+    """
+
+    categories = list(categories or squad.COLUMNS)
+    summed = _sum_columns(categories)
+    # compact float32 columns are summed in float64, fbref rounds the squad totals to 2 decimals
+    grouped = players[summed].astype('float64').groupby(players['Squad'], sort=False, observed=True)
+    totals = grouped.sum().round(2)
+    counts = grouped.size()
+    weighted = {column: (players[column] * players[weight]).groupby(players['Squad'], sort=False, observed=True).sum()
+                for column, weight in WEIGHTED.items()}
+    nineties = pages['standard'].set_index('Squad')['90s'].reindex(totals.index).to_numpy(dtype='float64')
+
+    tables = {}
+    for category in categories:
+        data = {}
+        for column in squad.COLUMNS[category]:
+            kind = derivation(category, column)
+            if column == 'Squad' or kind == 'page':
+                continue
+            if kind == 'count':
+                data[column] = counts.to_numpy()
+            elif kind == 'ratio':
+                numerator, denominator, scale = RATIOS[column]
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    values = totals[numerator].sum(axis=1).to_numpy() / totals[denominator].sum(axis=1).to_numpy()
+                data[column] = np.round(values * scale, 1 if scale == 100 else 2)
+            elif kind == 'per_90':
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    data[column] = np.round(totals[PER_90[column]].sum(axis=1).to_numpy() / nineties, 2)
+            elif kind == 'weighted':
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    values = weighted[column].reindex(totals.index).to_numpy() / totals[WEIGHTED[column]].to_numpy()
+                data[column] = np.round(values, 1)
+            else:
+                data[column] = totals[column].to_numpy()
+        derived = join.reset_keys(pd.DataFrame(data, index=totals.index.rename('Squad')))
+
+        page = [column for column in squad.COLUMNS[category] if derivation(category, column) == 'page']
+        sources = {}
+        for column in page:
+            sources.setdefault(SHARED_COLUMNS.get(column, category), []).append(column)
+        parts = [derived] + [pages[source][['Squad'] + columns] for source, columns in sources.items()]
+        tables[category] = join.join_tables(parts, join.SQUAD_KEYS)[squad.COLUMNS[category]]
+    return tables
+
+def get_for_stats(league: str, season: str, players: pd.DataFrame = None, max_workers: int = None,
+                  job_dir: str = None) -> pd.DataFrame:
+    """ Get the squad "for" DataFrame, fetching only the squad pages of the columns which can not be derived
+
+    Parameters
+    ----------
+    league  : str
+        League name, one of the keys of LEAGUES
+    season  : str
+        Season to be scrapped (ex: 2022-2023)
+    players : pd.DataFrame
+        Combined player DataFrame of the same league and season, built from the (cached) player pages
+        when not given
+    max_workers : int
+        Maximum number of concurrent downloads, default to fetch.MAX_WORKERS
+    job_dir : str
+        Checkpoint directory of the extracted tables, see player.get_all_stats
+
+    Returns
+    -------
+    squad "for" DataFrame like squad.get_for_stats. Opponent tables can not be derived from the players.
+    """
+
+    if players is None:
+        stats = player.get_all_stats(league, season, max_workers, job_dir=job_dir)
+        players = player.combine_df(*stats.values(), season=season)
+    pages = squad.get_squad_stats(league, season, page_categories(), max_workers, job_dir)
+    tables = rollup(players, {category: pair[0] for category, pair in pages.items()})
+    return squad.squad_for_df(tables)
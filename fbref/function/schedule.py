@@ -0,0 +1,185 @@
+import contextlib
+import email.utils
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+
+from . import cache, instrument
+
+try:
+    import fcntl
+except ImportError:
+    # no file locks on windows, the budget is only shared between the threads of a process
+    fcntl = None
+
+# Request budget shared by every thread and process, override with FBREF_REQUESTS_PER_MINUTE (0 disables it).
+# fbref blocks bots sending more than 10 requests per minute, 8 per minute plus the BURST keeps every
+# 60 seconds window at 10 requests or less
+REQUESTS_PER_MINUTE = float(os.environ.get('FBREF_REQUESTS_PER_MINUTE', '8'))
+
+# Number of requests which can be sent back to back after an idle period
+BURST = 2
+
+# File holding the shared bucket, default to rate.json in the cache directory
+RATE_FILE = os.environ.get('FBREF_RATE_FILE')
+
+# Throttled (429), unavailable and failed requests are retried with exponential backoff and full jitter
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 5
+BACKOFF = 2
+MAX_BACKOFF = 300
+
+# Request priorities, lower goes first: pages of the current season jump ahead of backfill
+CURRENT = 0
+BACKFILL = 1
+
+_condition = threading.Condition()
+_waiting = []
+_tickets = itertools.count()
+_local_state = {}
+
+def priority(url: str) -> int:
+    return BACKFILL if cache.is_finished_season(url) else CURRENT
+
+def _state_path() -> str:
+    return RATE_FILE or os.path.join(cache.CACHE_DIR, 'rate.json')
+
+@contextlib.contextmanager
+def _shared_state():
+    """ Lock and load the bucket state of every process, it is saved back when the block exits """
+
+    default = {'tokens': BURST, 'updated': time.time(), 'blocked_until': 0}
+    if fcntl is None:
+        for key, value in default.items():
+            _local_state.setdefault(key, value)
+        yield _local_state
+        return
+
+    path = _state_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a+') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.seek(0)
+            try:
+                state = {**default, **json.loads(f.read() or '{}')}
+            except ValueError:
+                state = default
+            yield state
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(state))
+            f.flush()
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _take() -> float:
+    """ Take a token from the bucket, return 0 on success or the seconds to wait before trying again """
+
+    rate = REQUESTS_PER_MINUTE / 60
+    with _shared_state() as state:
+        now = time.time()
+        state['tokens'] = min(BURST, state['tokens'] + max(0, now - state['updated']) * rate)
+        state['updated'] = now
+        if now < state['blocked_until']:
+            return state['blocked_until'] - now
+        if state['tokens'] >= 1:
+            state['tokens'] -= 1
+            return 0
+        return (1 - state['tokens']) / rate
+
+def acquire(priority: int = BACKFILL):
+    """ Wait for a request slot of the budget, waiting requests are served by priority then arrival """
+
+    if not REQUESTS_PER_MINUTE:
+        return
+
+    ticket = (priority, next(_tickets))
+    with _condition:
+        heapq.heappush(_waiting, ticket)
+        try:
+            while True:
+                wait = None
+                if _waiting[0] == ticket:
+                    wait = _take()
+                    if wait == 0:
+                        return
+                # the first request waits for the bucket, the other ones until it is served
+                _condition.wait(wait)
+        finally:
+            _waiting.remove(ticket)
+            heapq.heapify(_waiting)
+            _condition.notify_all()
+
+def block(seconds: float):
+    """ Stop every thread and process from sending requests for given seconds (ex: Retry-After) """
+
+    with _shared_state() as state:
+        state['blocked_until'] = max(state['blocked_until'], time.time() + seconds)
+
+def retry_after(response: requests.Response) -> float:
+    """ Get the seconds to wait from the Retry-After header (delay or http date), None without header """
+
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff(attempt: int) -> float:
+    return random.uniform(0, min(MAX_BACKOFF, BACKOFF * 2 ** attempt))
+
+def request(send, url: str, **kwargs) -> requests.Response:
+    """ Send a request within the budget, retrying throttled and failed requests
+
+    Parameters
+    ----------
+    send    : callable
+        Called with (url, **kwargs) to send the request (ex: session.get)
+    url : str
+        The fbref url, its season gives the priority of the request
+
+    Returns
+    -------
+    the last response, its status is only checked by the caller
+    """
+
+    level = priority(url)
+    for attempt in range(MAX_RETRIES + 1):
+        acquire(level)
+        try:
+            response = send(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as error:
+            if attempt == MAX_RETRIES:
+                raise
+            wait = backoff(attempt)
+            instrument.record('retry', wait, url=url, error=type(error).__name__)
+            time.sleep(wait)
+            continue
+
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            return response
+
+        response.close()
+        wait = retry_after(response)
+        if wait is not None:
+            # the server said how long to wait, it applies to every job
+            block(wait)
+            if not REQUESTS_PER_MINUTE:
+                # without budget acquire does not look at the block
+                time.sleep(wait)
+        else:
+            wait = backoff(attempt)
+            time.sleep(wait)
+        instrument.record('retry', wait, url=url, status=response.status_code)
+    return response
@@ -0,0 +1,50 @@
+import numpy as np
+
+# Column name to type, every column which is not listed here is a float metric
+SCHEMA = {'Rk': 'int', 'Player': 'text', 'Player ID': 'text', 'Nation': 'category', 'Position': 'category', 'Squad': 'category',
+          'Comp': 'category', 'Season': 'category', 'Age': 'int', 'Born': 'int', 'Matches Played': 'int',
+          'Starts': 'int', 'Minutes': 'int', 'Minutes per Match': 'int', 'Minutes per Start': 'int', 'Matches': 'text'}
+
+DEFAULT_TYPE = 'float'
+
+# Numeric columns which are never converted to a per 90 basis: playing time and player attributes
+PER_90_EXCLUDED = {'Rk', 'Age', 'Born', 'Matches Played', 'Starts', 'Minutes', '90s'}
+
+# Rates and averages, dividing them by the 90s played is meaningless
+RATE_COLUMNS = {'Goals/Shot', 'Goals/Shot on Target', 'npxG/Shot', 'Average Shot Distance', 'Minutes per Match',
+                'Minutes per Start', 'Minutes per Subs', 'PPM', 'On-Off', 'xGOn-Off'}
+
+# Any column containing one of these is already a rate (ex: Shots on Target %, xG/90, SCA90)
+RATE_MARKERS = ('%', '90')
+
+# dtypes used by cast_types, the compact ones are picked with compact=True
+DTYPES = {'int': 'int64', 'float': 'float64', 'text': 'object', 'category': 'object'}
+COMPACT_DTYPES = {'int': ('int16', 'int32', 'int64'), 'float': 'float32', 'text': 'object', 'category': 'category'}
+
+def column_type(column: str) -> str:
+    """ Get the schema type (int, float, text or category) of a column """
+
+    return SCHEMA.get(column, DEFAULT_TYPE)
+
+def is_numeric(column: str) -> bool:
+    return column_type(column) in ('int', 'float')
+
+def is_rate(column: str) -> bool:
+    return column in RATE_COLUMNS or any(marker in column for marker in RATE_MARKERS)
+
+def per_90_columns(columns) -> list:
+    """ Get the columns which can be converted to a per 90 basis, in the given order """
+
+    return [col for col in columns if is_numeric(col) and col not in PER_90_EXCLUDED and not is_rate(col)]
+
+def smallest_int(values: np.ndarray) -> str:
+    """ Get the smallest compact integer dtype able to hold every value """
+
+    if len(values) == 0:
+        return COMPACT_DTYPES['int'][0]
+    low, high = values.min(), values.max()
+    for dtype in COMPACT_DTYPES['int']:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return 'int64'
@@ -0,0 +1,191 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import store
+
+# Per 90 metrics describing the playing style, used when no metrics are given
+DEFAULT_METRICS = ['Goals', 'Assists', 'npxG', 'xAG', 'Shots', 'Key Passes', 'Passes Into Final 3rd',
+                   'Passes Into Pen Area', 'Progressive Passes', 'Progressive Carries', 'Progressive Passes Received',
+                   'Completed Passes Total', 'Completed Long Passes', 'Crosses', 'Successful TakeOns', 'Touches',
+                   'Att Pen Touches', 'Tackles', 'Interceptions', 'Blocks', 'Clearances', 'Aerial Won', 'Recoveries',
+                   'SCA', 'Dispossessed', 'Miscontrols']
+
+# Columns kept next to the matrix to describe and filter the neighbours
+META_COLUMNS = ['Player', 'Player ID', 'Position', 'Squad', 'Comp', 'Age', 'Minutes', 'Season']
+
+def position_group(position: str) -> str:
+    """ Primary position of a player (ex: DF,MF is DF) """
+
+    return str(position).split(',')[0]
+
+def build_index(df: pd.DataFrame, metrics: list = None, min_minutes: int = 0) -> dict:
+    """ Build a similarity index with one normalized float32 matrix per position group
+
+    Parameters
+    ----------
+    df  : pd.DataFrame
+        Per 90 DataFrame (ex: get_per_90 of several leagues and seasons concatenated)
+    metrics : list
+        Per 90 columns describing a player, default to DEFAULT_METRICS
+    min_minutes : int
+        Leave out players with less minutes, their per 90 values are mostly noise
+
+    Returns
+    -------
+    dict with the metrics and, for every position group, the z-scored matrix, its row norms,
+    the normalization parameters and the player metadata
+    """
+
+    metrics = [metric for metric in (metrics or DEFAULT_METRICS) if metric in df.columns]
+    df = df.loc[df['Minutes'] >= min_minutes] if 'Minutes' in df.columns else df
+    groups = df['Position'].map(position_group)
+
+    index = {'metrics': metrics, 'groups': {}}
+    for group, rows in groups.groupby(groups, sort=True).groups.items():
+        part = df.loc[rows]
+        values = np.nan_to_num(part[metrics].to_numpy(dtype='float64'))
+        mean = values.mean(axis=0)
+        std = values.std(axis=0)
+        std[std == 0] = 1
+        matrix = ((values - mean) / std).astype('float32')
+        index['groups'][group] = {
+            'matrix': matrix,
+            'norms': np.linalg.norm(matrix, axis=1).astype('float32'),
+            'mean': mean,
+            'std': std,
+            'meta': part[[col for col in META_COLUMNS if col in part.columns]].reset_index(drop=True),
+        }
+    return index
+
+def _candidates(meta: pd.DataFrame, age_min: int, age_max: int, minutes: int, leagues: list) -> np.ndarray:
+    mask = np.ones(len(meta), dtype=bool)
+    if age_min is not None:
+        mask &= meta['Age'].to_numpy() >= age_min
+    if age_max is not None:
+        mask &= meta['Age'].to_numpy() <= age_max
+    if minutes is not None:
+        mask &= meta['Minutes'].to_numpy() >= minutes
+    if leagues is not None:
+        mask &= meta['Comp'].isin(leagues).to_numpy()
+    return mask
+
+def query(index: dict, players: list, k: int = 10, metric: str = 'cosine', age_min: int = None,
+          age_max: int = None, minutes: int = None, leagues: list = None) -> pd.DataFrame:
+    """ Find the k most similar players of every given player, all queries of a group are answered at once
+
+    Parameters
+    ----------
+    index   : dict
+        Index from build_index or load_index
+    players : list
+        fbref player ids or player names, every row of a player (season, squad) is queried
+    k   : int
+        Number of neighbours per queried row
+    metric  : str
+        'cosine' (higher is more similar) or 'euclidean' (lower is more similar)
+    age_min, age_max    : int
+        Age range of the neighbours
+    minutes : int
+        Minimum minutes played by the neighbours
+    leagues : list
+        Competitions of the neighbours (values of the Comp column)
+
+    Returns
+    -------
+    DataFrame with one row per neighbour: the queried player, its rank, the score and the neighbour metadata
+    """
+
+    results = []
+    for group, data in index['groups'].items():
+        meta = data['meta']
+        found = meta['Player'].isin(players)
+        if 'Player ID' in meta.columns:
+            found |= meta['Player ID'].isin(players)
+        rows = np.flatnonzero(found.to_numpy())
+        if len(rows) == 0:
+            continue
+
+        matrix = data['matrix']
+        queries = matrix[rows]
+        dot = queries @ matrix.T
+        if metric == 'cosine':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                scores = dot / np.outer(data['norms'][rows], data['norms'])
+            scores = np.nan_to_num(scores, nan=-1)
+            order = -1
+        elif metric == 'euclidean':
+            squared = (data['norms'][rows] ** 2)[:, None] + (data['norms'] ** 2)[None, :] - 2 * dot
+            scores = np.sqrt(np.maximum(squared, 0))
+            order = 1
+        else:
+            raise ValueError(f'unknown metric {metric}')
+
+        mask = _candidates(meta, age_min, age_max, minutes, leagues)
+        worst = np.inf if order == 1 else -np.inf
+        scores = np.where(mask[None, :], scores, worst)
+        scores[np.arange(len(rows)), rows] = worst
+
+        count = min(k, int(mask.sum()))
+        if count == 0:
+            continue
+        keyed = scores * order
+        top = np.argpartition(keyed, count - 1, axis=1)[:, :count]
+        top = np.take_along_axis(top, np.argsort(np.take_along_axis(keyed, top, axis=1), axis=1), axis=1)
+
+        for position, row in enumerate(rows):
+            # the queried row itself and filtered out players are never neighbours
+            best = top[position][np.isfinite(scores[position, top[position]])]
+            neighbours = meta.iloc[best].reset_index(drop=True)
+            neighbours.insert(0, 'Score', scores[position, best])
+            neighbours.insert(0, 'Rank', np.arange(1, len(best) + 1))
+            neighbours.insert(0, 'Query Season', meta['Season'].iloc[row] if 'Season' in meta.columns else None)
+            neighbours.insert(0, 'Query', meta['Player'].iloc[row])
+            results.append(neighbours)
+
+    if not results:
+        return pd.DataFrame(columns=['Query', 'Query Season', 'Rank', 'Score'] + META_COLUMNS)
+    return pd.concat(results, ignore_index=True)
+
+def _index_dir(name: str, root: str = None) -> str:
+    return os.path.join(root or store.STORE_DIR, '_index', name)
+
+def save_index(index: dict, name: str = 'default', root: str = None) -> str:
+    """ Save an index next to the season store, under <store>/_index/<name>/
+
+    Returns
+    -------
+    the index directory
+    """
+
+    folder = _index_dir(name, root)
+    os.makedirs(folder, exist_ok=True)
+    groups = {}
+    for group, data in index['groups'].items():
+        np.save(os.path.join(folder, f'{group}.npy'), data['matrix'])
+        data['meta'].to_parquet(os.path.join(folder, f'{group}.parquet'), index=False)
+        groups[group] = {'mean': data['mean'].tolist(), 'std': data['std'].tolist()}
+    with open(os.path.join(folder, 'index.json'), 'w') as f:
+        json.dump({'metrics': index['metrics'], 'groups': groups}, f)
+    return folder
+
+def load_index(name: str = 'default', root: str = None, memory_map: bool = True) -> dict:
+    """ Load an index saved with save_index, the matrices are memory mapped by default """
+
+    folder = _index_dir(name, root)
+    with open(os.path.join(folder, 'index.json')) as f:
+        saved = json.load(f)
+
+    index = {'metrics': saved['metrics'], 'groups': {}}
+    for group, params in saved['groups'].items():
+        matrix = np.load(os.path.join(folder, f'{group}.npy'), mmap_mode='r' if memory_map else None)
+        index['groups'][group] = {
+            'matrix': matrix,
+            'norms': np.linalg.norm(matrix, axis=1).astype('float32'),
+            'mean': np.asarray(params['mean']),
+            'std': np.asarray(params['std']),
+            'meta': pd.read_parquet(os.path.join(folder, f'{group}.parquet')),
+        }
+    return index
@@ -1,18 +1,50 @@
+from io import StringIO
+
 import pandas as pd
 
-LEAGUES = {'Eredivisie': ['23', 'Eredivisie'],
-           'Primeira Liga': ['32', 'Primerira-Liga'],
-           'MLS': ['22', 'Major-League-Soccer'], 
-           'Championship': ['10', 'Championship'],
-           'Brasil': ['24', 'Serie-A'],
-           'Liga MX': ['31', 'Liga-MX'],
-           'Primera Division': ['21', 'Primera-Division'],
-           'Belgian Pro Leage': ['37', 'Belgian-Pro-League'],
-           'Segunda': ['17', 'Segunda-Division'],
-           'Serie B': ['18', 'Serie-B'],
-           'Bundesliga 2': ['33', '2-Bundesliga'],
-           'Ligue 2': ['60', 'Ligue-2'],
-           'Big 5': ['Big5', 'Big-5-European-League']}
+from . import checkpoint, fetch, instrument, join, memo
+from .leagues import LEAGUES
+
+CATEGORIES = {'standard': 'stats', 'shooting': 'shooting', 'passing': 'passing', 'pass_type': 'passing_types',
+              'gca': 'gca', 'defense': 'defense', 'possession': 'possession', 'playing_time': 'playingtime',
+              'misc': 'misc'}
+
+COLUMNS = {
+    'standard': ['Squad', '# Player', 'Age', 'Possession', 'Matches Played', 'Starts', 'Minutes', '90s', 'Goals',
+                 'Assists', 'G+A', 'Non Penalty Goals', 'Penalty Goals', 'Penalty Attempted', 'Yellow Cards',
+                 'Red Cards', 'xG', 'npxG', 'xAG', 'npxG+xAG', 'Progressive Carries', 'Progressive Passes',
+                 'Goals/90', 'Assists/90', 'G+A/90', 'Non Penalty Goals/90', 'Non Penalty G+A/90', 'xG/90',
+                 'xAG/90', 'xG+xAG/90', 'npxG/90', 'npxG+xAG/90'],
+    'shooting': ['Squad', '# Player', '90s', 'Goals', 'Shots', 'Shots on Target', 'Shots on Target %', 'Shots/90',
+                 'Shots on Target/90', 'Goals/Shot', 'Goals/Shot on Target', 'Average Shot Distance', 'Free Kicks',
+                 'Penalty Goals', 'Penalty Attempted', 'xG', 'npxG', 'npxG/Shot', 'Goals - xG', 'Non Penalty Goals - npxG'],
+    'passing': ['Squad', '# Player', '90s', 'Completed Passes Total', 'Attempted Passes Total', 'Completed Passes Total%',
+                'Total Passing Distance', 'Progressive Passing Distance', 'Completed Short Passes', 'Attempted Short Passes',
+                'Completed Short Passes%', 'Completed Medium Passes', 'Attempted Medium Passes', 'Completed Medium Passes%',
+                'Completed Long Passes', 'Attempted Long Passes', 'Completed Long Passes%', 'Assists', 'xAG', 'xA', 'A-xAG',
+                'Key Passes', 'Passes Into Final 3rd', 'Passes Into Pen Area', 'Crossing Into Pen Area', 'Progressive Passes'],
+    'pass_type': ['Squad', '# Player', '90s', 'Attempted Passes Total', 'Live Ball Passes', 'Dead Ball Passes', 'Free Kicks Passes',
+                  'Through Balls', 'Switches', 'Crosses', 'Throw Ins', 'Corner Kicks', 'Inswinging Corner', 'Outswinging Corner',
+                  'Straight Corner', 'Completed Passes Total', 'Passes Offside', 'Passes Blocked'],
+    'gca': ['Squad', '# Player', '90s', 'SCA', 'SCA90', 'SCAPassLive', 'SCAPassDead', 'SCATakeOns',
+            'SCAShot', 'SCAFouled', 'SCADefAct', 'GCA', 'GCA90', 'GCAPassLive', 'GCAPassDead',
+            'GCATakeOns', 'GCAShot', 'GCAFouled', 'GCADefAct'],
+    'defense': ['Squad', '# Player', '90s', 'Tackles', 'Tackles Won', 'Def 3rd Tackles', 'Mid 3rd Tackles',
+                'Att 3rd Tackles', 'Dribblers Tackled', 'Dribbles Challenged', 'Dribbles Challenged%',
+                'Challenges Lost', 'Blocks', 'Shots Blocked', 'Pass Blocked', 'Interceptions', 'Interceptions+Tackles',
+                'Clearances', 'Errors'],
+    'possession': ['Squad', '# Player', 'Possession', '90s', 'Touches', 'Def Pen Touches', 'Def 3rd Touches', 'Mid 3rd Touches',
+                   'Att 3rd Touches', 'Att Pen Touches', 'Live Touches', 'TakeOns Attempted', 'Successful TakeOns',
+                   'Successful TakeOns%', 'TakeOns Tackled', 'TakeOns Tackled %', 'Carries', 'Total Carries Distance',
+                   'Progressive Carries Distance', 'Progressive Carries', 'Carries to Final Third', 'Carries to Pen Area',
+                   'Miscontrols', 'Dispossessed', 'Passes Received', 'Progressive Passes Received'],
+    'playing_time': ['Squad', '# Player', 'Age', 'Matches Played', 'Minutes', 'Minutes per Match', 'Minutes%', '90s',
+                     'Starts', 'Minutes per Start', 'Complete Match', 'Subs', 'Minutes per Subs', 'Unused Subs', 'PPM',
+                     'onG', 'onGA', 'Plus-Minus', 'Plus-Minus/90', 'onxG', 'onxGA', 'xG+/-', 'xG+/-90'],
+    'misc': ['Squad', '# Player', '90s', 'Yellow Cards', 'Red Cards', '2nd Yellow', 'Fouls', 'Fouled',
+             'Offsides', 'Crosses', 'Interceptions', 'Tackles Won', 'Pen Won', 'Pen Conceded', 'Own Goals',
+             'Recoveries', 'Aerial Won', 'Aerial Lost', 'Aerial Won%']
+}
 
 def clean_df(df: pd.DataFrame) -> pd.DataFrame:
     
@@ -25,243 +57,138 @@ def clean_big5_df(df: pd.DataFrame) -> pd.DataFrame:
     df.drop(['Rk', 'Comp'], axis=1, inplace=True)
     return df
 
-def get_for_stats(league: str, season: str, category: str = None) -> pd.DataFrame:
+def get_url(league: str, category: str, season: str) -> str:
     
+    path = CATEGORIES[category]
     if league == 'Big 5':
-        standard = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/stats/squads/{season}-{LEAGUES[league][1]}-Stats')[0]
-        shooting = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/shooting/squads/{season}-{LEAGUES[league][1]}-Stats')[0]
-        passing = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/passing/squads/{season}-{LEAGUES[league][1]}-Stats')[0]
-        pass_type = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/passing_types/squads/{season}-{LEAGUES[league][1]}-Stats')[0]
-        gca = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/gca/squads/{season}-{LEAGUES[league][1]}-Stats')[0]
-        defense = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/defense/squads/{season}-{LEAGUES[league][1]}-Stats')[0]
-        possession = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/possession/squads/{season}-{LEAGUES[league][1]}-Stats')[0]
-        playing_time = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/playingtime/squads/{season}-{LEAGUES[league][1]}-Stats')[0]
-        misc = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/misc/squads/{season}-{LEAGUES[league][1]}-Stats')[0]
-
-        standard, shooting, passing, pass_type, gca, defense, possession, playing_time, misc = (df.pipe(clean_big5_df) for df in [standard, shooting, passing, pass_type, 
-                                                                                                                            gca, defense, possession, playing_time, misc])
-        
-        
-    else:
-        standard = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/stats/{season}-{LEAGUES[league][1]}-Stats')[0]
-        shooting = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/shooting/{season}-{LEAGUES[league][1]}-Stats')[0]
-        passing = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/passing/{season}-{LEAGUES[league][1]}-Stats')[0]
-        pass_type = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/passing_types/{season}-{LEAGUES[league][1]}-Stats')[0]
-        gca = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/gca/{season}-{LEAGUES[league][1]}-Stats')[0]
-        defense = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/defense/{season}-{LEAGUES[league][1]}-Stats')[0]
-        possession = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/possession/{season}-{LEAGUES[league][1]}-Stats')[0]
-        playing_time = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/playingtime/{season}-{LEAGUES[league][1]}-Stats')[0]
-        misc = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/misc/{season}-{LEAGUES[league][1]}-Stats')[0]
-
-        standard, shooting, passing, pass_type, gca, defense, possession, playing_time, misc = (df.pipe(clean_df) for df in [standard, shooting, passing, pass_type, 
-                                                                                                                            gca, defense, possession, playing_time, misc])
-        
-    columns = ['Squad', '# Player', 'Age', 'Possession', 'Matches Played', 'Starts', 'Minutes', '90s', 'Goals',
-               'Assists', 'G+A', 'Non Penalty Goals', 'Penalty Goals', 'Penalty Attempted', 'Yellow Cards',
-               'Red Cards', 'xG', 'npxG', 'xAG', 'npxG+xAG', 'Progressive Carries', 'Progressive Passes', 
-               'Goals/90', 'Assists/90', 'G+A/90', 'Non Penalty Goals/90', 'Non Penalty G+A/90', 'xG/90',
-               'xAG/90', 'xG+xAG/90', 'npxG/90', 'npxG+xAG/90']
-    standard.columns = columns
-
-    columns = ['Squad', '# Player', '90s', 'Goals', 'Shots', 'Shots on Target', 'Shots on Target %', 'Shots/90',
-               'Shots on Target/90', 'Goals/Shot', 'Goals/Shot on Target', 'Average Shot Distance', 'Free Kicks',
-               'Penalty Goals', 'Penalty Attempted', 'xG', 'npxG', 'npxG/Shot', 'Goals - xG', 'Non Penalty Goals - npxG']               
-    shooting.columns = columns
-
-    columns = ['Squad', '# Player', '90s', 'Completed Passes Total', 'Attempted Passes Total', 'Completed Passes Total%', 
-               'Total Passing Distance', 'Progressive Passing Distance', 'Completed Short Passes', 'Attempted Short Passes', 
-               'Completed Short Passes%', 'Completed Medium Passes', 'Attempted Medium Passes', 'Completed Medium Passes%', 
-               'Completed Long Passes', 'Attempted Long Passes', 'Completed Long Passes%', 'Assists', 'xAG', 'xA', 'A-xAG', 
-               'Key Passes', 'Passes Into Final 3rd', 'Passes Into Pen Area', 'Crossing Into Pen Area', 'Progressive Passes']
-    passing.columns = columns
-
-    columns = ['Squad', '# Player', '90s', 'Attempted Passes Total', 'Live Ball Passes', 'Dead Ball Passes', 'Free Kicks Passes',
-               'Through Balls', 'Switches', 'Crosses', 'Throw Ins', 'Corner Kicks', 'Inswinging Corner', 'Outswinging Corner',
-               'Straight Corner', 'Completed Passes Total', 'Passes Offside', 'Passes Blocked']
-    pass_type.columns = columns
-
-    columns = ['Squad', '# Player', '90s', 'SCA', 'SCA90', 'SCAPassLive', 'SCAPassDead', 'SCATakeOns',
-               'SCAShot', 'SCAFouled', 'SCADefAct', 'GCA', 'GCA90', 'GCAPassLive', 'GCAPassDead', 
-               'GCATakeOns', 'GCAShot', 'GCAFouled', 'GCADefAct']
-    gca.columns = columns
-
-    columns = ['Squad', '# Player', '90s', 'Tackles', 'Tackles Won', 'Def 3rd Tackles', 'Mid 3rd Tackles',
-               'Att 3rd Tackles', 'Dribblers Tackled', 'Dribbles Challenged', 'Dribbles Challenged%', 
-               'Challenges Lost', 'Blocks', 'Shots Blocked', 'Pass Blocked', 'Interceptions', 'Interceptions+Tackles', 
-               'Clearances', 'Errors']
-    defense.columns = columns
-
-    columns = ['Squad', '# Player', 'Possession', '90s', 'Touches', 'Def Pen Touches', 'Def 3rd Touches', 'Mid 3rd Touches',
-               'Att 3rd Touches', 'Att Pen Touches', 'Live Touches', 'TakeOns Attempted', 'Successful TakeOns', 
-               'Successful TakeOns%', 'TakeOns Tackled', 'TakeOns Tackled %', 'Carries', 'Total Carries Distance', 
-               'Progressive Carries Distance', 'Progressive Carries', 'Carries to Final Third', 'Carries to Pen Area', 
-               'Miscontrols', 'Dispossessed', 'Passes Received', 'Progressive Passes Received']
-    possession.columns = columns
-
-    columns = ['Squad', '# Player', 'Age', 'Matches Played', 'Minutes', 'Minutes per Match', 'Minutes%', '90s',
-               'Starts', 'Minutes per Start', 'Complete Match', 'Subs', 'Minutes per Subs', 'Unused Subs', 'PPM', 
-               'onG', 'onGA', 'Plus-Minus', 'Plus-Minus/90', 'onxG', 'onxGA', 'xG+/-', 'xG+/-90']
-    playing_time.columns = columns
-
-    columns = ['Squad', '# Player', '90s', 'Yellow Cards', 'Red Cards', '2nd Yellow', 'Fouls', 'Fouled',
-               'Offsides', 'Crosses', 'Interceptions', 'Tackles Won', 'Pen Won', 'Pen Conceded', 'Own Goals', 
-               'Recoveries', 'Aerial Won', 'Aerial Lost', 'Aerial Won%']
-    misc.columns = columns
-
-    if category == 'standard':
-        return standard
-    elif category == 'shooting':
-        return shooting
-    elif category == 'passing':
-        return passing
-    elif category == 'pass_type':
-        return pass_type
-    elif category == 'gca':
-        return gca
-    elif category == 'defense':
-        return defense
-    elif category == 'possession':
-        return possession
-    elif category == 'playing_time':
-        return playing_time
-    elif category == 'misc':
-        return misc
+        return f'{fetch.BASE_URL}/en/comps/{LEAGUES[league][0]}/{season}/{path}/squads/{season}-{LEAGUES[league][1]}-Stats'
+    return f'{fetch.BASE_URL}/en/comps/{LEAGUES[league][0]}/{season}/{path}/{season}-{LEAGUES[league][1]}-Stats'
+
+def parse_tables(html: str, league: str, category: str) -> tuple:
+    """ Parse both squad tables of a downloaded fbref page with a single read_html call
+
+    Parameters
+    ----------
+    html    : str
+        The page html downloaded from get_url(league, category, season)
+    league  : str
+        League name, one of the keys of LEAGUES
+    category    : str
+        Stats category, one of the keys of COLUMNS
+
+    Returns
+    -------
+    tuple of the squad "for" DataFrame and the squad "opponent" DataFrame
+    """
+
+    clean = clean_big5_df if league == 'Big 5' else clean_df
+    with instrument.stage('parse', league=league, category=category, entity='squad') as event:
+        tables = pd.read_html(StringIO(html))
+        squad, opponent = tables[0].pipe(clean), tables[1].pipe(clean)
+        squad.columns = COLUMNS[category]
+        opponent.columns = COLUMNS[category]
+        event['rows'] = len(squad) + len(opponent)
+    return squad, opponent
+
+def get_squad_stats(league: str, season: str, categories: list = None, max_workers: int = None,
+                    job_dir: str = None) -> dict:
+    """ Get squad "for" and "opponent" tables, downloading and parsing each page only once
+
+    Parameters
+    ----------
+    league  : str
+        League name, one of the keys of LEAGUES
+    season  : str
+        Season to be scrapped (ex: 2022-2023)
+    categories  : list
+        Stats categories to get, only the pages of these categories are downloaded.
+        Default to every category in COLUMNS
+    max_workers : int
+        Maximum number of concurrent downloads, default to fetch.MAX_WORKERS
+    job_dir : str
+        Save the tables of every page to this directory as soon as they are extracted (see checkpoint)
+        and only download the missing pages when the call is repeated. A failed download is raised
+        after the other tables are saved
+
+    Returns
+    -------
+    dict of category name to tuple of squad "for" and squad "opponent" DataFrames
+    """
+
+    categories = list(categories or COLUMNS)
+    tables = {}
+    for category in categories if job_dir else []:
+        pair = (checkpoint.load(job_dir, 'squad_for', league, season, category),
+                checkpoint.load(job_dir, 'squad_opponent', league, season, category))
+        if pair[0] is not None and pair[1] is not None:
+            tables[category] = pair
+
+    missing = [category for category in categories if category not in tables]
+    pages = fetch.get_pages([get_url(league, category, season) for category in missing], max_workers,
+                            return_exceptions=job_dir is not None)
+    for category, html in zip(missing, pages):
+        if isinstance(html, Exception):
+            continue
+        tables[category] = parse_tables(html, league, category)
+        if job_dir:
+            checkpoint.save(tables[category][0], job_dir, 'squad_for', league, season, category)
+            checkpoint.save(tables[category][1], job_dir, 'squad_opponent', league, season, category)
+    checkpoint.raise_failed(pages)
+    return {category: tables[category] for category in categories}
+
+def combine_squad_df(tables: dict) -> pd.DataFrame:
     
-    df = pd.merge(standard, shooting, on='Squad', suffixes=('', '_remove')) \
-        .merge(passing, on='Squad', suffixes=('', '_remove')) \
-        .merge(pass_type, on='Squad', suffixes=('', '_remove')) \
-        .merge(gca, on='Squad', suffixes=('', '_remove')) \
-        .merge(defense, on='Squad', suffixes=('', '_remove')) \
-        .merge(possession, on='Squad', suffixes=('', '_remove')) \
-        .merge(misc, on='Squad', suffixes=('', '_remove')) \
-        .merge(playing_time, on='Squad', suffixes=('', '_remove'))
+    order = ['standard', 'shooting', 'passing', 'pass_type', 'gca', 'defense', 'possession', 'misc', 'playing_time']
+    return join.join_tables([tables[category] for category in order], join.SQUAD_KEYS,
+                            drop=['# Player', 'Matches Played', 'Minutes', 'Starts'])
+
+def squad_for_df(tables: dict) -> pd.DataFrame:
     
-    df.drop([i for i in df.columns if 'remove' in i],
-               axis=1, inplace=True)
-    df.drop(['# Player', 'Matches Played', 'Minutes', 'Starts'], axis=1, inplace=True)
+    df = combine_squad_df(tables)
 
     new_columns = ['Squad ' + col if col != 'Squad' else col for col in df.columns ]
     df.columns = new_columns
     
     return df
 
-def get_opponent_stats(league: str, season: str, category: str = None) -> pd.DataFrame:
-
-    if league == 'Big 5':
-        standard = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/stats/squads/{season}-{LEAGUES[league][1]}-Stats')[1]
-        shooting = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/shooting/squads/{season}-{LEAGUES[league][1]}-Stats')[1]
-        passing = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/passing/squads/{season}-{LEAGUES[league][1]}-Stats')[1]
-        pass_type = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/passing_types/squads/{season}-{LEAGUES[league][1]}-Stats')[1]
-        gca = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/gca/squads/{season}-{LEAGUES[league][1]}-Stats')[1]
-        defense = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/defense/squads/{season}-{LEAGUES[league][1]}-Stats')[1]
-        possession = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/possession/squads/{season}-{LEAGUES[league][1]}-Stats')[1]
-        playing_time = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/playingtime/squads/{season}-{LEAGUES[league][1]}-Stats')[1]
-        misc = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/misc/squads/{season}-{LEAGUES[league][1]}-Stats')[1]
-
-        standard, shooting, passing, pass_type, gca, defense, possession, playing_time, misc = (df.pipe(clean_big5_df) for df in [standard, shooting, passing, pass_type, 
-                                                                                                                            gca, defense, possession, playing_time, misc])
+def squad_opponent_df(tables: dict) -> pd.DataFrame:
     
-    else:
-        standard = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/stats/{season}-{LEAGUES[league][1]}-Stats')[1]
-        shooting = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/shooting/{season}-{LEAGUES[league][1]}-Stats')[1]
-        passing = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/passing/{season}-{LEAGUES[league][1]}-Stats')[1]
-        pass_type = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/passing_types/{season}-{LEAGUES[league][1]}-Stats')[1]
-        gca = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/gca/{season}-{LEAGUES[league][1]}-Stats')[1]
-        defense = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/defense/{season}-{LEAGUES[league][1]}-Stats')[1]
-        possession = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/possession/{season}-{LEAGUES[league][1]}-Stats')[1]
-        playing_time = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/playingtime/{season}-{LEAGUES[league][1]}-Stats')[1]
-        misc = pd.read_html(f'https://fbref.com/en/comps/{LEAGUES[league][0]}/{season}/misc/{season}-{LEAGUES[league][1]}-Stats')[1]
-
-        standard, shooting, passing, pass_type, gca, defense, possession, playing_time, misc = (df.pipe(clean_df) for df in [standard, shooting, passing, pass_type, 
-                                                                                                                            gca, defense, possession, playing_time, misc])
-        
-    columns = ['Squad', '# Player', 'Age', 'Possession', 'Matches Played', 'Starts', 'Minutes', '90s', 'Goals',
-               'Assists', 'G+A', 'Non Penalty Goals', 'Penalty Goals', 'Penalty Attempted', 'Yellow Cards',
-               'Red Cards', 'xG', 'npxG', 'xAG', 'npxG+xAG', 'Progressive Carries', 'Progressive Passes', 
-               'Goals/90', 'Assists/90', 'G+A/90', 'Non Penalty Goals/90', 'Non Penalty G+A/90', 'xG/90',
-               'xAG/90', 'xG+xAG/90', 'npxG/90', 'npxG+xAG/90']
-    standard.columns = columns
-
-    columns = ['Squad', '# Player', '90s', 'Goals', 'Shots', 'Shots on Target', 'Shots on Target %', 'Shots/90',
-               'Shots on Target/90', 'Goals/Shot', 'Goals/Shot on Target', 'Average Shot Distance', 'Free Kicks',
-               'Penalty Goals', 'Penalty Attempted', 'xG', 'npxG', 'npxG/Shot', 'Goals - xG', 'Non Penalty Goals - npxG']               
-    shooting.columns = columns
-
-    columns = ['Squad', '# Player', '90s', 'Completed Passes Total', 'Attempted Passes Total', 'Completed Passes Total%', 
-               'Total Passing Distance', 'Progressive Passing Distance', 'Completed Short Passes', 'Attempted Short Passes', 
-               'Completed Short Passes%', 'Completed Medium Passes', 'Attempted Medium Passes', 'Completed Medium Passes%', 
-               'Completed Long Passes', 'Attempted Long Passes', 'Completed Long Passes%', 'Assists', 'xAG', 'xA', 'A-xAG', 
-               'Key Passes', 'Passes Into Final 3rd', 'Passes Into Pen Area', 'Crossing Into Pen Area', 'Progressive Passes']
-    passing.columns = columns
-
-    columns = ['Squad', '# Player', '90s', 'Attempted Passes Total', 'Live Ball Passes', 'Dead Ball Passes', 'Free Kicks Passes',
-               'Through Balls', 'Switches', 'Crosses', 'Throw Ins', 'Corner Kicks', 'Inswinging Corner', 'Outswinging Corner',
-               'Straight Corner', 'Completed Passes Total', 'Passes Offside', 'Passes Blocked']
-    pass_type.columns = columns
-
-    columns = ['Squad', '# Player', '90s', 'SCA', 'SCA90', 'SCAPassLive', 'SCAPassDead', 'SCATakeOns',
-               'SCAShot', 'SCAFouled', 'SCADefAct', 'GCA', 'GCA90', 'GCAPassLive', 'GCAPassDead', 
-               'GCATakeOns', 'GCAShot', 'GCAFouled', 'GCADefAct']
-    gca.columns = columns
-
-    columns = ['Squad', '# Player', '90s', 'Tackles', 'Tackles Won', 'Def 3rd Tackles', 'Mid 3rd Tackles',
-               'Att 3rd Tackles', 'Dribblers Tackled', 'Dribbles Challenged', 'Dribbles Challenged%', 
-               'Challenges Lost', 'Blocks', 'Shots Blocked', 'Pass Blocked', 'Interceptions', 'Interceptions+Tackles', 
-               'Clearances', 'Errors']
-    defense.columns = columns
-
-    columns = ['Squad', '# Player', 'Possession', '90s', 'Touches', 'Def Pen Touches', 'Def 3rd Touches', 'Mid 3rd Touches',
-               'Att 3rd Touches', 'Att Pen Touches', 'Live Touches', 'TakeOns Attempted', 'Successful TakeOns', 
-               'Successful TakeOns%', 'TakeOns Tackled', 'TakeOns Tackled %', 'Carries', 'Total Carries Distance', 
-               'Progressive Carries Distance', 'Progressive Carries', 'Carries to Final Third', 'Carries to Pen Area', 
-               'Miscontrols', 'Dispossessed', 'Passes Received', 'Progressive Passes Received']
-    possession.columns = columns
-
-    columns = ['Squad', '# Player', 'Age', 'Matches Played', 'Minutes', 'Minutes per Match', 'Minutes%', '90s',
-               'Starts', 'Minutes per Start', 'Complete Match', 'Subs', 'Minutes per Subs', 'Unused Subs', 'PPM', 
-               'onG', 'onGA', 'Plus-Minus', 'Plus-Minus/90', 'onxG', 'onxGA', 'xG+/-', 'xG+/-90']
-    playing_time.columns = columns
-
-    columns = ['Squad', '# Player', '90s', 'Yellow Cards', 'Red Cards', '2nd Yellow', 'Fouls', 'Fouled',
-               'Offsides', 'Crosses', 'Interceptions', 'Tackles Won', 'Pen Won', 'Pen Conceded', 'Own Goals', 
-               'Recoveries', 'Aerial Won', 'Aerial Lost', 'Aerial Won%']
-    misc.columns = columns
-
-    if category == 'standard':
-        return standard
-    elif category == 'shooting':
-        return shooting
-    elif category == 'passing':
-        return passing
-    elif category == 'pass_type':
-        return pass_type
-    elif category == 'gca':
-        return gca
-    elif category == 'defense':
-        return defense
-    elif category == 'possession':
-        return possession
-    elif category == 'playing_time':
-        return playing_time
-    elif category == 'misc':
-        return misc
-    
-    df = pd.merge(standard, shooting, on='Squad', suffixes=('', '_remove')) \
-        .merge(passing, on='Squad', suffixes=('', '_remove')) \
-        .merge(pass_type, on='Squad', suffixes=('', '_remove')) \
-        .merge(gca, on='Squad', suffixes=('', '_remove')) \
-        .merge(defense, on='Squad', suffixes=('', '_remove')) \
-        .merge(possession, on='Squad', suffixes=('', '_remove')) \
-        .merge(misc, on='Squad', suffixes=('', '_remove')) \
-        .merge(playing_time, on='Squad', suffixes=('', '_remove'))
+    df = combine_squad_df(tables)
     
-    df['Squad'] = df['Squad'].apply(lambda x: ' '.join(x.split(' ')[1:]))
-
-    df.drop([i for i in df.columns if 'remove' in i],
-               axis=1, inplace=True)
-    df.drop(['# Player', 'Matches Played', 'Minutes', 'Starts'], axis=1, inplace=True)
+    # opponent tables name the squads "vs <squad>"
+    df['Squad'] = df['Squad'].str.partition(' ')[2]
 
     new_columns = ['Opponent ' + col if col != 'Squad' else col for col in df.columns]
     df.columns = new_columns
     
-    return df
\ No newline at end of file
+    return df
+
+@memo.memoize()
+def get_for_stats(league: str, season: str, category: str = None, max_workers: int = None,
+                  players: pd.DataFrame = None, job_dir: str = None) -> pd.DataFrame:
+    # with the combined player DataFrame of the season most columns are rolled up instead of scraped
+    if players is not None and category is None:
+        from . import rollup
+        return rollup.get_for_stats(league, season, players, max_workers, job_dir)
+
+    if category in COLUMNS:
+        return get_squad_stats(league, season, [category], max_workers, job_dir)[category][0]
+
+    with instrument.stage('get_for_stats', league=league, season=season) as event:
+        stats = get_squad_stats(league, season, max_workers=max_workers, job_dir=job_dir)
+        df = squad_for_df({name: tables[0] for name, tables in stats.items()})
+        event['rows'] = len(df)
+    return df
+
+@memo.memoize()
+def get_opponent_stats(league: str, season: str, category: str = None, max_workers: int = None,
+                       job_dir: str = None) -> pd.DataFrame:
+
+    if category in COLUMNS:
+        return get_squad_stats(league, season, [category], max_workers, job_dir)[category][1]
+
+    with instrument.stage('get_opponent_stats', league=league, season=season) as event:
+        stats = get_squad_stats(league, season, max_workers=max_workers, job_dir=job_dir)
+        df = squad_opponent_df({name: tables[1] for name, tables in stats.items()})
+        event['rows'] = len(df)
+    return df
@@ -0,0 +1,220 @@
+import os
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+# Root directory of the season store, override with FBREF_STORE_DIR
+STORE_DIR = os.environ.get('FBREF_STORE_DIR', os.path.join(os.path.expanduser('~'), 'fbref-data'))
+
+# 'parquet' for compressed files, 'feather' for uncompressed files which can be memory mapped without copy
+FORMAT = 'parquet'
+
+# player: get_big5_combined / combine_df, squad_for: get_for_stats, squad_opponent: get_opponent_stats
+ENTITIES = ('player', 'squad_for', 'squad_opponent')
+
+EXTENSIONS = {'parquet': '.parquet', 'feather': '.feather'}
+
+# partition values are always read as strings, seasons like 2019 would be read as integers otherwise
+PARTITIONING = ds.partitioning(pa.schema([('league', pa.string()), ('season', pa.string())]), flavor='hive')
+
+def season_range(start: str, end: str) -> list:
+    """ List the seasons between two seasons, both included
+
+    Parameters
+    ----------
+    start   : str
+        First season (ex: 2019-2020 or 2019)
+    end : str
+        Last season (ex: 2023-2024 or 2023)
+
+    Returns
+    -------
+    list of seasons in the same format as start
+    """
+
+    first, last = int(start[:4]), int(end[:4])
+    if '-' in start:
+        return [f'{year}-{year + 1}' for year in range(first, last + 1)]
+    return [str(year) for year in range(first, last + 1)]
+
+def partition_path(entity: str, league: str, season: str, root: str = None) -> str:
+    """ Get the directory of a league/season partition (hive layout, values are url encoded) """
+
+    root = root or STORE_DIR
+    return os.path.join(root, entity, f'league={quote(league, safe="")}', f'season={quote(season, safe="")}')
+
+def write(df: pd.DataFrame, entity: str, league: str, season: str, root: str = None, format: str = None) -> str:
+    """ Write a season DataFrame to the store, replacing the partition if it already exists
+
+    Parameters
+    ----------
+    df  : pd.DataFrame
+        DataFrame to be stored (ex: output of get_big5_combined or get_for_stats)
+    entity  : str
+        Kind of data, one of ENTITIES
+    league  : str
+        League name, one of the keys of LEAGUES
+    season  : str
+        Season of the data (ex: 2022-2023)
+    root    : str
+        Root directory of the store, default to STORE_DIR
+    format  : str
+        'parquet' or 'feather', default to the format of the entity or FORMAT for a new entity
+
+    Returns
+    -------
+    path of the written file
+
+    Raises
+    ------
+    ValueError when the other partitions of the entity are stored in another format, an entity is
+    read as a single dataset of one format
+    """
+
+    folder = partition_path(entity, league, season, root)
+    existing = _formats(os.path.join(root or STORE_DIR, entity), skip=folder)
+    if format is None:
+        format = existing.pop() if existing else FORMAT
+    elif existing - {format}:
+        raise ValueError(f'{entity} is stored as {", ".join(sorted(existing))}, can not write {format}')
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, 'part-0' + EXTENSIONS[format])
+    tmp = f'{path}.{os.getpid()}.tmp'
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if format == 'feather':
+        feather.write_feather(table, tmp, compression='uncompressed')
+    else:
+        pq.write_table(table, tmp)
+    os.replace(tmp, path)
+
+    # a partition holds a single file, remove the one written with the other format
+    for other, extension in EXTENSIONS.items():
+        stale = os.path.join(folder, 'part-0' + extension)
+        if other != format and os.path.exists(stale):
+            os.remove(stale)
+    return path
+
+def partitions(entity: str, root: str = None) -> list:
+    """ List the (league, season) partitions stored for an entity """
+
+    root = root or STORE_DIR
+    folder = os.path.join(root, entity)
+    if not os.path.isdir(folder):
+        return []
+
+    dataset = ds.dataset(folder, partitioning=PARTITIONING, format=_format_of(folder))
+    values = set()
+    for fragment in dataset.get_fragments():
+        keys = ds.get_partition_keys(fragment.partition_expression)
+        values.add((keys['league'], keys['season']))
+    return sorted(values)
+
+def _formats(folder: str, skip: str = None) -> set:
+    """ Formats of the files under folder, the files of the skip folder are left out """
+
+    formats = set()
+    for path, _, files in os.walk(folder):
+        if skip is not None and os.path.abspath(path) == os.path.abspath(skip):
+            continue
+        formats.update(format for name in files for format, extension in EXTENSIONS.items() if name.endswith(extension))
+    return formats
+
+def _format_of(folder: str) -> str:
+    for _, _, files in os.walk(folder):
+        for name in files:
+            if name.endswith('.feather'):
+                return 'feather'
+            if name.endswith('.parquet'):
+                return 'parquet'
+    return FORMAT
+
+def _widest(left: pa.DataType, right: pa.DataType) -> pa.DataType:
+    if left == right:
+        return left
+    if pa.types.is_integer(left) and pa.types.is_integer(right):
+        return left if left.bit_width >= right.bit_width else right
+    if pa.types.is_floating(left) and pa.types.is_floating(right):
+        return left if left.bit_width >= right.bit_width else right
+    if pa.types.is_dictionary(left) and pa.types.is_dictionary(right):
+        return pa.dictionary(pa.int32(), left.value_type)
+    return left
+
+def _unify(schemas: list) -> pa.Schema:
+    # compact dtypes can differ between partitions (ex: int16 in one season, int32 in another)
+    fields = {}
+    for schema in schemas:
+        for field in schema:
+            if field.name in fields:
+                fields[field.name] = fields[field.name].with_type(_widest(fields[field.name].type, field.type))
+            else:
+                fields[field.name] = field
+    return pa.schema(list(fields.values()))
+
+def read(entity: str, leagues: list = None, seasons: list = None, columns: list = None, filters=None,
+         root: str = None, memory_map: bool = True) -> pd.DataFrame:
+    """ Read stored seasons, only the requested partitions, columns and rows are loaded
+
+    Parameters
+    ----------
+    entity  : str
+        Kind of data, one of ENTITIES
+    leagues : list
+        Leagues to read, default to every stored league
+    seasons : list
+        Seasons to read, default to every stored season (see season_range)
+    columns : list
+        Columns to read, default to every column. Add 'league' and 'season' to get the partition values
+    filters : list or pyarrow.dataset.Expression
+        Row filter pushed down to the files, either an expression or a list of
+        (column, operator, value) tuples (ex: [('Minutes', '>=', 900)])
+    root    : str
+        Root directory of the store, default to STORE_DIR
+    memory_map  : bool
+        Memory map the files instead of reading them into memory
+
+    Returns
+    -------
+    DataFrame of the matching rows and columns
+    """
+
+    root = root or STORE_DIR
+    folder = os.path.join(root, entity)
+    if not os.path.isdir(folder):
+        raise FileNotFoundError(f'nothing stored for {entity} in {root}')
+
+    partition = None
+    if leagues is not None:
+        partition = ds.field('league').isin(list(leagues))
+    if seasons is not None:
+        condition = ds.field('season').isin(list(seasons))
+        partition = condition if partition is None else partition & condition
+    expression = partition
+    if filters is not None:
+        expression = filters if isinstance(filters, ds.Expression) else pq.filters_to_expression(filters)
+        expression = expression if partition is None else expression & partition
+
+    filesystem = pafs.LocalFileSystem(use_mmap=memory_map)
+    format = _format_of(folder)
+    dataset = ds.dataset(folder, format=format, partitioning=PARTITIONING, filesystem=filesystem)
+    # only the footers of the requested partitions are opened, the others are pruned on their path
+    fragments = dataset.get_fragments() if partition is None else dataset.get_fragments(filter=partition)
+    schema = _unify([fragment.physical_schema for fragment in fragments] + [dataset.schema])
+    dataset = ds.dataset(folder, schema=schema, format=format, partitioning=PARTITIONING, filesystem=filesystem)
+
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+def delete(entity: str, league: str, season: str, root: str = None):
+    """ Remove a stored league/season partition """
+
+    folder = partition_path(entity, league, season, root)
+    if not os.path.isdir(folder):
+        return
+    for name in os.listdir(folder):
+        os.remove(os.path.join(folder, name))
+    os.rmdir(folder)
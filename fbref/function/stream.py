@@ -0,0 +1,155 @@
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from . import extract, fetch, player, schema
+
+# Number of rows per chunk yielded by iter_chunks
+CHUNK_SIZE = 1024
+
+_records = {}
+
+def field_name(column: str) -> str:
+    """ Python identifier of a column, used as record field (ex: Goals/90 is goals_90, 2nd Yellow is n2nd_yellow) """
+
+    name = column.replace('+/-', ' plus minus ').replace('+', ' plus ').replace('%', ' pct').replace('#', ' number ')
+    name = re.sub(r'\W+', '_', name).strip('_').lower()
+    return 'n' + name if name[0].isdigit() else name
+
+def stats_columns(category: str) -> list:
+    """ Columns of a category, in the order of parse_stats """
+
+    columns = list(player.COLUMNS[category])
+    columns.insert(0, 'Rk')
+    columns.insert(5, 'Comp')
+    columns.insert(2, 'Player ID')
+    return columns
+
+def record_type(category: str) -> type:
+    """ Get the namedtuple of a category, its columns attribute maps the fields back to the column names """
+
+    if category not in _records:
+        columns = stats_columns(category)
+        record = namedtuple(f'{category.title().replace("_", "")}Record', [field_name(col) for col in columns])
+        record.columns = tuple(columns)
+        _records[category] = record
+    return _records[category]
+
+def _converter(column: str):
+    kind = schema.column_type(column)
+    if kind == 'int':
+        if column == 'Age':
+            # current season ages are given as years-days (ex: 25-123)
+            return lambda text: int(text.replace(',', '').partition('-')[0] or 0)
+        return lambda text: int(text.replace(',', '') or 0)
+    if kind == 'float':
+        return lambda text: float(text.replace(',', '') or 0)
+    return str
+
+def parse_records(html: str, league: str, category: str):
+    """ Parse individual stats from downloaded fbref html one row at a time
+
+    Parameters
+    ----------
+    html    : str
+        The page html downloaded from player.get_url(league, category, season)
+    league  : str
+        League name, one of the keys of LEAGUES
+    category    : str
+        Stats category, one of the keys of player.COLUMNS
+
+    Returns
+    -------
+    generator of record_type(category) with the values casted like player.cast_types, empty cells are 0
+    """
+
+    record = record_type(category)
+    header, rows = extract.stream_table(html, player.TABLE_IDS[category])
+    big5 = league == 'Big 5'
+
+    names = list(player.COLUMNS[category])
+    if big5:
+        names.insert(0, 'Rk')
+        names.insert(5, 'Comp')
+    stats = {col: player.DATA_STATS.get(col) for col in names}
+    missing = [col for col, stat in stats.items() if stat not in header]
+    if missing:
+        raise ValueError(f'table {player.TABLE_IDS[category]} has no {", ".join(missing)} column')
+    id_stat = stats.get('Player', 'player') + '_id'
+
+    plan = []
+    for col in record.columns:
+        if col == 'Player ID':
+            plan.append((str, lambda row, number: row.get(id_stat, '')))
+        elif col == 'Rk' and not big5:
+            plan.append((int, lambda row, number: number))
+        elif col == 'Comp':
+            # Big 5 competitions start with the country code (ex: eng Premier League)
+            plan.append((str, lambda row, number: row.get(stats['Comp'], '').partition(' ')[2] if big5 else league))
+        else:
+            plan.append((_converter(col), lambda row, number, stat=stats.get(col): row.get(stat, '')))
+
+    for number, row in enumerate(rows, 1):
+        yield record(*[convert(value(row, number)) for convert, value in plan])
+
+def iter_stats(league: str, category: str, season: str):
+    """ Iterate over the individual stats of a league, category and season without building a DataFrame
+
+    Parameters
+    ----------
+    league  : str
+        League name, one of the keys of LEAGUES
+    category    : str
+        Stats category, one of the keys of player.COLUMNS
+    season  : str
+        Season to be scrapped (ex: 2022-2023)
+
+    Returns
+    -------
+    generator of typed records, see parse_records
+    """
+
+    return parse_records(fetch.get_page(player.get_url(league, category, season)), league, category)
+
+def _chunk(rows: list, record: type, format: str):
+    values = dict(zip(record.columns, zip(*rows)))
+    if format == 'arrow':
+        import pyarrow as pa
+
+        types = {'int': pa.int64(), 'float': pa.float64()}
+        return pa.RecordBatch.from_arrays(
+            [pa.array(values[col], type=types.get(schema.column_type(col), pa.string())) for col in record.columns],
+            names=list(record.columns))
+    return {col: np.array(values[col], dtype=schema.DTYPES[schema.column_type(col)]) for col in record.columns}
+
+def iter_chunks(league: str, category: str, season: str, size: int = CHUNK_SIZE, format: str = 'numpy'):
+    """ Iterate over the individual stats in fixed size column chunks, only one chunk is held at a time
+
+    Parameters
+    ----------
+    league  : str
+        League name, one of the keys of LEAGUES
+    category    : str
+        Stats category, one of the keys of player.COLUMNS
+    season  : str
+        Season to be scrapped (ex: 2022-2023)
+    size    : int
+        Rows per chunk, the last chunk can be smaller
+    format  : str
+        'numpy' for dict of column to array, 'arrow' for pyarrow RecordBatch
+
+    Returns
+    -------
+    generator of chunks
+    """
+
+    record = record_type(category)
+    rows = []
+    for row in iter_stats(league, category, season):
+        rows.append(row)
+        if len(rows) == size:
+            yield _chunk(rows, record, format)
+            rows = []
+    if rows:
+        yield _chunk(rows, record, format)
@@ -0,0 +1,51 @@
+import datetime
+import threading
+
+import pytest
+
+from fbref.function import cache
+
+def test_concurrent_writes_of_the_same_url(monkeypatch, tmp_path):
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmp_path))
+    url = 'https://fbref.com/en/comps/23/2022-2023/stats/2022-2023-Eredivisie-Stats'
+    pages = [f'<html>{n}</html>' * 10000 for n in range(8)]
+    errors = []
+
+    def save(text):
+        try:
+            for _ in range(20):
+                cache.save(url, text)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=save, args=(text,)) for text in pages]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert cache.load(url)[0] in pages
+    assert not [path for path in tmp_path.rglob('*.tmp')]
+
+SEASON_URL = 'https://fbref.com/en/comps/23/2025-2026/stats/2025-2026-Eredivisie-Stats'
+
+def timestamp(*date) -> float:
+    return datetime.datetime(*date).timestamp()
+
+@pytest.mark.parametrize('fetched, now, fresh', [
+    # fetched mid season, the season ended since: revalidated like a current season page
+    ((2026, 5, 11), (2026, 10, 18), False),
+    ((2026, 5, 11), (2026, 5, 11, 3), True),
+    # fetched once the season was over: fresh for FINISHED_TTL
+    ((2026, 7, 2), (2026, 10, 18), True),
+    ((2026, 7, 2), (2027, 7, 3), False),
+])
+def test_pages_fetched_mid_season_are_revalidated_after_it_ends(fetched, now, fresh):
+    assert cache.is_fresh(SEASON_URL, {'fetched_at': timestamp(*fetched)}, timestamp(*now)) == fresh
+
+def test_season_end():
+    assert cache.season_end(SEASON_URL) == datetime.date(2026, 7, 1)
+    assert cache.season_end('https://fbref.com/en/comps/22/2024/stats/2024-Major-League-Soccer-Stats') == \
+        datetime.date(2025, 1, 1)
+    assert cache.season_end('https://fbref.com/en/comps/23/stats/Eredivisie-Stats') is None
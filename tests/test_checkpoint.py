@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+import requests
+
+from benchmarks import fixtures
+from fbref.function import checkpoint, fetch, memo, player, squad
+
+LEAGUE, SEASON, PLAYERS = 'Eredivisie', '2022-2023', 60
+
+@pytest.fixture
+def pages(monkeypatch):
+    """ Serve synthetic pages through fetch.get_page, the urls listed in failing raise a connection error """
+
+    monkeypatch.setattr(memo, 'ENABLED', False)
+    html = {player.get_url(LEAGUE, category, SEASON): fixtures.synthetic_page(LEAGUE, category, PLAYERS, seed)
+            for seed, category in enumerate(player.COLUMNS)}
+    served = {'urls': [], 'failing': set()}
+
+    def get_page(url, revalidate=False):
+        served['urls'].append(url)
+        if url in served['failing']:
+            raise requests.ConnectionError(url)
+        return html[url]
+
+    monkeypatch.setattr(fetch, 'get_page', get_page)
+    return served
+
+def test_resume_only_downloads_missing_tables(pages, tmp_path):
+    failing = player.get_url(LEAGUE, 'gca', SEASON)
+    pages['failing'].add(failing)
+    with pytest.raises(requests.ConnectionError):
+        player.get_all_stats(LEAGUE, SEASON, job_dir=str(tmp_path))
+
+    pages['failing'].clear()
+    pages['urls'].clear()
+    resumed = player.get_all_stats(LEAGUE, SEASON, job_dir=str(tmp_path))
+
+    assert pages['urls'] == [failing]
+    expected = {category: player.cast_types(df) for category, df in player.get_all_stats(LEAGUE, SEASON).items()}
+    for category, df in resumed.items():
+        pd.testing.assert_frame_equal(df, expected[category], check_dtype=False)
+
+def test_checkpoints_of_other_options_are_not_reused(pages, tmp_path):
+    player.get_all_stats(LEAGUE, SEASON, compact=True, job_dir=str(tmp_path))
+
+    pages['urls'].clear()
+    full = player.get_all_stats(LEAGUE, SEASON, compact=False, job_dir=str(tmp_path))
+
+    assert len(pages['urls']) == len(player.COLUMNS)
+    assert full['shooting']['xG'].dtype == 'float64'
+    pd.testing.assert_frame_equal(full['shooting'], player.cast_types(player.get_stats(LEAGUE, 'shooting', SEASON)))
+
+def test_memoized_calls_still_write_checkpoints(pages, monkeypatch, tmp_path):
+    monkeypatch.setattr(memo, 'ENABLED', True)
+    memo.clear()
+    try:
+        squad.get_for_stats(LEAGUE, SEASON)
+        squad.get_for_stats(LEAGUE, SEASON, job_dir=str(tmp_path))
+    finally:
+        memo.clear()
+
+    assert checkpoint.load_tables(str(tmp_path), 'squad_for', LEAGUE, SEASON, squad.COLUMNS).keys() == squad.COLUMNS.keys()
@@ -0,0 +1,23 @@
+import requests
+
+from fbref.function import cache, cli, fetch, memo
+
+def test_missing_page_offline_is_a_one_line_error(monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(memo, 'ENABLED', False)
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(cache, 'ENABLED', True)
+    monkeypatch.setattr(cache, 'OFFLINE', True)
+
+    assert cli.main(['stats', 'Eredivisie', 'shooting', '2019-2020']) == 1
+    error = capsys.readouterr().err
+    assert error.startswith('error: ') and error.count('\n') == 1
+
+def test_http_failure_is_a_one_line_error(monkeypatch, capsys):
+    def get_page(url, revalidate=False):
+        raise requests.HTTPError(f'503 Server Error for url: {url}')
+
+    monkeypatch.setattr(memo, 'ENABLED', False)
+    monkeypatch.setattr(fetch, 'get_page', get_page)
+
+    assert cli.main(['stats', 'Eredivisie', 'shooting', '2019-2020']) == 1
+    assert capsys.readouterr().err.startswith('error: 503 Server Error')
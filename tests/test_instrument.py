@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+
+from fbref.function import instrument
+
+MB = 2 ** 20
+
+class ListSink:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event: dict):
+        self.events.append(event)
+
+@pytest.fixture
+def events():
+    sink = instrument.add_sink(ListSink())
+    instrument.enable_profiling(cpu=False, memory=True)
+    try:
+        yield sink.events
+    finally:
+        instrument.disable_profiling()
+        instrument.remove_sink(sink)
+
+def peaks(events: list) -> dict:
+    return {event['stage']: event['peak_bytes'] for event in events}
+
+def test_inner_stage_keeps_the_outer_peak(events):
+    with instrument.stage('outer'):
+        data = bytearray(50 * MB)
+        del data
+        with instrument.stage('inner'):
+            pass
+
+    assert peaks(events)['outer'] >= 50 * MB
+    assert peaks(events)['inner'] < MB
+
+def test_outer_stage_includes_the_inner_peak(events):
+    with instrument.stage('outer'):
+        with instrument.stage('inner'):
+            data = bytearray(20 * MB)
+            del data
+
+    assert peaks(events)['outer'] >= 20 * MB
+    assert peaks(events)['inner'] >= 20 * MB
+
+def test_concurrent_stages_keep_their_peak(events):
+    started, allocated = threading.Event(), threading.Event()
+
+    def other():
+        started.wait()
+        with instrument.stage('other'):
+            pass
+        allocated.set()
+
+    thread = threading.Thread(target=other)
+    thread.start()
+    with instrument.stage('main'):
+        data = bytearray(30 * MB)
+        del data
+        started.set()
+        allocated.wait()
+    thread.join()
+
+    assert peaks(events)['main'] >= 30 * MB
@@ -0,0 +1,55 @@
+import warnings
+
+import pandas as pd
+import pytest
+
+from fbref.function import join
+
+def standard(rows: list, keys: list = join.PLAYER_KEYS) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=[*keys, 'Nation', 'Goals'])
+
+def shooting(rows: list, keys: list = join.PLAYER_KEYS) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=[*keys, 'Nation', 'Shots'])
+
+def test_rows_are_aligned_on_keys_not_position():
+    left = standard([['a', 'x', 'NED', 1], ['b', 'x', 'BRA', 2], ['a', 'y', 'NED', 3]])
+    # another order, and a player only listed in the second table (ex: unused substitute)
+    right = shooting([['a', 'y', 'NED', 30], ['c', 'y', 'ESP', 0], ['b', 'x', 'BRA', 20], ['a', 'x', 'NED', 10]])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        df = join.join_tables([left, right], join.PLAYER_KEYS)
+
+    assert df.columns.tolist() == ['Player ID', 'Squad', 'Nation', 'Goals', 'Shots']
+    assert df[['Player ID', 'Squad', 'Shots']].values.tolist() == [['a', 'x', 10], ['b', 'x', 20], ['a', 'y', 30]]
+
+def test_rows_missing_from_a_table_are_reported():
+    left = standard([['a', 'x', 'NED', 1], ['b', 'x', 'BRA', 2], ['c', 'y', 'ESP', 3]])
+    right = shooting([['c', 'y', 'ESP', 30], ['a', 'x', 'NED', 10]])
+
+    with pytest.warns(UserWarning, match='1 rows of table 0 are missing'):
+        df = join.join_tables([left, right], join.PLAYER_KEYS)
+
+    assert df['Player ID'].tolist() == ['a', 'c']
+
+def test_duplicated_keys_are_reported():
+    keys = join.PLAYER_FALLBACK_KEYS
+    # two players of the same name, squad and birth year can not be told apart without their fbref id
+    left = standard([['Luuk', 'x', 2001, 'NED', 1], ['Luuk', 'x', 2001, 'NED', 2]], keys)
+    right = shooting([['Luuk', 'x', 2001, 'NED', 10]], keys)
+
+    with pytest.warns(UserWarning, match='1 rows of table 0 have the same Player, Squad, Born'):
+        df = join.join_tables([left, right], keys)
+
+    assert len(df) == 1
+
+def test_legacy_tables_are_joined_on_the_fallback_keys():
+    keys = join.PLAYER_FALLBACK_KEYS
+    left = standard([['Luuk', 'x', 2001, 'NED', 1], ['Luuk', 'x', 1995, 'NED', 2], ['Luuk', 'y', 2001, 'NED', 3]], keys)
+    right = shooting([['Luuk', 'y', 2001, 'NED', 30], ['Luuk', 'x', 1995, 'NED', 20], ['Luuk', 'x', 2001, 'NED', 10]],
+                     keys)
+
+    assert join.player_keys(left) == keys
+    df = join.join_tables([left, right], join.player_keys(left))
+
+    assert df[['Born', 'Goals', 'Shots']].values.tolist() == [[2001, 1, 10], [1995, 2, 20], [2001, 3, 30]]
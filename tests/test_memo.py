@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+
+from benchmarks import fixtures
+from fbref.function import fetch, memo, player
+
+@pytest.fixture(autouse=True)
+def memoized(monkeypatch):
+    monkeypatch.setattr(memo, 'ENABLED', True)
+    memo.clear()
+    yield
+    memo.clear()
+
+def table(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({'Goals': range(rows)}, dtype='int64')
+
+def counted(function):
+    calls = []
+
+    def wrapper(*args, **kwargs):
+        calls.append(args)
+        return function(*args, **kwargs)
+
+    wrapper.calls = calls
+    return wrapper
+
+@memo.memoize()
+def season_table(league: str, season: str, rows: int = 1000) -> pd.DataFrame:
+    season_table.calls.append((league, season))
+    return table(rows)
+
+season_table.calls = []
+
+def test_least_recently_used_tables_are_evicted_over_budget(monkeypatch):
+    size = memo._size(table(1000))
+    monkeypatch.setattr(memo, 'BUDGET', 2 * size)
+    season_table.calls.clear()
+
+    season_table('Eredivisie', '2020-2021')
+    season_table('Eredivisie', '2021-2022')
+    season_table('Eredivisie', '2020-2021')
+    season_table('Eredivisie', '2022-2023')
+
+    assert memo.stats()['evictions'] == 1
+    assert memo.stats()['bytes'] == 2 * size
+    # 2021-2022 was the least recently used, 2020-2021 is still memoized
+    season_table('Eredivisie', '2020-2021')
+    season_table('Eredivisie', '2021-2022')
+    assert season_table.calls[-1] == ('Eredivisie', '2021-2022')
+    assert season_table.calls.count(('Eredivisie', '2020-2021')) == 1
+
+def test_tables_over_budget_are_not_memoized(monkeypatch):
+    monkeypatch.setattr(memo, 'BUDGET', memo._size(table(10)))
+
+    season_table('Eredivisie', '2022-2023', rows=1000)
+
+    assert memo.stats()['entries'] == 0
+
+def test_invalidate_drops_one_league_and_season():
+    season_table('Eredivisie', '2021-2022')
+    season_table('Eredivisie', '2022-2023')
+    season_table('Primeira Liga', '2022-2023')
+
+    assert memo.invalidate('Eredivisie', '2022-2023') == 1
+    assert memo.stats()['entries'] == 2
+    assert memo.invalidate(season='2022-2023') == 1
+    assert memo.invalidate('Eredivisie') == 1
+    assert memo.stats() == {**memo.stats(), 'entries': 0, 'bytes': 0}
+
+def test_callers_get_their_own_copy():
+    first = season_table('Eredivisie', '2022-2023')
+    first.loc[0, 'Goals'] = 99
+    first['New'] = 1
+
+    second = season_table('Eredivisie', '2022-2023')
+
+    assert second.loc[0, 'Goals'] == 0
+    assert 'New' not in second.columns
+
+def test_get_stats_memoizes_the_casted_table(monkeypatch):
+    html = fixtures.synthetic_page('Eredivisie', 'shooting', 50)
+    monkeypatch.setattr(fetch, 'get_page', lambda url, *args, **kwargs: html)
+    cast_types = counted(player.cast_types)
+    monkeypatch.setattr(player, 'cast_types', cast_types)
+
+    first = player.get_stats('Eredivisie', 'shooting', '2022-2023', cast=True, compact=True)
+    second = player.get_stats('Eredivisie', 'shooting', '2022-2023', cast=True, compact=True)
+    raw = player.get_stats('Eredivisie', 'shooting', '2022-2023')
+
+    assert len(cast_types.calls) == 1
+    pd.testing.assert_frame_equal(first, second)
+    assert second['Shots'].dtype == 'float32'
+    assert not pd.api.types.is_numeric_dtype(raw['Shots'])
@@ -0,0 +1,57 @@
+import pytest
+
+from benchmarks import fixtures
+from fbref.function import player, stream
+
+SHOOTING = player.TABLE_IDS['shooting']
+
+def swap_columns(html: str, first: str, second: str) -> str:
+    """ Swap two stats of every header and body row, like fbref reordering its columns """
+
+    first, second = player.DATA_STATS[first], player.DATA_STATS[second]
+    return html.replace(f'data-stat="{first}"', 'data-stat="_swap"').replace(
+        f'data-stat="{second}"', f'data-stat="{first}"').replace('data-stat="_swap"', f'data-stat="{second}"')
+
+def test_table_frame_names_columns_from_the_header():
+    html = fixtures.synthetic_page('Eredivisie', 'shooting', 10)
+    df = player.table_frame(html, SHOOTING, player.COLUMNS['shooting'])
+
+    assert list(df.columns[:3]) == ['Player', 'Player ID', 'Nation']
+    assert df['Player'].tolist()[:2] == ['Player 0', 'Player 1']
+
+def test_table_frame_selects_columns_by_data_stat():
+    html = fixtures.synthetic_page('Eredivisie', 'shooting', 10)
+    expected = player.table_frame(html, SHOOTING, player.COLUMNS['shooting'])
+
+    # the cells move with their data-stat, the labels must follow them
+    df = player.table_frame(swap_columns(html, 'Shots', 'Shots on Target'), SHOOTING, player.COLUMNS['shooting'])
+
+    assert df['Shots'].tolist() == expected['Shots on Target'].tolist()
+    assert df['Shots on Target'].tolist() == expected['Shots'].tolist()
+
+def test_table_frame_ignores_added_columns():
+    html = fixtures.synthetic_page('Eredivisie', 'shooting', 10)
+
+    df = player.table_frame(html, SHOOTING, player.COLUMNS['shooting'][:-1])
+
+    assert list(df.columns) == ['Player', 'Player ID', *player.COLUMNS['shooting'][1:-1]]
+
+def test_table_frame_refuses_a_missing_stat():
+    html = fixtures.synthetic_page('Eredivisie', 'shooting', 10).replace('data-stat="shots"', 'data-stat="renamed"')
+
+    with pytest.raises(ValueError, match='Shots'):
+        player.table_frame(html, SHOOTING, player.COLUMNS['shooting'])
+
+def test_parse_records_selects_columns_by_data_stat():
+    html = fixtures.synthetic_page('Eredivisie', 'shooting', 10)
+    expected = list(stream.parse_records(html, 'Eredivisie', 'shooting'))
+
+    records = list(stream.parse_records(swap_columns(html, 'Shots', 'Shots on Target'), 'Eredivisie', 'shooting'))
+
+    assert [record.shots for record in records] == [record.shots_on_target for record in expected]
+
+def test_parse_records_refuses_a_missing_stat():
+    html = fixtures.synthetic_page('Eredivisie', 'shooting', 10).replace('data-stat="shots"', 'data-stat="renamed"')
+
+    with pytest.raises(ValueError, match='Shots'):
+        next(stream.parse_records(html, 'Eredivisie', 'shooting'))
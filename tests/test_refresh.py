@@ -0,0 +1,150 @@
+import re
+
+import pandas as pd
+import pytest
+
+from benchmarks import fixtures
+from fbref.function import fetch, join, pipeline, player, refresh, squad, store
+
+LEAGUE, SEASON, PLAYERS = 'Eredivisie', '2022-2023', 60
+
+def serve(monkeypatch, players: int = PLAYERS, edit: dict = None):
+    """ Answer fetch.get_pages with synthetic pages, edit maps a category to a function changing its html """
+
+    pages = {}
+    for seed, category in enumerate(player.COLUMNS):
+        html = fixtures.synthetic_page(LEAGUE, category, players, seed)
+        pages[player.get_url(LEAGUE, category, SEASON)] = (edit or {}).get(category, lambda text: text)(html)
+    monkeypatch.setattr(fetch, 'get_pages', lambda urls, *args, **kwargs: [pages[url] for url in urls])
+
+def change_shots(html: str) -> str:
+    # Shots belongs to shooting in the combined DataFrame, the first player gets a new value
+    return html.replace('class="right" data-stat="shots">', 'class="right" data-stat="shots">9', 1)
+
+def stored(root) -> pd.DataFrame:
+    return store.read('player', leagues=[LEAGUE], seasons=[SEASON], root=str(root), memory_map=False)
+
+def operations(delta: pd.DataFrame) -> dict:
+    return delta['_op'].value_counts().to_dict() if len(delta) else {}
+
+def frame(rows: list) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=['Player ID', 'Squad', 'Rk', 'Goals'])
+
+def test_diff_reports_changed_added_and_removed_rows():
+    old = frame([['a', 'x', 1, 1.0], ['b', 'x', 2, 2.0], ['c', 'y', 3, 3.0]])
+    new = frame([['a', 'x', 1, 1.0], ['c', 'y', 2, 4.0], ['d', 'y', 3, 5.0]])
+
+    delta = refresh.diff(old, new, join.PLAYER_KEYS)
+
+    assert sorted(delta.loc[delta['_op'] == 'upsert', 'Player ID']) == ['c', 'd']
+    assert list(delta.loc[delta['_op'] == 'delete', 'Player ID']) == ['b']
+
+def test_diff_ignores_renumbered_ranks():
+    old = frame([['a', 'x', 1, 1.0], ['b', 'x', 2, 2.0], ['c', 'y', 3, 3.0]])
+    new = frame([['b', 'x', 1, 2.0], ['c', 'y', 2, 3.0]])
+
+    assert operations(refresh.diff(old, new, join.PLAYER_KEYS)) == {'delete': 1}
+
+def test_diff_treats_missing_values_as_equal():
+    old = frame([['a', 'x', 1, None]])
+
+    assert len(refresh.diff(old, old.copy(), join.PLAYER_KEYS)) == 0
+
+def test_apply_delta_rebuilds_the_new_frame():
+    old = frame([['a', 'x', 1, 1.0], ['b', 'x', 2, 2.0], ['c', 'y', 3, 3.0]])
+    new = frame([['a', 'x', 1, 1.0], ['c', 'y', 2, 4.0], ['d', 'y', 3, 5.0]])
+
+    applied = refresh.apply_delta(old, refresh.diff(old, new, join.PLAYER_KEYS), join.PLAYER_KEYS)
+
+    applied = applied.sort_values('Player ID', ignore_index=True)[new.columns]
+    pd.testing.assert_frame_equal(applied.drop(columns='Rk'), new.drop(columns='Rk'), check_dtype=False)
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_refresh_without_page_change_is_empty(monkeypatch, tmp_path, compact):
+    serve(monkeypatch)
+    assert pipeline.run_job(LEAGUE, SEASON, compact=compact, root=str(tmp_path))['status'] == 'ok'
+
+    # no refresh state yet: every table is parsed again and compared with the stored season
+    assert operations(refresh.refresh_players(LEAGUE, SEASON, str(tmp_path), compact)) == {}
+    assert operations(refresh.refresh_players(LEAGUE, SEASON, str(tmp_path), compact)) == {}
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_refresh_patches_changed_table(monkeypatch, tmp_path, compact):
+    serve(monkeypatch)
+    pipeline.run_job(LEAGUE, SEASON, compact=compact, root=str(tmp_path))
+    refresh.refresh_players(LEAGUE, SEASON, str(tmp_path), compact)
+    before = stored(tmp_path)
+
+    serve(monkeypatch, edit={'shooting': change_shots})
+    delta = refresh.refresh_players(LEAGUE, SEASON, str(tmp_path), compact)
+
+    assert operations(delta) == {'upsert': 1}
+    after = stored(tmp_path)
+    assert (after.dtypes == before.dtypes).all()
+    changed = after['Shots'] != before['Shots']
+    assert changed.sum() == 1
+    assert after.loc[changed, 'Player ID'].tolist() == delta['Player ID'].tolist()
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_refresh_rebuilds_when_a_player_is_removed(monkeypatch, tmp_path, compact):
+    serve(monkeypatch)
+    pipeline.run_job(LEAGUE, SEASON, compact=compact, root=str(tmp_path))
+    refresh.refresh_players(LEAGUE, SEASON, str(tmp_path), compact)
+
+    # every page loses its last player, the other players move up one rank
+    serve(monkeypatch, players=PLAYERS - 1)
+    delta = refresh.refresh_players(LEAGUE, SEASON, str(tmp_path), compact)
+
+    assert operations(delta) == {'delete': 1}
+    assert len(stored(tmp_path)) == PLAYERS - 1
+
+def test_refresh_rewrites_per_90(monkeypatch, tmp_path):
+    serve(monkeypatch)
+    pipeline.run_job(LEAGUE, SEASON, per_90=True, root=str(tmp_path))
+    refresh.refresh_players(LEAGUE, SEASON, str(tmp_path))
+
+    serve(monkeypatch, edit={'shooting': change_shots})
+    refresh.refresh_players(LEAGUE, SEASON, str(tmp_path))
+
+    per_90 = store.read('player_per90', leagues=[LEAGUE], seasons=[SEASON], root=str(tmp_path), memory_map=False)
+    expected = player.get_per_90(stored(tmp_path).drop(columns=['league', 'season'], errors='ignore'))
+    pd.testing.assert_series_equal(per_90['Shots'], expected['Shots'], check_dtype=False)
+
+def change_squad(html: str) -> str:
+    # the third column (Age on the standard page) of the first squad of the "for" table gets a new value,
+    # the opponent table names it "vs Squad 0"
+    return re.sub(r'(<td>Squad 0</td><td>[^<]*</td><td>)', r'\g<1>1', html, count=1)
+
+def count_parses(monkeypatch) -> list:
+    parsed = []
+    parse_tables = squad.parse_tables
+
+    def parse(html, league, category):
+        parsed.append(category)
+        return parse_tables(html, league, category)
+
+    monkeypatch.setattr(squad, 'parse_tables', parse)
+    return parsed
+
+def test_refresh_squads_only_parses_changed_pages(monkeypatch, tmp_path):
+    serve(monkeypatch)
+    parsed = count_parses(monkeypatch)
+    deltas = refresh.refresh_squads(LEAGUE, SEASON, root=str(tmp_path))
+    assert sorted(parsed) == sorted(squad.COLUMNS)
+    assert operations(deltas['squad_for']) == {'upsert': 18}
+    before = store.read('squad_for', root=str(tmp_path), memory_map=False)
+
+    parsed.clear()
+    # a change of the player table hidden in the same page is not a squad change
+    serve(monkeypatch, edit={'standard': change_squad, 'shooting': change_shots})
+    deltas = refresh.refresh_squads(LEAGUE, SEASON, root=str(tmp_path))
+
+    assert parsed == ['standard']
+    assert operations(deltas['squad_for']) == {'upsert': 1}
+    assert operations(deltas['squad_opponent']) == {}
+    after = store.read('squad_for', root=str(tmp_path), memory_map=False)
+    assert (after.drop(columns='Squad Age') == before.drop(columns='Squad Age')).all().all()
+
+    parsed.clear()
+    assert refresh.refresh_squads(LEAGUE, SEASON, root=str(tmp_path)) == {}
+    assert parsed == []
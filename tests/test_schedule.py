@@ -0,0 +1,147 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from fbref.function import schedule
+
+CURRENT_URL = 'https://fbref.com/en/comps/23/stats/Eredivisie-Stats'
+BACKFILL_URL = 'https://fbref.com/en/comps/23/2020-2021/stats/2020-2021-Eredivisie-Stats'
+
+class Clock:
+    """ Stand-in for the time module, sleeping only moves the clock """
+
+    def __init__(self):
+        self.now = 1_000_000.0
+        self.sleeps = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class Condition:
+    """ Single thread stand-in for the scheduler condition, waiting moves the clock """
+
+    def __init__(self, clock: Clock):
+        self.clock = clock
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def wait(self, timeout: float = None):
+        self.clock.now += timeout or 0
+
+    def notify_all(self):
+        pass
+
+class Response:
+    def __init__(self, status_code: int, headers: dict = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def budget(monkeypatch, tmp_path):
+    monkeypatch.setattr(schedule, 'RATE_FILE', str(tmp_path / 'rate.json'))
+    monkeypatch.setattr(schedule, 'REQUESTS_PER_MINUTE', 60)
+    monkeypatch.setattr(schedule, 'BURST', 2)
+
+@pytest.fixture
+def clock(monkeypatch, budget):
+    clock = Clock()
+    monkeypatch.setattr(schedule, 'time', clock)
+    monkeypatch.setattr(schedule, '_condition', Condition(clock))
+    # the longest backoff of every attempt
+    monkeypatch.setattr(schedule.random, 'uniform', lambda low, high: high)
+    return clock
+
+def sender(clock: Clock, answers: list):
+    """ Answer the requests in order, an exception is raised instead of answered """
+
+    sent = []
+
+    def send(url, **kwargs):
+        sent.append(clock.now)
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    send.sent = sent
+    return send
+
+def test_bucket_sends_a_burst_then_paces_requests(clock):
+    start = clock.now
+    times = []
+    for _ in range(4):
+        schedule.acquire()
+        times.append(clock.now - start)
+
+    assert times == pytest.approx([0, 0, 1, 2])
+
+def test_block_stops_every_request(clock):
+    start = clock.now
+    schedule.block(30)
+    schedule.acquire()
+
+    assert clock.now - start == pytest.approx(30)
+
+def test_throttled_request_waits_for_retry_after(clock):
+    send = sender(clock, [Response(429, {'Retry-After': '45'}), Response(200)])
+
+    response = schedule.request(send, CURRENT_URL)
+
+    assert response.status_code == 200
+    assert send.sent[1] - send.sent[0] == pytest.approx(45)
+    # the wait comes from the shared block, not from a backoff sleep
+    assert clock.sleeps == []
+
+def test_failed_requests_back_off_exponentially(clock, monkeypatch):
+    monkeypatch.setattr(schedule, 'REQUESTS_PER_MINUTE', 0)
+    send = sender(clock, [requests.ConnectionError(), Response(503), requests.Timeout(), Response(200)])
+
+    assert schedule.request(send, CURRENT_URL).status_code == 200
+    assert clock.sleeps == [schedule.BACKOFF, schedule.BACKOFF * 2, schedule.BACKOFF * 4]
+
+def test_request_gives_up_after_max_retries(clock, monkeypatch):
+    monkeypatch.setattr(schedule, 'REQUESTS_PER_MINUTE', 0)
+    monkeypatch.setattr(schedule, 'MAX_RETRIES', 2)
+
+    send = sender(clock, [Response(503)] * 3)
+    assert schedule.request(send, CURRENT_URL).status_code == 503
+
+    send = sender(clock, [requests.ConnectionError()] * 3)
+    with pytest.raises(requests.ConnectionError):
+        schedule.request(send, CURRENT_URL)
+
+def test_current_season_jumps_ahead_of_backfill(budget, monkeypatch):
+    monkeypatch.setattr(schedule, 'REQUESTS_PER_MINUTE', 6000)
+    # nothing is sent before the block ends, both requests are queued by then
+    schedule.block(1)
+    served = []
+
+    def acquire(url):
+        schedule.acquire(schedule.priority(url))
+        served.append(url)
+
+    backfill = threading.Thread(target=acquire, args=(BACKFILL_URL,))
+    current = threading.Thread(target=acquire, args=(CURRENT_URL,))
+    backfill.start()
+    while len(schedule._waiting) < 1:
+        time.sleep(0.001)
+    current.start()
+    while len(schedule._waiting) < 2 and not served:
+        time.sleep(0.001)
+    backfill.join()
+    current.join()
+
+    assert served == [CURRENT_URL, BACKFILL_URL]
@@ -0,0 +1,34 @@
+import pandas as pd
+import pytest
+
+from fbref.function import store
+
+def test_write_keeps_one_format_per_entity(tmp_path):
+    df = pd.DataFrame({'Player': ['a', 'b'], 'Goals': [1, 2]})
+    store.write(df, 'player', 'Eredivisie', '2021-2022', root=str(tmp_path), format='feather')
+
+    with pytest.raises(ValueError):
+        store.write(df, 'player', 'Eredivisie', '2022-2023', root=str(tmp_path), format='parquet')
+    # without format the entity format is used
+    assert store.write(df, 'player', 'Eredivisie', '2022-2023', root=str(tmp_path)).endswith('.feather')
+    assert len(store.read('player', root=str(tmp_path), memory_map=False)) == 4
+
+def test_write_can_change_the_format_of_a_single_partition(tmp_path):
+    df = pd.DataFrame({'Player': ['a', 'b'], 'Goals': [1, 2]})
+    store.write(df, 'player', 'Eredivisie', '2022-2023', root=str(tmp_path), format='feather')
+    store.write(df, 'player', 'Eredivisie', '2022-2023', root=str(tmp_path), format='parquet')
+
+    assert store.partitions('player', root=str(tmp_path)) == [('Eredivisie', '2022-2023')]
+    assert len(store.read('player', root=str(tmp_path), memory_map=False)) == 2
+
+def test_read_only_opens_the_requested_partitions(tmp_path):
+    df = pd.DataFrame({'Player': ['a', 'b'], 'Goals': [1, 2]})
+    store.write(df, 'player', 'Eredivisie', '2021-2022', root=str(tmp_path), format='parquet')
+    path = store.write(df, 'player', 'Eredivisie', '2022-2023', root=str(tmp_path), format='parquet')
+    # a footer read of the other season would fail
+    with open(path, 'wb') as f:
+        f.write(b'not parquet')
+
+    df = store.read('player', seasons=['2021-2022'], root=str(tmp_path), memory_map=False)
+
+    assert df['Goals'].tolist() == [1, 2]